@@ -0,0 +1,161 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from Scripts.EnrichmentIndex import EnrichmentIndex
+
+logger = logging.getLogger(__name__)
+
+
+class _SortedTable:
+    """
+    Aggregated measure over integer dimensions (country, day, supplier, detail), stored sorted by
+    their combined key so that the rows of one country over a date range are one contiguous slice.
+    """
+    def __init__(self, dims: list, sizes: list, weights: np.ndarray = None):
+        self.sizes = [int(size) for size in sizes]
+        keys = np.zeros(len(dims[0]), dtype=np.int64)
+        for values, size in zip(dims, self.sizes):
+            keys = keys * size + values
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.values = np.bincount(inverse, weights=weights, minlength=len(self.keys))
+
+        # Dimension values of every aggregated row, decoded from the keys
+        self.dims = []
+        rest = self.keys
+        for size in reversed(self.sizes):
+            self.dims.append(rest % size)
+            rest = rest // size
+        self.dims.reverse()
+
+    def slice(self, countries: np.ndarray, first_day: int, end_day: int) -> np.ndarray:
+        """Positions of the rows of countries from first_day (included) to end_day (excluded)."""
+        stride = int(np.prod(self.sizes[2:]))
+        starts = np.searchsorted(self.keys, (countries * self.sizes[1] + first_day) * stride)
+        stops = np.searchsorted(self.keys, (countries * self.sizes[1] + end_day) * stride)
+        return np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)] or [np.empty(0, int)])
+
+
+class AnalyticsCube:
+    """
+    Aggregate cube of the cleaned transactions, built once per run, answering parameterized
+    analytics queries without scanning the transactions again. Three tables are kept sorted by
+    (country, day, supplier, detail):
+    - product sales per Description
+    - transaction counts per hour of the day
+    - supplier sales (canceled invoices excluded, as in aggregate_supplier_data)
+    A query selects one contiguous slice per country with a binary search, so it only costs the size
+    of the slice. Dates are filtered at day resolution; rows without Country or InvoiceDate are left out.
+    It contains the methods :
+    - best_product which finds the product with the highest sales
+    - busiest_hour which finds the hour with the most transactions
+    - supplier_ranking which ranks the suppliers by sales
+    Each one takes the optional filters country, continent, start, end (start included, end excluded)
+    and supplier; country, continent and supplier accept a value or a list of values.
+    """
+    def __init__(self, df: pd.DataFrame, enrichment: EnrichmentIndex):
+        """
+        Build the cube.
+
+        :param df: Cleaned transactions DataFrame (TotalAmount is computed if missing).
+        :param enrichment: EnrichmentIndex of the run, for the supplier and continent of the rows.
+        """
+        self.enrichment = enrichment
+        if "TotalAmount" in df.columns:
+            amounts = df["TotalAmount"].to_numpy(dtype="float64")
+        else:
+            amounts = df["Quantity"].to_numpy(dtype="float64") * df["UnitPrice"].to_numpy(dtype="float64")
+        dates = pd.to_datetime(df["InvoiceDate"]).to_numpy(dtype="datetime64[ns]")
+        country_codes, countries = pd.factorize(df["Country"], sort=True)
+        self.countries = pd.Index(np.asarray(countries, dtype=object), name="Country")
+        keep = (country_codes >= 0) & ~np.isnat(dates)
+
+        days = dates[keep].astype("datetime64[D]")
+        self.first_day = days.min() if len(days) else np.datetime64("1970-01-01")
+        day_codes = (days - self.first_day).astype(np.int64)
+        n_days = int(day_codes.max()) + 1 if len(days) else 1
+        hours = ((dates[keep] - dates[keep].astype("datetime64[D]")) // np.timedelta64(1, "h")).astype(np.int64)
+
+        invoice_codes, invoices = enrichment.factorize_invoices(df["InvoiceNo"])
+        supplier_codes = np.append(enrichment.supplier_codes(invoices), -1)[invoice_codes][keep] + 1  # 0: none
+        canceled = np.append(invoices.str.startswith("C"), False)[invoice_codes][keep]
+        has_invoice = invoice_codes[keep] >= 0
+        description_codes, descriptions = pd.factorize(df["Description"], sort=True)
+        self.descriptions = pd.Index(np.asarray(descriptions, dtype=object), name="Description")
+
+        country_codes, amounts = country_codes[keep], amounts[keep]
+        n_suppliers = len(enrichment.suppliers) + 1
+        described = description_codes[keep] >= 0
+        self.products = _SortedTable(
+            [country_codes[described], day_codes[described], supplier_codes[described],
+             description_codes[keep][described]],
+            [len(self.countries), n_days, n_suppliers, len(self.descriptions)], amounts[described])
+        self.hours = _SortedTable(
+            [country_codes[has_invoice], day_codes[has_invoice], supplier_codes[has_invoice], hours[has_invoice]],
+            [len(self.countries), n_days, n_suppliers, 24])
+        valid = ~canceled
+        self.suppliers = _SortedTable(
+            [country_codes[valid], day_codes[valid], supplier_codes[valid]],
+            [len(self.countries), n_days, n_suppliers], amounts[valid])
+        self.n_days = n_days
+        logger.info("Analytics cube built: %d product cells, %d hour cells, %d supplier cells",
+                    len(self.products.keys), len(self.hours.keys), len(self.suppliers.keys))
+
+    @staticmethod
+    def _as_list(value) -> list:
+        return [value] if isinstance(value, str) else list(value)
+
+    def _country_codes(self, country=None, continent=None) -> np.ndarray:
+        """Codes of the countries selected by name and/or continent."""
+        selected = np.ones(len(self.countries), dtype=bool)
+        if country is not None:
+            selected &= self.countries.isin(self._as_list(country))
+        if continent is not None:
+            continents = self.enrichment.continent_names(self.enrichment.continent_codes(self.countries))
+            selected &= pd.Index(continents).isin(self._as_list(continent))
+        return np.flatnonzero(selected)
+
+    def _day(self, date, default: int) -> int:
+        """Day code of a date, clipped to the days of the cube."""
+        if date is None:
+            return default
+        day = (np.datetime64(pd.Timestamp(date).normalize().to_datetime64(), "D") - self.first_day).astype(np.int64)
+        return int(np.clip(day, 0, self.n_days))
+
+    def _select(self, table: _SortedTable, country=None, continent=None, start=None, end=None,
+                supplier=None) -> np.ndarray:
+        """Positions of the table rows matching the filters."""
+        rows = table.slice(self._country_codes(country, continent), self._day(start, 0), self._day(end, self.n_days))
+        if supplier is not None:
+            codes = self.enrichment.suppliers.get_indexer(self._as_list(supplier)) + 1
+            rows = rows[np.isin(table.dims[2][rows], codes[codes > 0])]
+        return rows
+
+    def best_product(self, **filters):
+        """Description with the highest total sales in the slice (None when the slice is empty)."""
+        rows = self._select(self.products, **filters)
+        if not len(rows):
+            return None
+        sales = np.bincount(self.products.dims[3][rows], weights=self.products.values[rows],
+                            minlength=len(self.descriptions))
+        present = np.bincount(self.products.dims[3][rows], minlength=len(self.descriptions)) > 0
+        return self.descriptions[np.flatnonzero(present)[np.argmax(sales[present])]]
+
+    def busiest_hour(self, **filters):
+        """Hour of the day with the most transactions in the slice (None when the slice is empty)."""
+        rows = self._select(self.hours, **filters)
+        if not len(rows):
+            return None
+        return int(np.argmax(np.bincount(self.hours.dims[3][rows], weights=self.hours.values[rows], minlength=24)))
+
+    def supplier_ranking(self, **filters) -> pd.DataFrame:
+        """Fournisseur and TotalAmount of the suppliers of the slice, by decreasing sales."""
+        rows = self._select(self.suppliers, **filters)
+        codes = self.suppliers.dims[2][rows]
+        known = codes > 0
+        n_suppliers = len(self.enrichment.suppliers)
+        sales = np.bincount(codes[known] - 1, weights=self.suppliers.values[rows][known], minlength=n_suppliers)
+        present = np.flatnonzero(np.bincount(codes[known] - 1, minlength=n_suppliers) > 0)
+        ranking = pd.DataFrame({"Fournisseur": self.enrichment.supplier_names(present),
+                                "TotalAmount": sales[present]})
+        return ranking.sort_values(by="TotalAmount", ascending=False)
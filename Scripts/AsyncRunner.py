@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRunner:
+    """
+    Runs a DAG of pipeline stages with asyncio over a thread pool: every stage starts as soon as the
+    stages it depends on are done, so independent reads, aggregations and writes overlap (pandas,
+    pyarrow and file I/O release the GIL for most of their work).
+    It contains the methods :
+    - add which declares a stage and its dependencies
+    - run which executes the DAG and returns the result of every stage
+    - report which gives the timing of every stage and the critical path of the last run
+    - prefetch which reads an iterable ahead in a background thread through a bounded queue
+    """
+    def __init__(self, max_workers: int = 4):
+        """
+        Initialize an empty DAG.
+
+        :param max_workers: Number of threads running the stages.
+        """
+        self.max_workers = max_workers
+        self.stages = {}
+        self.timings = {}
+        self.wall_s = None
+
+    def add(self, name: str, func, *deps: str) -> str:
+        """
+        Declare a stage.
+
+        :param name: Unique stage name.
+        :param func: Function called with the results of deps, in order.
+        :param deps: Names of the stages it depends on, already declared.
+        :return: The stage name, to be used as a dependency
+        """
+        if name in self.stages:
+            raise ValueError("Stage %r is already declared" % name)
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError("Stage %r depends on undeclared stages %s" % (name, missing))
+        self.stages[name] = (func, deps)
+        return name
+
+    async def _run(self, pool: ThreadPoolExecutor, start: float) -> dict:
+        loop = asyncio.get_running_loop()
+        tasks = {}
+
+        async def run_stage(name):
+            func, deps = self.stages[name]
+            args = [await tasks[dep] for dep in deps]
+            started = time.perf_counter() - start
+            result = await loop.run_in_executor(pool, func, *args)
+            self.timings[name] = (started, time.perf_counter() - start)
+            return result
+
+        for name in self.stages:  # Declaration order is a topological order
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+        results = await asyncio.gather(*tasks.values())
+        return dict(zip(tasks, results))
+
+    def run(self) -> dict:
+        """
+        Execute the DAG; the first failing stage raises its exception once the running stages are done.
+        Must not be called from a running event loop.
+
+        :return: Dictionary of stage name -> result
+        """
+        self.timings = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            results = asyncio.run(self._run(pool, start))
+        self.wall_s = time.perf_counter() - start
+        logger.info("Stage DAG completed in %.3f s, critical path: %s", self.wall_s, self.critical_path()[0])
+        return results
+
+    def critical_path(self) -> tuple:
+        """
+        Chain of stages that determined the wall time of the last run: from the stage that finished last,
+        follow at each step the dependency that finished last.
+        :return: Tuple (stage names in execution order, sum of their durations in seconds)
+        """
+        if not self.timings:
+            return [], 0.0
+        name = max(self.timings, key=lambda stage: self.timings[stage][1])
+        path = [name]
+        while self.stages[name][1]:
+            name = max(self.stages[name][1], key=lambda stage: self.timings[stage][1])
+            path.append(name)
+        path.reverse()
+        return path, sum(self.timings[stage][1] - self.timings[stage][0] for stage in path)
+
+    def report(self) -> dict:
+        """Timings of the last run: per stage start/end offsets, wall time and critical path."""
+        path, path_s = self.critical_path()
+        stages = [{"name": name, "deps": list(self.stages[name][1]), "start_s": started, "end_s": ended,
+                   "wall_s": ended - started}
+                  for name, (started, ended) in sorted(self.timings.items(), key=lambda item: item[1][0])]
+        return {"wall_s": self.wall_s, "critical_path": path, "critical_path_s": path_s,
+                "busy_s": sum(stage["wall_s"] for stage in stages), "stages": stages}
+
+    @staticmethod
+    def prefetch(iterable, maxsize: int = 1):
+        """
+        Iterate over iterable while a background thread reads up to maxsize items ahead, e.g. to parse the
+        next chunk of a file while the current one is processed. Memory is bounded by maxsize + 2 items.
+        Exceptions of the reader are raised in the consumer.
+
+        :param iterable: Iterable to read ahead (consumed by the background thread).
+        :param maxsize: Capacity of the queue between the reader and the consumer (0 reads in the caller).
+        """
+        if maxsize <= 0:
+            yield from iterable
+            return
+
+        items = queue.Queue(maxsize=maxsize)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    items.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read():
+            try:
+                for item in iterable:
+                    if not put((item, None)):
+                        return
+                put((done, None))
+            except BaseException as e:
+                put((done, e))
+
+        reader = threading.Thread(target=read, name="prefetch", daemon=True)
+        reader.start()
+        try:
+            while True:
+                item, error = items.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    return
+                yield item
+        finally:
+            stop.set()  # The consumer stopped early or failed: release the reader
+            reader.join()
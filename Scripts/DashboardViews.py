@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import pandas as pd
+import logging
+from Scripts.IngestCache import IngestCache
+from Scripts.Normalizer import Normalizer
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardViews:
+    """
+    Materialized views behind the Streamlit dashboard: small aggregate tables computed once
+    by the ETL from the semi-cleaned rows, so the dashboard no longer scans the row set.
+    Every view carries the version of the rows it was built from, which the dashboard uses
+    as its cache key.
+    It contains the methods :
+    - build which computes the views from the semi-cleaned rows
+    - save which writes the views and their version to a directory
+    - read_version which reads the version of saved views without loading them
+    - load which reads saved views back
+    """
+    VIEWS = ("continent_sales", "top_products", "product_sales", "monthly_sales", "country_sales")
+    VERSION_FILE = "version.json"
+    ALL = "All"  # Continent label of the overall top products
+
+    def __init__(self, views: dict, version: str):
+        """
+        Initialize with already computed views.
+
+        :param views: Dictionary view name -> DataFrame.
+        :param version: Version of the rows the views were built from.
+        """
+        self.views = views
+        self.version = version
+
+    @staticmethod
+    def sales_rows(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Dashboard preparation of the semi-cleaned rows: sold lines with their TotalSales.
+        The Year/Month columns of normalized rows are kept, and the text is normalized once per distinct value.
+        Rows without continent are kept here but, as in the row-level charts, left out of the grouped views.
+        """
+        columns = ["StockCode", "Description", "Quantity", "UnitPrice", "InvoiceDate", "Country", "Continent"]
+        df = df[columns + [name for name in ("Year", "Month") if name in df.columns]].copy()
+        df["Quantity"] = pd.to_numeric(df["Quantity"], errors="coerce").fillna(0)
+        df["UnitPrice"] = pd.to_numeric(df["UnitPrice"], errors="coerce").fillna(0)
+        df = df[df["Quantity"] > 0]
+        df["Description"] = Normalizer.normalize_text(df["Description"])
+        df["StockCode"] = Normalizer.normalize_text(df["StockCode"])
+        df["Continent"] = df["Continent"].astype(object)
+        df["TotalSales"] = df["Quantity"] * df["UnitPrice"]
+        return df
+
+    @classmethod
+    def build(cls, semi_cleaned_df: pd.DataFrame, top_n: int = 50) -> "DashboardViews":
+        """
+        Compute the views.
+
+        :param semi_cleaned_df: Semi-cleaned rows (see ETLPipeline._semi_cleaned_frame).
+        :param top_n: Number of products kept per continent and overall in top_products.
+        """
+        version = IngestCache.frame_digest(semi_cleaned_df)[:16]
+        df = cls.sales_rows(semi_cleaned_df)
+
+        continent_sales = df.groupby("Continent", as_index=False, observed=True)["TotalSales"].sum()
+        country_sales = df.groupby(["Continent", "Country"], as_index=False, observed=True)["TotalSales"].sum()
+
+        # Grouped on the integer-backed months, only the grouped keys are converted to month-end dates. Like the
+        # monthly resample of the rows, every month of the range is listed, with 0 for continents without sales
+        month = Normalizer.year_month(df).rename("InvoiceDate")
+        monthly_sales = df.groupby([month, df["Continent"]], observed=True)["TotalSales"].sum()
+        if len(monthly_sales):
+            months = monthly_sales.index.get_level_values("InvoiceDate")
+            monthly_sales = monthly_sales.reindex(pd.MultiIndex.from_product(
+                [pd.period_range(months.min(), months.max(), freq="M", name="InvoiceDate"),
+                 monthly_sales.index.get_level_values("Continent").unique()]
+            ), fill_value=0)
+        monthly_sales = monthly_sales.reset_index()
+        monthly_sales["InvoiceDate"] = monthly_sales["InvoiceDate"].dt.to_timestamp(how="end").dt.normalize()
+
+        # Top products per continent, plus the overall ranking under the "All" label; product_sales keeps
+        # every product of every continent, so the ranking of any selection of continents is exact
+        products = df.groupby(["Continent", "StockCode", "Description"], as_index=False, observed=True)["TotalSales"].sum()
+        overall = products.groupby(["StockCode", "Description"], as_index=False, observed=True)["TotalSales"].sum()
+        overall.insert(0, "Continent", cls.ALL)
+        top_products = pd.concat([
+            products.sort_values(by="TotalSales", ascending=False).groupby("Continent").head(top_n),
+            overall.sort_values(by="TotalSales", ascending=False).head(top_n)
+        ], ignore_index=True)
+
+        views = {
+            "continent_sales": continent_sales,
+            "top_products": top_products,
+            "product_sales": products,
+            "monthly_sales": monthly_sales,
+            "country_sales": country_sales,
+        }
+        logger.info("Dashboard views %s built from %d rows: %s", version, len(semi_cleaned_df),
+                    {name: len(view) for name, view in views.items()})
+        return cls(views, version)
+
+    def save(self, path: str):
+        """
+        Write one Parquet file per view plus version.json; the directory is replaced atomically.
+
+        :param path: Output directory of the views.
+        """
+        tmp_path, old_path = path + ".tmp", path + ".old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, view in self.views.items():
+            view.to_parquet(os.path.join(tmp_path, name + ".parquet"), index=False)
+        with open(os.path.join(tmp_path, self.VERSION_FILE), "w") as file:
+            json.dump({"version": self.version, "views": list(self.views)}, file, indent=4)
+
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        logger.info("Dashboard views %s saved to %s", self.version, path)
+
+    @classmethod
+    def read_version(cls, path: str):
+        """Version of the views saved in path, or None if there are none."""
+        version_path = os.path.join(path, cls.VERSION_FILE)
+        if not os.path.exists(version_path):
+            return None
+        with open(version_path, "r") as file:
+            return json.load(file)["version"]
+
+    @staticmethod
+    def dataset_continents(path: str) -> list:
+        """
+        Continents of the semi-cleaned dataset, read from its partition keys only. The Hive partitioning
+        decodes the directory names (North%20America); rows without continent are left out.
+        """
+        import pyarrow.dataset as ds
+        if not os.path.isdir(path):
+            return []
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        keys = (ds.get_partition_keys(fragment.partition_expression) for fragment in dataset.get_fragments())
+        return sorted({key["Continent"] for key in keys if key.get("Continent") is not None})
+
+    @classmethod
+    def load(cls, path: str) -> "DashboardViews":
+        """Read views saved with save."""
+        version = cls.read_version(path)
+        if version is None:
+            raise FileNotFoundError("No dashboard views in %s" % path)
+        views = {name: pd.read_parquet(os.path.join(path, name + ".parquet")) for name in cls.VIEWS}
+        return cls(views, version)
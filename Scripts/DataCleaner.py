@@ -1,17 +1,48 @@
+import contextlib
 import pandas as pd
+import numpy as np
 import logging
-import unittest
 import warnings
 
-warnings.filterwarnings("ignore")
+# Only the chained-assignment warnings of the column updates below, and only for this module
+warnings.filterwarnings("ignore", category=pd.errors.SettingWithCopyWarning, module=__name__)
 
-# Configure logging
-logging.basicConfig(
-    filename="logs/data_cleaner.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
  
+class SeenRows:
+    """
+    Sorted set of row hashes, used to drop duplicates across the chunks of a streamed dataset.
+    Only 8 bytes are kept per distinct row instead of the rows themselves.
+    """
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    @staticmethod
+    def hash_rows(df: pd.DataFrame) -> np.ndarray:
+        """
+        Hash each row of a chunk.
+        Numeric columns are hashed as float64 so that a column read as int in one chunk
+        and as float in another (because of missing values) still hashes the same.
+        """
+        numeric_cols = df.select_dtypes(include=["number"]).columns
+        normalized = df.astype({col: "float64" for col in numeric_cols})
+        return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+    def mark(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Flag the rows of a chunk already seen in this chunk or in a previous one,
+        and remember the new ones.
+        :return: Boolean mask of duplicate rows
+        """
+        hashes = self.hash_rows(df)
+        duplicated = pd.Series(hashes).duplicated().to_numpy()
+        if len(self.hashes):
+            positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+            duplicated |= self.hashes[positions] == hashes
+        self.hashes = np.sort(np.concatenate([self.hashes, hashes[~duplicated]]), kind="stable")
+        return duplicated
+
+
 class DataCleaner:
     """
     Class for Data cleaning
@@ -19,6 +50,7 @@ class DataCleaner:
     - remove_duplicates which removes duplicates
     - handle_missing_values which handles missing values
     - filter_valid_transactions which filters out canceled orders
+    - clean which applies the three rules above as one combined mask
     """
     def __init__(self, df: pd.DataFrame):
         """
@@ -28,14 +60,24 @@ class DataCleaner:
         """
         self.df = df
         self.canceled_df = None  # Store canceled transactions separately
-        logging.info("DataCleaner initialized with dataset of shape %s", self.df.shape)
+        self.drop_counts = {}  # Rows dropped per rule by clean
+        self.profiler = None  # Set by PipelineProfiler.instrument, to time the rules of clean
+        logger.info("DataCleaner initialized with dataset of shape %s", self.df.shape)
  
-    def remove_duplicates(self):
-        """Remove duplicate rows from the dataset."""
+    def remove_duplicates(self, seen: SeenRows = None):
+        """
+        Remove duplicate rows from the dataset.
+
+        :param seen: Optional SeenRows shared by the chunks of a streamed dataset, so that
+                     rows already seen in a previous chunk are removed as well.
+        """
         initial_shape = self.df.shape
-        self.df = self.df.drop_duplicates()
-        logging.info("Removed duplicates: %d rows removed. New shape: %s",
-                     initial_shape[0] - self.df.shape[0], self.df.shape)
+        if seen is None:
+            self.df = self.df.drop_duplicates()
+        else:
+            self.df = self.df[~seen.mark(self.df)]
+        logger.info("Removed duplicates: %d rows removed. New shape: %s",
+                    initial_shape[0] - self.df.shape[0], self.df.shape)
  
     def handle_missing_values(self):
         """
@@ -44,18 +86,87 @@ class DataCleaner:
         - Description: Fill missing product descriptions with 'Unknown'.
         """
         initial_shape = self.df.shape
-        self.df.dropna(subset=["CustomerID", "Quantity"], inplace=True)
-        self.df["Description"].fillna("Unknown", inplace=True)
-        logging.info("Handled missing values: %d rows removed. New shape: %s",
-                     initial_shape[0] - self.df.shape[0], self.df.shape)
+        self.df = self.df.dropna(subset=["CustomerID", "Quantity"])
+        self.df["Description"] = self._fill_descriptions(self.df["Description"])
+        logger.info("Handled missing values: %d rows removed. New shape: %s",
+                    initial_shape[0] - self.df.shape[0], self.df.shape)
 
  
     def filter_valid_transactions(self):
         """Séparer les transactions annulées au lieu de les supprimer."""
-        self.canceled_df = self.df[self.df["InvoiceNo"].astype(str).str.startswith("C")].copy()
-        self.df = self.df[~self.df["InvoiceNo"].astype(str).str.startswith("C")]
-        logging.info("Separated canceled transactions. Valid transactions: %s, Canceled transactions: %s",
-                     self.df.shape, self.canceled_df.shape)
+        canceled = self.canceled_rows(self.df)
+        self.canceled_df = self.df[canceled].copy()
+        self.df = self.df[~canceled]
+        logger.info("Separated canceled transactions. Valid transactions: %s, Canceled transactions: %s",
+                    self.df.shape, self.canceled_df.shape)
+
+    @staticmethod
+    def _fill_descriptions(description: pd.Series) -> pd.Series:
+        """Missing product descriptions replaced by 'Unknown' (added to the categories if needed)."""
+        if isinstance(description.dtype, pd.CategoricalDtype) and "Unknown" not in description.cat.categories:
+            description = description.cat.add_categories("Unknown")
+        return description.fillna("Unknown") if description.hasnans else description
+
+    @staticmethod
+    def duplicated_rows(df: pd.DataFrame) -> np.ndarray:
+        """
+        Mask of the rows equal to an earlier row. Rows are hashed first; only the rows whose
+        hash occurs more than once are compared exactly, so a hash collision never drops a row.
+        """
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        duplicated = np.zeros(len(df), dtype=bool)
+        candidates = np.flatnonzero(pd.Series(hashes).duplicated(keep=False).to_numpy())
+        if len(candidates):
+            duplicated[candidates] = df.iloc[candidates].duplicated().to_numpy()
+        return duplicated
+
+    @staticmethod
+    def canceled_rows(df: pd.DataFrame) -> np.ndarray:
+        """Mask of the canceled transactions ("C" invoices), parsed once per distinct invoice."""
+        if "IsCancelled" in df.columns:
+            return df["IsCancelled"].to_numpy(dtype=bool)  # Parsed once by TransactionSchema
+        codes, invoices = pd.factorize(df["InvoiceNo"])
+        return np.append(pd.Index(invoices).astype(str).str.startswith("C"), False)[codes]
+
+    def _stage(self, name: str, rows_in: int):
+        """Profiler stage of one rule of clean, or a no-op context when the cleaner is not profiled."""
+        if self.profiler is None:
+            return contextlib.nullcontext({})
+        return self.profiler.stage("clean." + name, rows_in)
+
+    def clean(self, seen: SeenRows = None):
+        """
+        Single-pass plan equivalent to remove_duplicates, handle_missing_values and filter_valid_transactions:
+        the duplicate, missing value and cancellation rules are evaluated as boolean masks over the
+        original frame and combined, then the valid and canceled frames are each materialized once.
+        When profiled, each rule is recorded as a stage (clean.duplicates, clean.missing_values,
+        clean.cancellations) whose rows out are the rows it keeps.
+
+        :param seen: Optional SeenRows shared by the chunks of a streamed dataset.
+        :return: Tuple (valid transactions, canceled transactions)
+        """
+        df = self.df
+        with self._stage("duplicates", len(df)) as record:
+            duplicated = seen.mark(df) if seen is not None else self.duplicated_rows(df)
+            record["rows_out"] = int((~duplicated).sum())
+        with self._stage("missing_values", record["rows_out"]) as record:
+            missing = ~duplicated & (df["CustomerID"].isna().to_numpy() | df["Quantity"].isna().to_numpy())
+            kept = ~duplicated & ~missing
+            record["rows_out"] = int(kept.sum())
+        with self._stage("cancellations", record["rows_out"]) as record:
+            canceled = kept & self.canceled_rows(df)
+            record["rows_out"] = int((kept & ~canceled).sum())
+
+        self.df = df.take(np.flatnonzero(kept & ~canceled))
+        self.canceled_df = df.take(np.flatnonzero(canceled))
+        for frame in (self.df, self.canceled_df):
+            frame["Description"] = self._fill_descriptions(frame["Description"])
+
+        self.drop_counts = {"duplicates": int(duplicated.sum()), "missing_values": int(missing.sum())}
+        logger.info("Cleaned %d rows: %d duplicates and %d rows with missing values removed. "
+                    "Valid transactions: %s, Canceled transactions: %s", len(df), self.drop_counts["duplicates"],
+                    self.drop_counts["missing_values"], self.df.shape, self.canceled_df.shape)
+        return self.df, self.canceled_df
 
     def get_cleaned_data(self):
         """Retourne les données nettoyées et les transactions annulées."""
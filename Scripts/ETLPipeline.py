@@ -1,90 +1,694 @@
+import contextlib
+import glob
+import os
+import shutil
+import sys
+from typing import TYPE_CHECKING
 import pandas as pd
 import logging
-from Scripts.DataCleaner import DataCleaner
+from Scripts.DataCleaner import DataCleaner, SeenRows
 from Scripts.TransactionProcessor import TransactionProcessor
+from Scripts.IngestCache import IngestCache
+from Scripts.PartialAggregates import PartialAggregates
+from Scripts.EnrichmentIndex import EnrichmentIndex
+from Scripts.ParallelIngest import ParallelIngest
+from Scripts.PipelineProfiler import PipelineProfiler
+from Scripts.TransactionSchema import TransactionSchema
+from Scripts.Normalizer import Normalizer
+
+# The engines, writers and helpers of optional modes are imported by the methods using them,
+# so that importing the pipeline (e.g. for the CLI) only loads what the default run needs
+if TYPE_CHECKING:
+    from Scripts.QueryPlan import QueryPlan
+    from Scripts.ResultCache import ResultCache
  
-# Configure logging
-logging.basicConfig(
-    filename="logs/etl_pipeline.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
  
 class ETLPipeline:
     """Orchestrates the entire ETL process, including data cleaning, transformation, and storage."""
+    ENGINES = ("pandas", "out_of_core")
+    # final_results key -> (TransactionProcessor method, position in its returned tuple or None)
+    RESULT_METHODS = {
+        "country_sales": ("group_by_country", None),
+        "monthly_stats": ("aggregate_monthly_data", None),
+        "best_product_in_france": ("calcul_stat_data", 0),
+        "busiest_transaction_hour": ("calcul_stat_data", 1),
+        "supplier_sales": ("aggregate_supplier_data", 0),
+        "uk_2011_supplier_sales": ("aggregate_supplier_data", 1),
+        "continent_sales": ("aggregate_world_data", 0),
+        "continent_with_most_cancellations": ("aggregate_world_data", 1),
+    }
+    # Modules whose code determines the aggregates, part of the result cache fingerprint (this module
+    # included, for the derived columns it adds before the memoized methods run)
+    RESULT_MODULES = ("Scripts.DataCleaner", "Scripts.TransactionProcessor", "Scripts.FusedAggregator",
+                      "Scripts.EnrichmentIndex", "Scripts.TransactionSchema", "Scripts.IngestCache",
+                      "Scripts.Normalizer", "Scripts.PartialAggregates", "Scripts.SketchAggregates",
+                      "Scripts.ETLPipeline")
  
-    def __init__(self, retail_data_path: str, supplier_data_path: str, continent_mapping: str):
+    def __init__(self, retail_data_path, supplier_data_path: str, continent_mapping: str,
+                 cache_dir: str = None, rebuild_cache: bool = False, chunksize: int = None,
+                 state_dir: str = None, fused_aggregation: bool = False,
+                 ingest_workers: int = None, ingest_on_error: str = "raise",
+                 workers: int = None, partition_key: str = "CustomerID", profiler: PipelineProfiler = None,
+                 typed_schema: bool = True, engine: str = "pandas", spill_dir: str = None,
+                 spill_buckets: int = 64, prefetch: int = 1, defer_load: bool = False,
+                 result_cache: "ResultCache" = None, sketches: dict = None, normalize: bool = True,
+                 normalize_text: bool = False):
         """
         Initializes the ETL pipeline by loading the datasets.
         
-        :param retail_data_path: Path to the Online Retail Excel file.
+        :param retail_data_path: Path to the Online Retail Excel file, or a glob pattern / list of
+                                 Excel and CSV drops parsed in parallel and concatenated in order.
         :param supplier_data_path: Path to the Supplier CSV file.
+        :param continent_mapping: Path to the Country/Continent mapping CSV file.
+        :param cache_dir: Optional IngestCache directory; the sources are then parsed once
+                          and later runs read the cached Parquet columns instead.
+        :param rebuild_cache: Force the cached entries to be rebuilt from the sources.
+        :param chunksize: Enables the streaming mode: the retail data is not loaded here but read
+                          by run_pipeline in chunks of at most chunksize rows.
+        :param state_dir: Enables the incremental mode: the partial aggregates and the InvoiceDate/InvoiceNo
+                          high-water mark are persisted there and each run only processes the new rows.
+                          The new rows are read from the ingest cache with the InvoiceDate filter pushed down
+                          to its row groups, so without cache_dir one is kept next to it (<state_dir>.cache).
+        :param fused_aggregation: Compute all the aggregates in one pass (TransactionProcessor.aggregate_all)
+                                  instead of calling each TransactionProcessor method in turn.
+        :param ingest_workers: Number of processes parsing multiple retail files (os.cpu_count() by default).
+        :param ingest_on_error: "raise" to fail when a retail file cannot be parsed, "skip" to leave it out.
+        :param workers: Enables the partition-parallel mode: cleaning and aggregation run in this many
+                        processes over hash partitions of the data (see PartitionExecutor).
+        :param partition_key: Column the rows are hash-partitioned on in the partition-parallel mode.
+        :param profiler: Optional PipelineProfiler recording the loading, run_pipeline and every
+                         DataCleaner/TransactionProcessor step; its report is written after each run.
+        :param typed_schema: Convert the retail rows to the memory-lean TransactionSchema (categorical strings,
+                             Int32 CustomerID, int32 Quantity, IsCancelled flag) as they are read.
+        :param engine: "pandas" (default) runs the modes above in memory; "out_of_core" runs on data larger
+                       than memory by spilling the rows to Parquet buckets (see OutOfCoreExecutor).
+        :param spill_dir: Out-of-core engine only. Directory of the temporary buckets.
+        :param spill_buckets: Out-of-core engine only. Number of buckets, each of which must fit in memory.
+        :param prefetch: Streaming mode and out-of-core engine only. Number of chunks read ahead by a background
+                         thread while the current one is processed (0 reads them in turn).
+        :param defer_load: Do not read the datasets here: run_async reads them concurrently, and
+                           run_pipeline calls load first.
+        :param result_cache: Optional ResultCache memoizing every TransactionProcessor output of the in-memory
+                             mode, keyed by the input files, the options and the code version. With
+                             defer_load, results() then answers without reading the data.
+        :param sketches: Streaming and incremental modes only. SketchAggregates settings ({} for the defaults)
+                         enabling the approximate top products and distinct customer/invoice counts, added
+                         to final_results; in the incremental mode they are kept with the partials.
+        :param normalize: Run the Normalizer on the retail rows as they are read: Year/Month/Hour columns
+                          computed once from InvoiceDate and reused by the aggregations and the dashboard.
+        :param normalize_text: Also strip and upper-case Description/StockCode at ingest (once per distinct
+                               value). Opt-in, since it changes the cleaned data: rows differing only by the
+                               case or spaces of these columns become duplicates, and their products merge.
         """
         try:
-            self.raw_df = pd.read_excel(retail_data_path)  # Load raw data before cleaning
-            self.raw_df.drop_duplicates(inplace=True)  # Remove duplicate transactions
-            self.df = self.raw_df.copy()
-            
-            self.supplier_df = pd.read_csv(supplier_data_path)
-            self.continent_mapping = pd.read_csv(continent_mapping)
+            if engine not in self.ENGINES:
+                raise ValueError("Unknown engine %r, expected one of %s" % (engine, self.ENGINES))
+            if state_dir and not cache_dir:
+                # Without a cache every delta run would re-parse the whole history before filtering it
+                cache_dir = os.path.normpath(state_dir) + ".cache"
+                logger.info("Incremental mode without cache_dir, caching the sources in %s", cache_dir)
+            self.cache = IngestCache(cache_dir, rebuild=rebuild_cache) if cache_dir else None
+            self.retail_data_path = retail_data_path
+            self.chunksize = chunksize
+            self.state_dir = state_dir
+            self.fused_aggregation = fused_aggregation
+            self.ingest_workers = ingest_workers
+            self.ingest_on_error = ingest_on_error
+            self.ingest_report = None
+            self.workers = workers
+            self.partition_key = partition_key
+            self.profiler = profiler
+            self.typed_schema = typed_schema
+            self.engine = engine
+            self.spill_dir = spill_dir
+            self.spill_buckets = spill_buckets
+            self.prefetch = prefetch
+            self.result_cache = result_cache
+            self.sketches = sketches
+            self.normalize = normalize
+            self.normalize_text = normalize_text
+            self.cube = None
+            self.supplier_data_path = supplier_data_path
+            self.continent_mapping_path = continent_mapping
+            self.raw_df = self.df = None
+            self.supplier_df = self.continent_mapping = self.enrichment = None
+        except Exception as e:
+            logger.error("Error loading datasets: %s", str(e))
+            raise RuntimeError("Failed to load datasets.") from e
 
+        if not defer_load:
+            self.load()
 
-            logging.info("Datasets loaded successfully. Retail data shape: %s, Supplier data shape: %s",
-                         self.df.shape, self.supplier_df.shape)
+    def _loads_retail(self) -> bool:
+        """True in the modes that load the whole retail data before run_pipeline."""
+        return self.chunksize is None and self.state_dir is None and self.engine == "pandas"
+
+    def load(self):
+        """Loads the datasets: the retail data (except in the chunked modes), the supplier and continent tables."""
+        try:
+            if self._loads_retail():
+                with self._stage("load") as record:
+                    self.raw_df = self._read_retail()  # Load raw data before cleaning
+                    self.df = self.raw_df  # Not modified by the cleaning, which removes the duplicates
+                    record["rows_in"] = record["rows_out"] = len(self.raw_df)
+            # Otherwise read chunk by chunk (or as a delta) in run_pipeline
+
+            self.supplier_df = self._read_source(self.supplier_data_path)
+            self.continent_mapping = self._read_source(self.continent_mapping_path)
+            self.enrichment = EnrichmentIndex(self.supplier_df, self.continent_mapping)  # Built once per run
+
+            logger.info("Datasets loaded successfully. Retail data shape: %s, Supplier data shape: %s",
+                        self.df.shape if self.df is not None else "deferred", self.supplier_df.shape)
         except Exception as e:
-            logging.error("Error loading datasets: %s", str(e))
+            logger.error("Error loading datasets: %s", str(e))
             raise RuntimeError("Failed to load datasets.") from e
+
+    def _stage(self, name: str, rows_in: int = None):
+        """Profiler stage, or a no-op context when the pipeline is not profiled."""
+        if self.profiler is None:
+            return contextlib.nullcontext({})
+        return self.profiler.stage(name, rows_in)
+
+    def _instrument(self, obj):
+        """Records the steps of a DataCleaner/TransactionProcessor when the pipeline is profiled."""
+        return self.profiler.instrument(obj) if self.profiler is not None else obj
+
+    def _read_source(self, path: str) -> pd.DataFrame:
+        """Reads a source file, through the ingest cache when one is configured."""
+        if self.cache is not None:
+            return self.cache.load(path)
+        return IngestCache.read_source(path)
+
+    def _is_multi_file(self) -> bool:
+        """True when the retail data is given as a list or a glob pattern."""
+        return not isinstance(self.retail_data_path, str) or glob.has_magic(self.retail_data_path)
+
+    def _typed(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Applies the TransactionSchema and the Normalizer to freshly read retail rows, unless they are disabled."""
+        if self.typed_schema:
+            df = TransactionSchema.apply(df)
+        return Normalizer.apply(df, text=self.normalize_text) if self.normalize else df
+
+    def _read_retail(self, filters=None) -> pd.DataFrame:
+        """
+        Reads the retail data, parsing multiple files in parallel (see ParallelIngest).
+
+        :param filters: Optional pyarrow filters pushed down to the row groups of the cached entries
+                        (only on their timestamp columns, see IngestCache.timestamp_filters); they may
+                        leave non-matching rows, which the caller filters out.
+        """
+        if not self._is_multi_file():
+            if filters and self.cache is not None:
+                path = self.retail_data_path
+                return self._typed(self.cache.load(path, filters=self.cache.timestamp_filters(path, filters)))
+            return self._typed(self._read_source(self.retail_data_path))
+        ingest = ParallelIngest(self.retail_data_path, cache=self.cache, max_workers=self.ingest_workers,
+                                on_error=self.ingest_on_error)
+        try:
+            return self._typed(ingest.run(filters=filters))
+        finally:
+            self.ingest_report = ingest.report()
+
+    def _iter_retail_chunks(self, chunksize: int = None):
+        """Yields the retail data in chunks of at most chunksize (self.chunksize) rows, file after file."""
+        from Scripts.AsyncRunner import AsyncRunner
+        chunksize = chunksize or self.chunksize
+        paths = ParallelIngest.resolve(self.retail_data_path) if self._is_multi_file() else [self.retail_data_path]
+        for path in paths:
+            if self.cache is not None:
+                chunks = self.cache.iter_chunks(path, chunksize)
+            else:
+                chunks = IngestCache.iter_source_chunks(path, chunksize)
+            yield from AsyncRunner.prefetch(map(self._typed, chunks), self.prefetch)
  
-    def run_pipeline(self):
-        """Executes the full ETL process: data cleaning, transformations, and processing."""
+    def analytics_cube(self):
+        """
+        AnalyticsCube of the cleaned data of the last in-memory run, built on first use and kept for the run,
+        e.g. etl.analytics_cube().supplier_ranking(continent="Europe", start="2011-06-01", end="2011-09-01").
+        """
+        try:
+            if self.cube is None:
+                if self.df is None or "TotalAmount" not in self.df.columns:
+                    raise ValueError("analytics_cube needs the cleaned data of an in-memory run_pipeline")
+                self.cube = TransactionProcessor(self.df, self.canceled_df, self.supplier_df, self.continent_mapping,
+                                                 self.enrichment).analytics_cube()
+            return self.cube
+
+        except Exception as e:
+            logger.error("Analytics cube failed: %s", str(e))
+            raise RuntimeError("Failed to build the analytics cube.") from e
+
+    def scan_retail(self) -> "QueryPlan":
+        """
+        Lazy QueryPlan over the raw retail data, for ad-hoc slices. With the ingest cache it scans the
+        cached Parquet entries, so its filters and columns are pushed down to their row groups;
+        otherwise it runs over the loaded (or freshly read) frame.
+        """
+        from Scripts.QueryPlan import QueryPlan
+        if self.cache is not None:
+            paths = ParallelIngest.resolve(self.retail_data_path) if self._is_multi_file() else [self.retail_data_path]
+            entries = [self.cache.entry_path(path) for path in paths]
+            return QueryPlan.scan(entries[0] if len(entries) == 1 else entries)
+        return QueryPlan.scan(self.raw_df if self.raw_df is not None else self._read_retail())
+
+    def run_pipeline(self, cleaned_output_path: str = None):
+        """
+        Executes the full ETL process: data cleaning, transformations, and processing.
+
+        :param cleaned_output_path: Streaming mode and out-of-core engine only. Parquet file the cleaned
+                                    rows are appended to; it is returned as final_results["cleaned_data"].
+        """
+        if self.supplier_df is None:
+            self.load()
+        self.cube = None  # Rebuilt from the new cleaned data on demand
+        with self._stage("run_pipeline", PipelineProfiler.count_rows(self.df)) as record:
+            final_results = self._dispatch(cleaned_output_path)
+            record["rows_out"] = PipelineProfiler.count_rows(final_results["cleaned_data"])
+        if self.profiler is not None and self.profiler.report_path:
+            self.profiler.write_report()
+        return final_results
+
+    def _dispatch(self, cleaned_output_path: str = None):
+        """Runs the execution engine and mode selected at initialization."""
+        if self.engine == "out_of_core":
+            return self._run_out_of_core(cleaned_output_path)
+        if self.state_dir is not None:
+            return self._run_incremental()
+        if self.chunksize is not None:
+            return self._run_streaming(cleaned_output_path)
+        if self.workers:
+            return self._run_partitioned()
+        return self._run_in_memory()
+
+    def _run_in_memory(self):
+        """Default mode of run_pipeline: the whole dataset is cleaned and processed in memory."""
         try:
-            logging.info("Starting ETL pipeline...")
+            logger.info("Starting ETL pipeline...")
 
 
             # Step 1: Data Cleaning
-            cleaner = DataCleaner(self.df)
-            cleaner.remove_duplicates()
-            cleaner.handle_missing_values()
-            cleaner.filter_valid_transactions()
-            self.df, self.canceled_df = cleaner.get_cleaned_data()  # Get cleaned and canceled data
+            cleaner = self._instrument(DataCleaner(self.df))
+            self.df, self.canceled_df = cleaner.clean()  # Get cleaned and canceled data
 
-            logging.info("Data cleaning completed. Cleaned data shape: %s, Canceled transactions shape: %s",
+            logger.info("Data cleaning completed. Cleaned data shape: %s, Canceled transactions shape: %s",
                         self.df.shape, self.canceled_df.shape)
 
             # Step 2: Transaction Processing
-            processor = TransactionProcessor(self.df, self.canceled_df, self.supplier_df, self.continent_mapping)
+            processor = self._instrument(TransactionProcessor(self.df, self.canceled_df, self.supplier_df,
+                                                              self.continent_mapping, self.enrichment))
             processor.calculate_total_amount()
-            country_sales = processor.group_by_country()
-            monthly_stats = processor.aggregate_monthly_data()
-            best_product, busiest_hour = processor.calcul_stat_data()
-            supplier_sales, uk_2011_sales = processor.aggregate_supplier_data()
-            continent_sales, continent_with_most_cancellations = processor.aggregate_world_data()
-
-            logging.info("Transaction processing completed.")
-
-            # Final Data Storage
-            self.df["TotalAmount"] = self.df["Quantity"] * self.df["UnitPrice"]
-            final_results = {
-                "cleaned_data": self.df,
-                "country_sales": country_sales,
-                "monthly_stats": monthly_stats,
-                "best_product_in_france": best_product,
-                "busiest_transaction_hour": busiest_hour,
-                "supplier_sales": supplier_sales,
-                "uk_2011_supplier_sales": uk_2011_sales,
-                "continent_sales": continent_sales,
-                "continent_with_most_cancellations": continent_with_most_cancellations
-            }
-            logging.info("ETL pipeline execution completed successfully.")
+            if self.fused_aggregation:
+                aggregates = self._memoized(processor, "aggregate_all")
+            else:
+                if self.result_cache is not None:
+                    # Added first: the methods served from the cache do not add them for the ones computed after
+                    self._add_derived_columns()
+                outputs = {method: self._memoized(processor, method)
+                           for method in dict.fromkeys(method for method, _ in self.RESULT_METHODS.values())}
+                aggregates = self._aggregates(outputs)
+
+            logger.info("Transaction processing completed.")
+            final_results = self._final_results(aggregates)
+            logger.info("ETL pipeline execution completed successfully.")
+            return final_results
+
+        except Exception as e:
+            logger.error("ETL pipeline execution failed: %s", str(e))
+            raise RuntimeError("ETL process failed.") from e
+
+    @classmethod
+    def _aggregates(cls, outputs: dict, keys=None) -> dict:
+        """final_results entries (all of them or keys) from the outputs of the TransactionProcessor methods."""
+        aggregates = {}
+        for key in keys or cls.RESULT_METHODS:
+            method, position = cls.RESULT_METHODS[key]
+            aggregates[key] = outputs[method] if position is None else outputs[method][position]
+        return aggregates
+
+    def _add_derived_columns(self):
+        """Columns the method-by-method run leaves on the cleaned frame: InvoiceDate as datetime, YearMonth, Hour."""
+        self.df["InvoiceDate"] = pd.to_datetime(self.df["InvoiceDate"])
+        self.df["YearMonth"] = Normalizer.year_month(self.df)
+        if "Hour" not in self.df.columns:  # Already there when the rows were normalized
+            self.df["Hour"] = self.df["InvoiceDate"].dt.hour
+
+    def _result_key(self) -> tuple:
+        """(fingerprint, scope) of the aggregates in the result cache."""
+        paths = ParallelIngest.resolve(self.retail_data_path) if self._is_multi_file() else [self.retail_data_path]
+        return self.result_cache.fingerprint(paths + [self.supplier_data_path, self.continent_mapping_path],
+                                             self.RESULT_MODULES, typed_schema=self.typed_schema,
+                                             normalize=self.normalize, normalize_text=self.normalize_text)
+
+    def _memoized(self, processor: TransactionProcessor, method: str):
+        """Calls a TransactionProcessor method, through the result cache when one is configured."""
+        if self.result_cache is None:
+            return getattr(processor, method)()
+        fingerprint, scope = self._result_key()
+        return self.result_cache.memoize(fingerprint, method, getattr(processor, method), scope)
+
+    def results(self, *keys: str) -> dict:
+        """
+        Returns some aggregates of final_results (all of them by default) through the result cache.
+        Cached entries are served without reading the datasets (with defer_load); otherwise the data is
+        loaded and cleaned, and only the TransactionProcessor methods behind the missing entries run.
+
+        :param keys: final_results keys, e.g. "best_product_in_france".
+        :return: Dictionary of the requested keys
+        """
+        try:
+            if self.result_cache is None or not self._loads_retail():
+                raise ValueError("results needs a result_cache and the default in-memory mode")
+            keys = keys or tuple(self.RESULT_METHODS)
+            fingerprint, scope = self._result_key()
+            outputs = {}
+            for method in dict.fromkeys(self.RESULT_METHODS[key][0] for key in keys):
+                try:
+                    outputs[method] = self.result_cache.get(fingerprint, method)
+                except KeyError:
+                    pass
+
+            missing = [method for method in dict.fromkeys(self.RESULT_METHODS[key][0] for key in keys)
+                       if method not in outputs]
+            if missing:
+                logger.info("Result cache miss for %s, computing them.", missing)
+                if self.supplier_df is None:
+                    self.load()
+                self.df, self.canceled_df = DataCleaner(self.raw_df).clean()
+                self.cube = None
+                processor = TransactionProcessor(self.df, self.canceled_df, self.supplier_df,
+                                                 self.continent_mapping, self.enrichment)
+                processor.calculate_total_amount()
+                self._add_derived_columns()  # Some methods expect the columns of the ones before them
+                for method in missing:
+                    outputs[method] = self.result_cache.put(fingerprint, method, getattr(processor, method)(), scope)
+            return self._aggregates(outputs, keys)
+
+        except Exception as e:
+            logger.error("Cached results failed: %s", str(e))
+            raise RuntimeError("ETL process failed.") from e
+
+    def _final_results(self, aggregates: dict) -> dict:
+        """final_results of the in-memory modes: the cleaned data with its TotalAmount, then the aggregates."""
+        # Final Data Storage
+        self.df["TotalAmount"] = self.df["Quantity"] * self.df["UnitPrice"]
+        final_results = {"cleaned_data": self.df}
+        final_results.update(aggregates)
+        return final_results
+
+    def run_async(self, parquet_path: str = None, semi_cleaned_path: str = None, views_path: str = None,
+                  json_path: str = None, max_workers: int = 4):
+        """
+        Runs the default in-memory pipeline and writes its outputs as a DAG of concurrent stages
+        (see AsyncRunner): the retail, supplier and continent files are read side by side, the
+        TransactionProcessor aggregations run side by side, and the output writers run in parallel
+        as soon as their inputs are ready. The stage timings and critical path are in self.run_report.
+
+        :param parquet_path: Optional output of save_as_parquet.
+        :param semi_cleaned_path: Optional output of save_semi_cleaned_parquet.
+        :param views_path: Optional output of save_dashboard_views.
+        :param json_path: Optional output of save_semi_cleaned_json.
+        :param max_workers: Number of threads running the stages.
+        :return: final_results, as returned by run_pipeline
+        """
+        from Scripts.AsyncRunner import AsyncRunner
+        try:
+            if not self._loads_retail() or self.workers:
+                raise ValueError("run_async only runs the default in-memory mode")
+            logger.info("Starting concurrent ETL pipeline (%d threads)...", max_workers)
+            runner = AsyncRunner(max_workers=max_workers)
+
+            # Sources
+            def read_retail():
+                if self.raw_df is None:
+                    self.raw_df = self.df = self._read_retail()
+                return self.raw_df
+
+            def read_lookups(supplier_df, continent_mapping):
+                self.supplier_df, self.continent_mapping = supplier_df, continent_mapping
+                self.enrichment = EnrichmentIndex(supplier_df, continent_mapping)
+                return self.enrichment
+
+            runner.add("read_retail", read_retail)
+            runner.add("read_supplier", lambda: self.supplier_df if self.supplier_df is not None
+                       else self._read_source(self.supplier_data_path))
+            runner.add("read_continents", lambda: self.continent_mapping if self.continent_mapping is not None
+                       else self._read_source(self.continent_mapping_path))
+            runner.add("enrichment", read_lookups, "read_supplier", "read_continents")
+
+            # Cleaning, then the aggregations side by side, each on a shallow copy of the cleaned frames
+            def clean(raw_df, _):
+                self.df, self.canceled_df = DataCleaner(raw_df).clean()
+                self.cube = None
+                TransactionProcessor(self.df, self.canceled_df, self.supplier_df, self.continent_mapping,
+                                     self.enrichment).calculate_total_amount()
+                return self.df
+
+            def processor():
+                return TransactionProcessor(self.df.copy(deep=False), self.canceled_df.copy(deep=False),
+                                            self.supplier_df, self.continent_mapping, self.enrichment)
+
+            def aggregate(method):
+                return lambda *_: self._memoized(processor(), method)
+
+            runner.add("clean", clean, "read_retail", "enrichment")
+            if self.fused_aggregation:
+                runner.add("aggregate_all", aggregate("aggregate_all"), "clean", "enrichment")
+                runner.add("results", self._final_results, "aggregate_all")
+            else:
+                methods = tuple(dict.fromkeys(method for method, _ in self.RESULT_METHODS.values()))
+                for method in methods:
+                    runner.add(method, aggregate(method), "clean", "enrichment")
+
+                def results(*outputs):
+                    self._add_derived_columns()  # Added to the copies of the cleaned frame by the methods
+                    return self._final_results(self._aggregates(
+                        dict(zip(methods, outputs))))
+
+                runner.add("results", results, *methods)
+
+            # Outputs
+            if parquet_path:
+                runner.add("save_as_parquet", lambda _: self.save_as_parquet(parquet_path, writer="arrow"), "results")
+            if semi_cleaned_path or views_path or json_path:
+                runner.add("semi_cleaned", lambda *_: self._semi_cleaned_frame(), "read_retail", "enrichment")
+            if semi_cleaned_path:
+                runner.add("save_semi_cleaned_parquet",
+                           lambda df: self.save_semi_cleaned_parquet(semi_cleaned_path, df), "semi_cleaned")
+            if views_path:
+                runner.add("save_dashboard_views", lambda df: self.save_dashboard_views(views_path, df),
+                           "semi_cleaned")
+            if json_path:
+                runner.add("save_semi_cleaned_json", lambda df: self.save_semi_cleaned_json(json_path, df),
+                           "semi_cleaned")
+
+            final_results = runner.run()["results"]
+            self.run_report = runner.report()
+            logger.info("Concurrent ETL pipeline completed in %.3f s (critical path %s, %.3f s).",
+                        self.run_report["wall_s"], self.run_report["critical_path"],
+                        self.run_report["critical_path_s"])
+            return final_results
+
+        except Exception as e:
+            logger.error("Concurrent ETL pipeline execution failed: %s", str(e))
+            raise RuntimeError("ETL process failed.") from e
+
+    def _run_partitioned(self):
+        """
+        Partition-parallel mode of run_pipeline: the raw data is hash-partitioned on partition_key and each
+        partition is cleaned and aggregated in its own process. Only the partial aggregates come back, so
+        final_results["cleaned_data"] is None in this mode, and so is self.df: save_as_parquet then fails
+        instead of writing the raw rows (the semi-cleaned outputs are built from raw_df and still work).
+        """
+        from Scripts.PartitionExecutor import PartitionExecutor
+        try:
+            logger.info("Starting partition-parallel ETL pipeline (%d workers, key=%s)...",
+                        self.workers, self.partition_key)
+            executor = PartitionExecutor(self.supplier_df, self.continent_mapping, self.enrichment,
+                                         key=self.partition_key, max_workers=self.workers)
+            final_results = {"cleaned_data": None}
+            final_results.update(executor.run(self.raw_df))
+            self.df = None  # The cleaned rows stay in the workers
+            logger.info("Partition-parallel ETL pipeline completed: %s", executor.stats)
+            return final_results
+
+        except Exception as e:
+            logger.error("Partition-parallel ETL pipeline execution failed: %s", str(e))
+            raise RuntimeError("ETL process failed.") from e
+
+    def _run_streaming(self, cleaned_output_path: str = None):
+        """
+        Streaming mode of run_pipeline: each chunk goes through DataCleaner and TransactionProcessor
+        on its own and only its partial aggregates are kept, so memory is bounded by the chunk size.
+        Duplicates across chunks are tracked with row hashes (SeenRows).
+        """
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            logger.info("Starting streaming ETL pipeline (chunksize=%d)...", self.chunksize)
+            seen = SeenRows()
+            partials = PartialAggregates()
+            rows_in = rows_out = 0
+
+            for chunk in self._iter_retail_chunks():
+                rows_in += len(chunk)
+
+                cleaner = self._instrument(DataCleaner(chunk))
+                df, canceled_df = cleaner.clean(seen)
+
+                processor = self._instrument(TransactionProcessor(df, canceled_df, self.supplier_df,
+                                                                  self.continent_mapping, self.enrichment))
+                processor.calculate_total_amount()
+                partials.merge(self._partial_aggregates(processor))
+                rows_out += len(df)
+
+                if cleaned_output_path:
+                    table = IngestCache.arrow_table(df)
+                    if writer is None:
+                        writer = pq.ParquetWriter(cleaned_output_path, table.schema)
+                    writer.write_table(table.cast(writer.schema))
+
+            final_results = {"cleaned_data": cleaned_output_path}
+            final_results.update(partials.to_results())
+            logger.info("Streaming ETL pipeline completed: %d rows read, %d valid transactions.",
+                        rows_in, rows_out)
             return final_results
 
         except Exception as e:
-            logging.error("ETL pipeline execution failed: %s", str(e))
+            logger.error("Streaming ETL pipeline execution failed: %s", str(e))
             raise RuntimeError("ETL process failed.") from e
+        finally:
+            if writer is not None:
+                writer.close()
  
-    def save_as_parquet(self, path: str):
-        """Saves the cleaned and processed data to a Parquet file."""
+    def _partial_aggregates(self, processor: TransactionProcessor) -> PartialAggregates:
+        """Partial aggregates of a chunk, with its sketches when they are enabled."""
+        partials = processor.partial_aggregates()
+        if self.sketches is not None:
+            partials.sketches = processor.sketch_aggregates(**self.sketches)
+        return partials
+
+    def _run_out_of_core(self, cleaned_output_path: str = None):
+        """
+        Out-of-core engine of run_pipeline: the retail data is read lazily in chunks (1M rows unless
+        chunksize is set), spilled to hash buckets on disk and cleaned and aggregated bucket by bucket,
+        so neither the raw nor the cleaned rows are ever held in memory at once.
+        """
+        from Scripts.OutOfCoreExecutor import OutOfCoreExecutor
+        try:
+            chunksize = self.chunksize or 1_000_000
+            logger.info("Starting out-of-core ETL pipeline (%d buckets, chunksize=%d)...",
+                        self.spill_buckets, chunksize)
+            executor = OutOfCoreExecutor(self.supplier_df, self.continent_mapping, self.enrichment,
+                                         spill_dir=self.spill_dir, buckets=self.spill_buckets,
+                                         typed_schema=self.typed_schema)
+            with self._stage("out_of_core") as record:
+                aggregates = executor.run(self._iter_retail_chunks(chunksize), cleaned_output_path)
+                record["rows_in"], record["rows_out"] = executor.stats["rows"], executor.stats["valid_rows"]
+
+            final_results = {"cleaned_data": cleaned_output_path}
+            final_results.update(aggregates)
+            logger.info("Out-of-core ETL pipeline completed: %s", executor.stats)
+            return final_results
+
+        except Exception as e:
+            logger.error("Out-of-core ETL pipeline execution failed: %s", str(e))
+            raise RuntimeError("ETL process failed.") from e
+
+    def _read_retail_delta(self, watermark: dict = None) -> pd.DataFrame:
+        """
+        Reads the retail rows newer than a high-water mark.
+        Rows dated exactly at the mark are new only if their invoice was not seen at that date.
+        The InvoiceDate filter is pushed down to the row groups of the cached entries, of every file
+        of a multi-file input, so the run reads the delta rather than the whole history.
+        """
+        if watermark is None:
+            return self._read_retail()
+
+        since = pd.Timestamp(watermark["InvoiceDate"])
+        df = self._read_retail(filters=[("InvoiceDate", ">=", since)])
+        df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"])
+
+        seen_at_mark = (df["InvoiceDate"] == since) & df["InvoiceNo"].astype(str).isin(watermark["InvoiceNo"])
+        return df[(df["InvoiceDate"] >= since) & ~seen_at_mark].reset_index(drop=True)
+
+    def _run_incremental(self):
+        """
+        Incremental mode of run_pipeline: only the rows past the stored high-water mark are cleaned
+        and processed, and their partial aggregates are folded into the persisted state.
+        The state is reset when the supplier or continent mapping changed, since the stored
+        partials were joined with the previous ones, and when the sketch or text normalization settings changed.
+        final_results["cleaned_data"] only holds the new transactions.
+        """
+        try:
+            logger.info("Starting incremental ETL pipeline (state: %s)...", self.state_dir)
+            partials, metadata = PartialAggregates.load(self.state_dir)
+            lookups = {
+                "supplier_digest": IngestCache.frame_digest(self.supplier_df),
+                "continent_digest": IngestCache.frame_digest(self.continent_mapping),
+                "sketches": self.sketches,
+                "normalize_text": self.normalize_text
+            }
+            if metadata is not None and any(metadata.get(key) != value for key, value in lookups.items()):
+                logger.info("Supplier/continent mapping, sketch or text normalization settings changed, "
+                            "recomputing from scratch.")
+                partials, metadata = PartialAggregates(), None
+            watermark = metadata["watermark"] if metadata else None
+
+            delta = self._read_retail_delta(watermark)
+            self.raw_df = delta
+            logger.info("Incremental run: %d new rows since %s", len(self.raw_df),
+                        watermark["InvoiceDate"] if watermark else "the beginning")
+
+            cleaner = self._instrument(DataCleaner(self.raw_df))
+            self.df, self.canceled_df = cleaner.clean()
+
+            if len(self.raw_df):
+                processor = self._instrument(TransactionProcessor(self.df, self.canceled_df, self.supplier_df,
+                                                                  self.continent_mapping, self.enrichment))
+                processor.calculate_total_amount()
+                partials.merge(self._partial_aggregates(processor))
+
+                last_date = pd.to_datetime(self.raw_df["InvoiceDate"]).max()
+                at_last_date = pd.to_datetime(self.raw_df["InvoiceDate"]) == last_date
+                invoices = self.raw_df.loc[at_last_date, "InvoiceNo"].astype(str).unique().tolist()
+                if watermark is not None and pd.Timestamp(watermark["InvoiceDate"]) == last_date:
+                    invoices = sorted(set(invoices) | set(watermark["InvoiceNo"]))
+                watermark = {"InvoiceDate": last_date.isoformat(), "InvoiceNo": invoices}
+            partials.save(self.state_dir, {"watermark": watermark, **lookups})
+
+            final_results = {"cleaned_data": self.df}
+            final_results.update(partials.to_results())
+            logger.info("Incremental ETL pipeline completed.")
+            return final_results
+
+        except Exception as e:
+            logger.error("Incremental ETL pipeline execution failed: %s", str(e))
+            raise RuntimeError("ETL process failed.") from e
+
+    def save_as_parquet(self, path: str, writer: str = "fastparquet", row_group_size: int = 256_000,
+                        compression: str = "zstd", use_dictionary: bool = True, partition_by=None):
+        """
+        Saves the cleaned and processed data to a Parquet file.
+
+        :param path: Output file, or output directory when partition_by is set.
+        :param writer: "fastparquet" (legacy: columns converted to strings first) or "arrow", which streams
+                       row groups straight from the typed columns (see TransactionWriter).
+        :param row_group_size: Rows per row group (arrow writer).
+        :param compression: Codec of the arrow writer: zstd, snappy, gzip, lz4 or none.
+        :param use_dictionary: Dictionary-encode the column chunks (arrow writer).
+        :param partition_by: Hive partition columns of the arrow writer, e.g. ("Year", "Month", "Country").
+        :return: Write statistics of the arrow writer, None for fastparquet
+        """
+        if writer not in ("fastparquet", "arrow"):
+            raise ValueError("Unknown Parquet writer %r" % writer)
         try:
+            if self.df is None:
+                raise ValueError("save_as_parquet needs the cleaned data of an in-memory run_pipeline")
+            if writer == "arrow":
+                from Scripts.TransactionWriter import TransactionWriter
+                return TransactionWriter(row_group_size, compression, use_dictionary, partition_by).write(self.df, path)
+
             # Convert object columns to strings
             for col in self.df.select_dtypes(include=["object"]).columns:
                 self.df[col] = self.df[col].astype(str)
@@ -93,48 +697,119 @@ class ETLPipeline:
             if "YearMonth" in self.df.columns:
                 self.df["YearMonth"] = self.df["YearMonth"].astype(str)
     
-            # Ensure numeric columns are properly formatted
-            self.df = self.df.convert_dtypes()
+            # Ensure the transaction columns have their schema dtypes (categoricals, Int32, int32)
+            self.df = TransactionSchema.apply(self.df)
 
             # Save to Parquet with 'fastparquet' engine
             self.df.to_parquet(path, index=False, engine="fastparquet")
-            logging.info("Final processed data saved to Parquet: %s", path)
+            logger.info("Final processed data saved to Parquet: %s", path)
     
         except Exception as e:
-            logging.error("Error saving to Parquet: %s", str(e))
+            logger.error("Error saving to Parquet: %s", str(e))
             raise RuntimeError("Failed to save Parquet file.") from e
         
-    def save_semi_cleaned_json(self, path: str):
-        """Saves a semi-cleaned dataset (without duplicates and merged with continents/suppliers) to a JSON file."""
+    def _semi_cleaned_frame(self) -> pd.DataFrame:
+        """Builds the semi-cleaned dataset: raw data without duplicates, enriched with continents and suppliers."""
+        # Step 1: Remove duplicates
+        semi_cleaned_df = self.raw_df.drop_duplicates().copy()
+
+        # Step 2: Enrich with the continent of each country
+        semi_cleaned_df["Continent"] = self.enrichment.continents_for(semi_cleaned_df["Country"])
+
+        # Step 3: Enrich with the supplier of each invoice
+        semi_cleaned_df["Fournisseur"] = self.enrichment.suppliers_for(semi_cleaned_df["InvoiceNo"])
+        return semi_cleaned_df
+
+    def save_semi_cleaned_parquet(self, path: str, semi_cleaned_df: pd.DataFrame = None):
+        """
+        Saves the semi-cleaned dataset for the dashboard as a Parquet dataset partitioned by
+        YearMonth and Continent (Hive layout, e.g. YearMonth=2011-01/Continent=Europe/).
+        String columns are dictionary-encoded and every row group carries min/max statistics,
+        so readers only scan the columns and partitions they need.
+
+        :param path: Output directory of the dataset, replaced atomically if it exists (partitions of an
+                     earlier run that the new rows do not cover are removed too).
+        :param semi_cleaned_df: Semi-cleaned frame already built for another output, not modified.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        try:
+            if semi_cleaned_df is None:
+                semi_cleaned_df = self._semi_cleaned_frame()
+            semi_cleaned_df = IngestCache.to_arrow_types(semi_cleaned_df.copy(deep=False))
+            semi_cleaned_df["InvoiceDate"] = pd.to_datetime(semi_cleaned_df["InvoiceDate"])
+            semi_cleaned_df["YearMonth"] = Normalizer.month_labels(semi_cleaned_df)
+
+            table = pa.Table.from_pandas(semi_cleaned_df, preserve_index=False)
+            partition_cols = ["YearMonth", "Continent"]
+            for i, field in enumerate(table.schema):
+                if field.name not in partition_cols and pa.types.is_string(field.type):
+                    table = table.set_column(i, field.name, pc.dictionary_encode(table.column(i)))
+
+            tmp_path, old_path = path + ".tmp", path + ".old"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            file_format = ds.ParquetFileFormat()
+            ds.write_dataset(
+                table, tmp_path, format=file_format,
+                partitioning=ds.partitioning(table.select(partition_cols).schema, flavor="hive"),
+                file_options=file_format.make_write_options(compression="zstd", use_dictionary=True,
+                                                            write_statistics=True)
+            )
+            if os.path.exists(path):
+                os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+            logger.info("Semi-cleaned data saved to partitioned Parquet dataset: %s", path)
+
+        except Exception as e:
+            logger.error("Error saving semi-cleaned data to Parquet: %s", str(e))
+            raise RuntimeError("Failed to save semi-cleaned dataset.") from e
+
+    def save_dashboard_views(self, path: str, semi_cleaned_df: pd.DataFrame = None, top_n: int = 50):
+        """
+        Saves the materialized views of the dashboard (continent, country and monthly sales,
+        top products), tagged with the version of the semi-cleaned rows they summarize.
+
+        :param path: Output directory of the views.
+        :param semi_cleaned_df: Semi-cleaned frame already built for another output, not modified.
+        :param top_n: Number of products kept per continent and overall.
+        """
+        from Scripts.DashboardViews import DashboardViews
         try:
-            # Step 1: Remove duplicates
-            semi_cleaned_df = self.raw_df.drop_duplicates().copy()
+            if semi_cleaned_df is None:
+                semi_cleaned_df = self._semi_cleaned_frame()
+            views = DashboardViews.build(semi_cleaned_df, top_n=top_n)
+            views.save(path)
+            logger.info("Dashboard views saved to %s (version %s)", path, views.version)
 
-            # Step 2: Merge with continent mapping
-            semi_cleaned_df = semi_cleaned_df.merge(self.continent_mapping, on="Country", how="left")
+        except Exception as e:
+            logger.error("Error saving dashboard views: %s", str(e))
+            raise RuntimeError("Failed to save dashboard views.") from e
 
-            # Step 3: Merge with supplier data
-            semi_cleaned_df = semi_cleaned_df.merge(self.supplier_df, on="InvoiceNo", how="left")
+    def save_semi_cleaned_json(self, path: str, semi_cleaned_df: pd.DataFrame = None):
+        """
+        Saves a semi-cleaned dataset (without duplicates and merged with continents/suppliers) to a JSON file.
+        Legacy format, kept as an opt-in: the dashboard reads the dataset of save_semi_cleaned_parquet.
+
+        :param path: Output JSON file.
+        :param semi_cleaned_df: Semi-cleaned frame already built for another output, not modified.
+        """
+        try:
+            if semi_cleaned_df is None:
+                semi_cleaned_df = self._semi_cleaned_frame()
 
             # Step 4: Convert DataFrame to JSON
             semi_cleaned_df.to_json(path, orient="records", indent=4)
 
-            logging.info("Semi-cleaned data saved to JSON: %s", path)
+            logger.info("Semi-cleaned data saved to JSON: %s", path)
 
         except Exception as e:
-            logging.error("Error saving semi-cleaned data to JSON: %s", str(e))
+            logger.error("Error saving semi-cleaned data to JSON: %s", str(e))
             raise RuntimeError("Failed to save semi-cleaned dataset.") from e
 
 
 if __name__ == "__main__":
-    
-    etl = ETLPipeline("data/Online Retail.xlsx", "data/Supplier.csv","data/continent_mapping_full.csv")  # Paths to your datasets
-    #etl = ETLPipeline("data\onlie retail test.xlsx", "data/Supplier.csv","data/continent_mapping_full.csv")  # Paths to your datasets
-    results = etl.run_pipeline()
-    etl.save_as_parquet("output/processed_data.parquet")
-    # Save semi-cleaned dataset to JSON
-    etl.save_semi_cleaned_json("output/semi_cleaned_data.json")
-
-    # Display key results
-    print("Best-selling product in France:", results["best_product_in_france"])
-    print("Busiest transaction hour:", results["busiest_transaction_hour"])
\ No newline at end of file
+    # Same as `python -m Scripts` (see Scripts/__main__.py), which accepts the same options
+    from Scripts.__main__ import main
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import pandas as pd
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentIndex:
+    """
+    Join index for the supplier and continent enrichments, built once per run.
+    InvoiceNo and Country are mapped to dense integer codes and Fournisseur/Continent are
+    stored as arrays aligned with those codes, so enriching a frame is an array gather
+    instead of a hash merge. Duplicate keys in the lookup files keep their first row,
+    which also avoids the row blow-up a merge would cause.
+    It contains the methods :
+    - factorize_invoices which normalizes InvoiceNo values once per distinct invoice
+    - supplier_codes / continent_codes which map keys to codes (-1 when unknown)
+    - supplier_names / continent_names which gather the labels of codes
+    - suppliers_for / continents_for which enrich a column in one call
+    """
+    def __init__(self, supplier_df: pd.DataFrame, continent_mapping: pd.DataFrame):
+        """
+        Builds the index from the lookup tables.
+
+        :param supplier_df: Supplier DataFrame (InvoiceNo, Fournisseur).
+        :param continent_mapping: Country/Continent mapping DataFrame.
+        """
+        invoice_keys = supplier_df["InvoiceNo"].astype(str).str.strip()
+        first = ~invoice_keys.duplicated().to_numpy()
+        self.invoices = pd.Index(invoice_keys[first], name="InvoiceNo")
+        invoice_suppliers, suppliers = pd.factorize(supplier_df["Fournisseur"].to_numpy()[first])
+        self.suppliers = pd.Index(suppliers, name="Fournisseur")
+
+        countries = continent_mapping["Country"]
+        first = ~countries.duplicated().to_numpy()
+        self.countries = pd.Index(countries[first], name="Country")
+        country_continents, continents = pd.factorize(continent_mapping["Continent"].to_numpy()[first])
+        self.continents = pd.Index(continents, name="Continent")
+
+        # Code -1 (unknown key) gathers the trailing -1 / NaN entry of these arrays
+        self._invoice_suppliers = np.append(invoice_suppliers, -1)
+        self._country_continents = np.append(country_continents, -1)
+        self._supplier_labels = np.append(self.suppliers.to_numpy(dtype=object), np.nan)
+        self._continent_labels = np.append(self.continents.to_numpy(dtype=object), np.nan)
+        logger.info("Enrichment index built: %d invoices, %d suppliers, %d countries, %d continents",
+                    len(self.invoices), len(self.suppliers), len(self.countries), len(self.continents))
+
+    @staticmethod
+    def factorize_invoices(values) -> tuple:
+        """
+        Dense codes of an InvoiceNo column and its distinct values normalized as stripped strings.
+        :return: Tuple (row codes, -1 for missing values; normalized distinct invoices)
+        """
+        codes, uniques = pd.factorize(values)
+        return codes, pd.Index(pd.Index(uniques).astype(str).str.strip(), name="InvoiceNo")
+
+    def supplier_codes(self, invoices) -> np.ndarray:
+        """Supplier code of each normalized invoice (-1 when the invoice has no supplier)."""
+        return self._invoice_suppliers[self.invoices.get_indexer(invoices)]
+
+    def continent_codes(self, countries) -> np.ndarray:
+        """Continent code of each country (-1 when the country is not mapped)."""
+        return self._country_continents[self.countries.get_indexer(countries)]
+
+    def supplier_names(self, codes: np.ndarray) -> np.ndarray:
+        """Fournisseur labels of supplier codes, NaN for -1."""
+        return self._supplier_labels[codes]
+
+    def continent_names(self, codes: np.ndarray) -> np.ndarray:
+        """Continent labels of continent codes, NaN for -1."""
+        return self._continent_labels[codes]
+
+    def suppliers_for(self, values) -> np.ndarray:
+        """Fournisseur of each row of an InvoiceNo column."""
+        codes, invoices = self.factorize_invoices(values)
+        return self.supplier_names(np.append(self.supplier_codes(invoices), -1)[codes])
+
+    def continents_for(self, values) -> np.ndarray:
+        """Continent of each row of a Country column."""
+        codes, countries = pd.factorize(values)
+        return self.continent_names(np.append(self.continent_codes(countries), -1)[codes])
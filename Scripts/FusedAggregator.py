@@ -0,0 +1,135 @@
+import pandas as pd
+import numpy as np
+import logging
+from Scripts.PartialAggregates import PartialAggregates
+from Scripts.EnrichmentIndex import EnrichmentIndex
+from Scripts.Normalizer import Normalizer
+
+logger = logging.getLogger(__name__)
+
+
+def _factorize(values) -> tuple:
+    """Dense integer codes (-1 for missing values) and the unique values, in order of appearance."""
+    codes, uniques = pd.factorize(values)
+    if isinstance(uniques.dtype, pd.CategoricalDtype):
+        uniques = np.asarray(uniques, dtype=object)  # Plain labels, as for object columns
+    return codes, pd.Index(uniques)
+
+
+def _bincount(codes: np.ndarray, size: int, weights: np.ndarray = None) -> np.ndarray:
+    """np.bincount restricted to the non-missing codes."""
+    present = codes >= 0
+    if weights is not None:
+        weights = weights[present]
+    return np.bincount(codes[present], weights=weights, minlength=size)
+
+
+class FusedAggregator:
+    """
+    Single-pass aggregation engine for the TransactionProcessor aggregates.
+    The key columns (Country, YearMonth, Hour, Description, InvoiceNo) are factorized once,
+    TotalAmount is computed once, and every sum or count is a NumPy bincount over those codes.
+    Supplier and continent lookups are gathered from the EnrichmentIndex for the unique
+    invoices and countries only, then rolled up with another bincount.
+    """
+    def __init__(self, df: pd.DataFrame, canceled_df: pd.DataFrame, supplier_df: pd.DataFrame,
+                 continent_mapping: pd.DataFrame, enrichment: EnrichmentIndex = None):
+        """
+        Initializes the engine with the cleaned transactions and the lookup tables.
+
+        :param df: Cleaned transactions DataFrame.
+        :param canceled_df: Canceled transactions DataFrame.
+        :param supplier_df: Supplier DataFrame (InvoiceNo, Fournisseur).
+        :param continent_mapping: Country/Continent mapping DataFrame.
+        :param enrichment: EnrichmentIndex over the lookup tables, built here if not given.
+        """
+        self.df = df
+        self.canceled_df = canceled_df
+        self.supplier_df = supplier_df
+        self.continent_mapping = continent_mapping
+        self.enrichment = enrichment or EnrichmentIndex(supplier_df, continent_mapping)
+
+    def _amounts(self) -> np.ndarray:
+        """TotalAmount of every transaction, reused when already computed."""
+        if "TotalAmount" in self.df.columns:
+            return self.df["TotalAmount"].to_numpy(dtype="float64")
+        quantity = pd.to_numeric(self.df["Quantity"], errors="coerce").to_numpy(dtype="float64")
+        unit_price = pd.to_numeric(self.df["UnitPrice"], errors="coerce").to_numpy(dtype="float64")
+        return quantity * unit_price
+
+    @staticmethod
+    def _roll_up(codes: np.ndarray, values: np.ndarray, labels: pd.Index, dtype: str) -> pd.Series:
+        """Sum per-key values into their group codes, keeping the groups that received at least one key."""
+        present = _bincount(codes, len(labels)) > 0
+        sums = _bincount(codes, len(labels), values.astype("float64"))
+        return pd.Series(sums[present], index=labels[present]).astype(dtype)
+
+    def _by_continent(self, country_values: np.ndarray, countries: pd.Index, dtype: str) -> pd.Series:
+        """Roll per-country values up to continents."""
+        codes = self.enrichment.continent_codes(countries)
+        return self._roll_up(codes, country_values, self.enrichment.continents, dtype)
+
+    def _by_supplier(self, invoice_values: np.ndarray, invoices: pd.Index, present: np.ndarray) -> pd.Series:
+        """Roll per-invoice sums up to suppliers, for the non-canceled invoices present in the slice."""
+        keep = present & ~invoices.str.startswith("C")
+        codes = self.enrichment.supplier_codes(invoices[keep])
+        return self._roll_up(codes, invoice_values[keep], self.enrichment.suppliers, "float64")
+
+    def partial_aggregates(self) -> PartialAggregates:
+        """
+        Computes every partial sum and count in one pass over the factorized key columns.
+        :return: PartialAggregates equal to the ones of TransactionProcessor's methods
+        """
+        df = self.df
+        amounts = self._amounts()
+        # Date parts from the Normalizer columns when present, computed from InvoiceDate otherwise
+        hours = Normalizer.hours(df)
+        has_date = hours != Normalizer.MISSING
+        has_invoice = df["InvoiceNo"].notna().to_numpy()
+
+        country_codes, countries = _factorize(df["Country"])
+        month_codes, months = _factorize(Normalizer.year_month(df).array)
+        description_codes, descriptions = _factorize(df["Description"])
+
+        # Invoices are factorized on the raw values, the string normalization only runs on the uniques
+        invoice_codes, invoices = self.enrichment.factorize_invoices(df["InvoiceNo"])
+
+        country_sales = _bincount(country_codes, len(countries), amounts)
+        monthly_sales = _bincount(month_codes, len(months), amounts)
+        monthly_count = _bincount(month_codes[has_invoice], len(months)).astype(np.int64)
+        hour_counts = np.bincount(hours[has_invoice & has_date], minlength=24)
+
+        is_france = (df["Country"] == "France").to_numpy()
+        france_present = _bincount(description_codes[is_france], len(descriptions)) > 0
+        france_sales = _bincount(description_codes[is_france], len(descriptions), amounts[is_france])
+
+        is_uk_2011 = (df["Country"] == "United Kingdom").to_numpy() & (Normalizer.years(df) == 2011)
+        invoice_sales = _bincount(invoice_codes, len(invoices), amounts)
+        invoice_uk_2011 = _bincount(invoice_codes[is_uk_2011], len(invoices), amounts[is_uk_2011])
+        uk_2011_present = _bincount(invoice_codes[is_uk_2011], len(invoices)) > 0
+
+        canceled_codes, canceled_countries = _factorize(self.canceled_df["Country"])
+        canceled_has_invoice = self.canceled_df["InvoiceNo"].notna().to_numpy()
+        canceled_counts = _bincount(canceled_codes[canceled_has_invoice], len(canceled_countries))
+
+        month_labels = pd.Index(months.strftime("%Y-%m"), name="YearMonth")
+        hour_present = hour_counts > 0
+        logger.info("Fused aggregation computed for %d transactions.", len(df))
+        return PartialAggregates(
+            country_sales=pd.Series(country_sales, index=countries),
+            monthly_sales=pd.Series(monthly_sales, index=month_labels),
+            monthly_count=pd.Series(monthly_count, index=month_labels),
+            france_products=pd.Series(france_sales[france_present], index=descriptions[france_present]),
+            hour_counts=pd.Series(hour_counts[hour_present], index=np.flatnonzero(hour_present)),
+            supplier_sales=self._by_supplier(invoice_sales, invoices, np.ones(len(invoices), bool)),
+            uk_2011_supplier_sales=self._by_supplier(invoice_uk_2011, invoices, uk_2011_present),
+            continent_sales=self._by_continent(country_sales, countries, "float64"),
+            continent_cancellations=self._by_continent(canceled_counts, canceled_countries, "int64")
+        )
+
+    def run(self) -> dict:
+        """
+        Computes all the aggregates in one pass.
+        :return: Dictionary keyed like ETLPipeline's final_results (without cleaned_data)
+        """
+        return self.partial_aggregates().to_results()
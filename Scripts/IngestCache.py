@@ -0,0 +1,272 @@
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+import pyarrow as pa  # Loaded by pandas already; pyarrow.parquet is imported where entries are read or written
+
+logger = logging.getLogger(__name__)
+
+
+class IngestCache:
+    """
+    Content-addressed columnar cache for the raw input files.
+    Each source (Excel or CSV) is parsed once and stored as a typed Parquet file
+    named after the SHA-256 of its content. A manifest keeps the size and mtime seen
+    at conversion time so that unchanged files are served without being re-hashed.
+    It contains the methods :
+    - load which returns the DataFrame for a source, converting it on a cache miss
+    - is_stale which tells whether the cached entry no longer matches the source
+    - entry_path which returns the Parquet file backing a fresh entry
+    - iter_chunks which streams a source as bounded DataFrame chunks
+    """
+    MANIFEST = "manifest.json"
+    ROW_GROUP_SIZE = 65536  # Small enough for readers to skip row groups on InvoiceDate filters
+
+    def __init__(self, cache_dir: str = "cache", rebuild: bool = False):
+        """
+        Initialize the cache directory.
+
+        :param cache_dir: Directory holding the Parquet entries and the manifest.
+        :param rebuild: Force every source to be parsed again on its first load.
+        """
+        self.cache_dir = cache_dir
+        self.rebuild = rebuild
+        self._rebuilt = set()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.manifest = self._read_manifest()
+        logger.info("IngestCache initialized in %s (rebuild=%s)", self.cache_dir, self.rebuild)
+
+    def _read_manifest(self):
+        """Load the manifest, starting from an empty one if it is missing or corrupt."""
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        """Persist the manifest atomically."""
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.manifest, file, indent=4)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def file_digest(path: str) -> str:
+        """Return the SHA-256 of a file's content."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def frame_digest(df: pd.DataFrame) -> str:
+        """Return a SHA-256 fingerprint of a DataFrame's content."""
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        digest = hashlib.sha256(row_hashes.tobytes())
+        digest.update(",".join(map(str, df.columns)).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def read_source(path: str) -> pd.DataFrame:
+        """Parse a source file with the reader matching its extension."""
+        if path.lower().endswith((".xlsx", ".xls")):
+            return pd.read_excel(path)
+        return pd.read_csv(path)
+
+    @staticmethod
+    def iter_source_chunks(path: str, chunksize: int):
+        """
+        Stream a source file as DataFrames of at most chunksize rows, without the cache.
+        Excel workbooks are read row by row with openpyxl in read-only mode, so the whole
+        sheet is never held in memory.
+        """
+        if path.lower().endswith(".xlsx"):
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                rows = workbook.worksheets[0].iter_rows(values_only=True)
+                header = next(rows)
+                batch = []
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) == chunksize:
+                        yield IngestCache.to_arrow_types(pd.DataFrame(batch, columns=header))
+                        batch = []
+                if batch:
+                    yield IngestCache.to_arrow_types(pd.DataFrame(batch, columns=header))
+            finally:
+                workbook.close()
+        elif path.lower().endswith(".xls"):
+            df = pd.read_excel(path)
+            for start in range(0, len(df), chunksize):
+                yield IngestCache.to_arrow_types(df.iloc[start:start + chunksize].copy())
+        else:
+            for chunk in pd.read_csv(path, chunksize=chunksize):
+                yield IngestCache.to_arrow_types(chunk)
+
+    @staticmethod
+    def to_arrow_types(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Make object columns storable in Parquet.
+        Columns mixing numbers and strings (InvoiceNo, StockCode in the Excel file)
+        are stored as strings, missing values are kept as nulls.
+        """
+        for col in df.select_dtypes(include=["object"]).columns:
+            inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+            if inferred not in ("string", "empty"):
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return df
+
+    @staticmethod
+    def arrow_table(df: pd.DataFrame) -> pa.Table:
+        """
+        Arrow table of a chunk of rows, with the same schema for every chunk of a dataset:
+        categoricals get int32 dictionary indices whatever their number of categories.
+        """
+        table = pa.Table.from_pandas(IngestCache.to_arrow_types(df), preserve_index=False)
+        for i, field in enumerate(table.schema):
+            if pa.types.is_dictionary(field.type):
+                table = table.set_column(i, field.name, table.column(i).cast(pa.dictionary(pa.int32(), pa.string())))
+        return table
+
+    def _lookup(self, path: str, deep: bool = False):
+        """
+        Return the manifest record of a source if its entry is still valid, else None.
+        The size and mtime are compared first; the content is only re-hashed when they
+        changed or when deep is True.
+        """
+        key = os.path.abspath(path)
+        record = self.manifest.get(key)
+        if record is None or not os.path.exists(os.path.join(self.cache_dir, record["entry"])):
+            return None
+
+        stat = os.stat(path)
+        if not deep and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            return record
+
+        if self.file_digest(path) != record["sha256"]:
+            return None
+
+        # Same content with a new mtime (touched or copied file): refresh the record
+        record["size"], record["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+        self._write_manifest()
+        return record
+
+    def is_stale(self, path: str, deep: bool = True) -> bool:
+        """
+        Check whether the cached entry of a source is missing or out of date.
+
+        :param path: Source file path.
+        :param deep: Re-hash the source even if its size and mtime did not change.
+        """
+        return self._lookup(path, deep=deep) is None
+
+    def entry_path(self, path: str) -> str:
+        """Return the Parquet entry of a source, converting it first if needed."""
+        record = self.fresh_record(path)
+        if record is None:
+            record = self._build(path)
+        else:
+            logger.info("Cache hit for %s", path)
+        return os.path.join(self.cache_dir, record["entry"])
+
+    def fresh_record(self, path: str):
+        """Return the manifest record of a source if it can be served as is, else None (rebuild pending or stale)."""
+        if self.rebuild and os.path.abspath(path) not in self._rebuilt:
+            return None
+        return self._lookup(path)
+
+    def register(self, path: str, record: dict):
+        """Record an entry written by write_entry (e.g. from a worker process) in the manifest."""
+        key = os.path.abspath(path)
+        self.manifest[key] = record
+        self._rebuilt.add(key)
+        self._write_manifest()
+
+    @classmethod
+    def write_entry(cls, path: str, cache_dir: str, rebuild: bool = False, reader=None) -> dict:
+        """
+        Parse a source and write its Parquet entry, without touching the manifest.
+        Safe to call from worker processes; the caller then registers the returned record.
+
+        :param path: Source file path (Excel or CSV).
+        :param cache_dir: Directory of the entries.
+        :param rebuild: Rewrite the entry even if one with the same content hash exists.
+        :param reader: Function parsing the source, read_source by default.
+        :return: Manifest record of the entry
+        """
+        stat = os.stat(path)
+        sha256 = cls.file_digest(path)
+        stem = os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+        entry = "%s-%s.parquet" % (stem, sha256[:16])
+        entry_file = os.path.join(cache_dir, entry)
+
+        if not os.path.exists(entry_file) or rebuild:
+            import pyarrow.parquet as pq
+            df = cls.to_arrow_types((reader or cls.read_source)(path))
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                b"ingest_cache.sha256": sha256.encode(),
+                b"ingest_cache.source": os.path.basename(path).encode(),
+            })
+            tmp_file = "%s.%d.tmp" % (entry_file, os.getpid())
+            pq.write_table(table, tmp_file, compression="zstd", row_group_size=cls.ROW_GROUP_SIZE)
+            os.replace(tmp_file, entry_file)
+            logger.info("Converted %s to %s (%d rows)", path, entry_file, table.num_rows)
+
+        return {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "entry": entry}
+
+    def _build(self, path: str) -> dict:
+        """Parse a source, write its Parquet entry and record it in the manifest."""
+        record = self.write_entry(path, self.cache_dir, self.rebuild, reader=self.read_source)
+        self.register(path, record)
+        return record
+
+    def load(self, path: str, columns=None, filters=None) -> pd.DataFrame:
+        """
+        Return the DataFrame of a source, served from the cache when possible.
+
+        :param path: Source file path (Excel or CSV).
+        :param columns: Optional subset of columns to read from the entry.
+        :param filters: Optional pyarrow filters, row groups that cannot match are skipped.
+        """
+        import pyarrow.parquet as pq
+        table = pq.read_table(self.entry_path(path), columns=columns, filters=filters, memory_map=True)
+        return table.to_pandas()
+
+    def timestamp_filters(self, path: str, filters=None):
+        """
+        The filters on columns stored as timestamps in the entry of a source (None if there are none).
+        Dates left as strings (e.g. mixed formats in a CSV) cannot be compared with a Timestamp by pyarrow,
+        so those filters are not pushed down and the rows are filtered after the load instead.
+
+        :param path: Source file path (Excel or CSV).
+        :param filters: pyarrow filters as (column, op, value) tuples.
+        """
+        if not filters:
+            return None
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(self.entry_path(path))
+        kept = [f for f in filters if f[0] in schema.names and pa.types.is_timestamp(schema.field(f[0]).type)]
+        return kept or None
+
+    def iter_chunks(self, path: str, chunksize: int, columns=None):
+        """
+        Stream the cached entry of a source as DataFrames of at most chunksize rows.
+
+        :param path: Source file path (Excel or CSV).
+        :param chunksize: Maximum number of rows per chunk.
+        :param columns: Optional subset of columns to read from the entry.
+        """
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(self.entry_path(path), memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
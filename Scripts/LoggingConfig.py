@@ -0,0 +1,40 @@
+import logging
+import os
+
+# Log file -> loggers writing to it; the other Scripts modules write to etl_pipeline.log
+LOG_FILES = {
+    "data_cleaner.log": ("Scripts.DataCleaner",),
+    "transaction_processor.log": ("Scripts.TransactionProcessor", "Scripts.FusedAggregator",
+                                  "Scripts.EnrichmentIndex", "Scripts.PartialAggregates", "Scripts.AnalyticsCube",
+                                  "Scripts.ResultCache", "Scripts.SketchAggregates"),
+    "ingest_cache.log": ("Scripts.IngestCache", "Scripts.ParallelIngest"),
+}
+DEFAULT_LOG_FILE = "etl_pipeline.log"
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def configure_logging(log_dir: str = "logs", level: int = logging.INFO):
+    """
+    Routes the logs of the Scripts modules to their files. Importing a module no longer configures
+    logging: entry points (the CLI, the dashboard) call this once, and library users choose their own
+    handlers. Calling it again replaces the handlers it added before.
+
+    :param log_dir: Directory of the log files, created if needed; the files are opened on the first record.
+    :param level: Minimum level of the records written.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    formatter = logging.Formatter(LOG_FORMAT)
+    targets = {"Scripts": DEFAULT_LOG_FILE}
+    targets.update({name: file for file, names in LOG_FILES.items() for name in names})
+
+    for name, file in targets.items():
+        logger = logging.getLogger(name)
+        for handler in [handler for handler in logger.handlers if getattr(handler, "_scripts_config", False)]:
+            logger.removeHandler(handler)
+            handler.close()
+        handler = logging.FileHandler(os.path.join(log_dir, file), delay=True)
+        handler.setFormatter(formatter)
+        handler._scripts_config = True
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = name == "Scripts"  # Module records are written once, to their own file
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+
+class Normalizer:
+    """
+    Normalization stage run once at ingest, right after TransactionSchema, whose columns every later
+    stage (TransactionProcessor, FusedAggregator, DashboardViews) reuses instead of parsing again:
+    - InvoiceDate is parsed once to datetime64[ns], i.e. an int64 epoch in nanoseconds (see epoch_ns),
+      and its Year (int16), Month and Hour (int8) are added as columns (nullable when dates are missing)
+    - optionally, Description and StockCode are stripped and upper-cased through their dictionary of distinct
+      values, so " mug" and "MUG" become one product and the string work does not grow with the rows
+    It contains the methods :
+    - apply which normalizes a frame
+    - normalize_text which normalizes a text column once per distinct value
+    - epoch_ns, years, month_ordinals, hours, year_month and month_labels which give the date parts of a frame,
+      from the normalized columns when present and computed from InvoiceDate otherwise
+    """
+    TEXT_COLUMNS = ("Description", "StockCode")
+    DATE_PARTS = {"Year": "int16", "Month": "int8", "Hour": "int8"}
+    MISSING = -1  # Date parts of the rows without InvoiceDate, in the integer arrays
+    NAT_ORDINAL = np.iinfo(np.int64).min  # Month ordinal of the rows without InvoiceDate (NaT of periods)
+    HOUR_NS, DAY_NS = 3_600 * 10 ** 9, 86_400 * 10 ** 9
+
+    @staticmethod
+    def normalize_text(values: pd.Series) -> pd.Series:
+        """
+        Strip and upper-case string values; the distinct values are normalized once and the rows
+        only gather their codes. Categoricals stay categoricals (merged categories), other columns
+        become object columns. Missing values stay missing.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        normalized = pd.Index(uniques).astype(str).str.strip().str.upper()
+        if isinstance(values.dtype, pd.CategoricalDtype) and normalized.equals(pd.Index(uniques)):
+            return values
+        labels = pd.Categorical(normalized)  # Sorted distinct normalized values
+        codes = np.append(labels.codes, -1)[codes]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            normalized_values = pd.Categorical.from_codes(codes, labels.categories)
+        else:
+            normalized_values = np.append(np.asarray(labels.categories, dtype=object), np.nan)[codes]
+        return pd.Series(normalized_values, index=values.index, name=values.name)
+
+    @staticmethod
+    def _dates(df: pd.DataFrame) -> pd.Series:
+        dates = df["InvoiceDate"]
+        return dates if pd.api.types.is_datetime64_dtype(dates.dtype) else pd.to_datetime(dates)
+
+    @classmethod
+    def epoch_ns(cls, df: pd.DataFrame) -> np.ndarray:
+        """InvoiceDate as int64 nanoseconds since the epoch (a view, no copy, once parsed)."""
+        return cls._dates(df).to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+    @classmethod
+    def _part(cls, df: pd.DataFrame, name: str) -> np.ndarray:
+        """Date part as an int64 array (MISSING without date), from its column or from InvoiceDate."""
+        if name in df.columns:
+            return df[name].to_numpy(dtype="int64", na_value=cls.MISSING)
+        dates = cls._dates(df).to_numpy(dtype="datetime64[ns]")
+        if name == "Year":
+            part = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        elif name == "Month":
+            part = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        else:
+            part = dates.view(np.int64) % cls.DAY_NS // cls.HOUR_NS
+        return np.where(np.isnat(dates), cls.MISSING, part).astype(np.int64)
+
+    @classmethod
+    def years(cls, df: pd.DataFrame) -> np.ndarray:
+        return cls._part(df, "Year")
+
+    @classmethod
+    def hours(cls, df: pd.DataFrame) -> np.ndarray:
+        return cls._part(df, "Hour")
+
+    @classmethod
+    def month_ordinals(cls, df: pd.DataFrame) -> np.ndarray:
+        """Months since January 1970 (the ordinals of period[M]), NAT_ORDINAL without date."""
+        years, months = cls._part(df, "Year"), cls._part(df, "Month")
+        return np.where(years == cls.MISSING, cls.NAT_ORDINAL, (years - 1970) * 12 + months - 1)
+
+    @classmethod
+    def year_month(cls, df: pd.DataFrame) -> pd.Series:
+        """YearMonth periods built from the month ordinals, without formatting or parsing dates."""
+        periods = pd.arrays.PeriodArray(cls.month_ordinals(df), dtype=pd.PeriodDtype("M"))
+        return pd.Series(periods, index=df.index, name="YearMonth")
+
+    @classmethod
+    def month_labels(cls, df: pd.DataFrame) -> pd.Series:
+        """YearMonth as "YYYY-MM" strings (missing without date), formatted once per distinct month."""
+        codes, months = pd.factorize(cls.year_month(df))
+        labels = np.append(np.asarray(months.strftime("%Y-%m"), dtype=object), np.nan)[codes]
+        return pd.Series(labels, index=df.index, name="YearMonth")
+
+    @classmethod
+    def apply(cls, df: pd.DataFrame, text: bool = True) -> pd.DataFrame:
+        """
+        Add the date parts of df and normalize its text columns (already normalized columns are kept).
+
+        :param df: Raw or typed transactions DataFrame.
+        :param text: Normalize Description and StockCode. Before cleaning, this turns rows differing only
+                     by the case or spaces of these columns into duplicates.
+        :return: Normalized DataFrame
+        """
+        df = df.copy(deep=False)
+        for name in cls.TEXT_COLUMNS if text else ():
+            if name in df.columns:
+                df[name] = cls.normalize_text(df[name])
+
+        if "InvoiceDate" in df.columns:
+            df["InvoiceDate"] = cls._dates(df)
+            missing = df["InvoiceDate"].isna().any()
+            for name, dtype in cls.DATE_PARTS.items():
+                if name not in df.columns:
+                    part = cls._part(df, name)
+                    if missing:  # Nullable integers keep the rows without date distinct from real parts
+                        column = pd.array(part, dtype=dtype.capitalize())
+                        column[part == cls.MISSING] = pd.NA
+                    else:
+                        column = part.astype(dtype)
+                    df[name] = pd.Series(column, index=df.index)
+        return df
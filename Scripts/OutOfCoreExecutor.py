@@ -0,0 +1,135 @@
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from Scripts.DataCleaner import DataCleaner, SeenRows
+from Scripts.TransactionProcessor import TransactionProcessor
+from Scripts.PartialAggregates import PartialAggregates
+from Scripts.IngestCache import IngestCache
+from Scripts.TransactionSchema import TransactionSchema
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfCoreExecutor:
+    """
+    Out-of-core execution backend for DataCleaner and TransactionProcessor, for transaction
+    histories larger than memory. It runs in two passes over a lazy stream of chunks:
+    - spill: every raw row is hashed and appended to one of `buckets` Parquet files on disk, so
+      identical rows always land in the same bucket
+    - reduce: the buckets are read back one at a time, cleaned (duplicates are then exact within
+      a bucket) and reduced to PartialAggregates, which are merged into the final results
+    Memory is bounded by one chunk during the spill and by the largest bucket during the reduce.
+    It contains the methods :
+    - spill which hash-partitions the chunks into Parquet buckets
+    - run which spills the chunks and reduces the buckets
+    """
+    def __init__(self, supplier_df: pd.DataFrame, continent_mapping: pd.DataFrame, enrichment=None,
+                 spill_dir: str = None, buckets: int = 64, typed_schema: bool = True):
+        """
+        Initialize the backend.
+
+        :param supplier_df: Supplier DataFrame.
+        :param continent_mapping: Country/Continent mapping DataFrame.
+        :param enrichment: Optional EnrichmentIndex used by the TransactionProcessor of every bucket.
+        :param spill_dir: Directory of the temporary buckets (the system temp directory by default).
+        :param buckets: Number of buckets; each should fit in memory, e.g. dataset size / 1 GB.
+        :param typed_schema: Re-apply the TransactionSchema to the buckets read back from disk.
+        """
+        self.supplier_df = supplier_df
+        self.continent_mapping = continent_mapping
+        self.enrichment = enrichment
+        self.spill_dir = spill_dir
+        self.buckets = buckets
+        self.typed_schema = typed_schema
+        self.stats = {}
+
+    def spill(self, chunks, bucket_dir: str) -> list:
+        """
+        Append the rows of every chunk to the Parquet bucket of their row hash.
+        All buckets share the schema of the first chunk.
+
+        :param chunks: Iterable of raw transactions DataFrames, consumed once.
+        :param bucket_dir: Directory the bucket files are written to.
+        :return: Paths of the non-empty buckets
+        """
+        writers = {}
+        schema = None
+        rows = 0
+        try:
+            for chunk in chunks:
+                if not len(chunk):
+                    continue
+                ids = (SeenRows.hash_rows(chunk) % np.uint64(self.buckets)).astype(np.int64)
+                order = np.argsort(ids, kind="stable")
+                bounds = np.searchsorted(ids[order], np.arange(self.buckets + 1))
+
+                table = IngestCache.arrow_table(chunk)
+                schema = schema or table.schema
+                table = table.cast(schema).take(order)
+                for bucket in np.flatnonzero(np.diff(bounds)):
+                    if bucket not in writers:
+                        path = os.path.join(bucket_dir, "bucket-%05d.parquet" % bucket)
+                        writers[bucket] = pq.ParquetWriter(path, schema)
+                    start, stop = int(bounds[bucket]), int(bounds[bucket + 1])
+                    writers[bucket].write_table(table.slice(start, stop - start))
+                rows += len(chunk)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        paths = [os.path.join(bucket_dir, "bucket-%05d.parquet" % bucket) for bucket in sorted(writers)]
+        self.stats.update(rows=rows, spilled_bytes=sum(os.path.getsize(path) for path in paths))
+        return paths
+
+    def _reduce(self, path: str, writer_state: dict):
+        """
+        Clean and aggregate one bucket.
+        :return: Tuple (PartialAggregates, rows in, valid rows out)
+        """
+        df = pq.read_table(path).to_pandas()
+        if self.typed_schema:
+            df = TransactionSchema.apply(df)
+
+        valid_df, canceled_df = DataCleaner(df).clean()
+        processor = TransactionProcessor(valid_df, canceled_df, self.supplier_df, self.continent_mapping,
+                                         self.enrichment)
+        processor.calculate_total_amount()
+
+        if writer_state.get("path"):
+            table = IngestCache.arrow_table(valid_df)
+            if writer_state.get("writer") is None:
+                writer_state["writer"] = pq.ParquetWriter(writer_state["path"], table.schema)
+            writer = writer_state["writer"]
+            writer.write_table(table.cast(writer.schema))
+        return processor.partial_aggregates(), len(df), len(valid_df)
+
+    def run(self, chunks, cleaned_output_path: str = None) -> dict:
+        """
+        Clean and aggregate a stream of raw transactions larger than memory.
+
+        :param chunks: Iterable of raw transactions DataFrames (e.g. a chunked reader), consumed once.
+        :param cleaned_output_path: Optional Parquet file the cleaned rows of every bucket are appended to.
+        :return: Dictionary keyed like ETLPipeline's final_results (without cleaned_data)
+        """
+        self.stats = {"buckets": self.buckets}
+        writer_state = {"path": cleaned_output_path}
+        partials = PartialAggregates()
+        rows_out = largest = 0
+        try:
+            with tempfile.TemporaryDirectory(prefix="spill-", dir=self.spill_dir) as bucket_dir:
+                for path in self.spill(chunks, bucket_dir):
+                    partial, rows_in, valid_rows = self._reduce(path, writer_state)
+                    partials.merge(partial)
+                    rows_out += valid_rows
+                    largest = max(largest, rows_in)
+        finally:
+            if writer_state.get("writer") is not None:
+                writer_state["writer"].close()
+
+        self.stats.update(valid_rows=rows_out, largest_bucket=largest)
+        logger.info("Out-of-core run: %s", self.stats)
+        return partials.to_results()
@@ -0,0 +1,116 @@
+import glob
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+from Scripts.IngestCache import IngestCache
+
+logger = logging.getLogger(__name__)
+
+
+def _ingest_worker(path: str, cache_dir: str, rebuild: bool):
+    """Worker process: parse one source into a Parquet shard and return its record and timing."""
+    start = time.perf_counter()
+    record = IngestCache.write_entry(path, cache_dir, rebuild)
+    return record, time.perf_counter() - start
+
+
+class ParallelIngest:
+    """
+    Parses many retail drops (monthly/regional Excel and CSV files) in parallel with a process pool.
+    Workers write each file as a Parquet shard (an IngestCache entry) instead of sending a pickled
+    DataFrame back; the shards are then read and concatenated in the order of the input list.
+    It contains the methods :
+    - resolve which expands a glob pattern or a list into the input files
+    - run which parses the files and returns the concatenated DataFrame
+    - report which returns the per-file timings and failures
+    """
+    ON_ERROR = ("raise", "skip")
+
+    def __init__(self, paths, cache: IngestCache = None, max_workers: int = None, on_error: str = "raise"):
+        """
+        Initialize the ingest.
+
+        :param paths: Glob pattern, path or list of paths/patterns.
+        :param cache: IngestCache receiving the shards; a temporary one is used if not given.
+        :param max_workers: Number of worker processes (os.cpu_count() by default).
+        :param on_error: "raise" to fail when any file fails, "skip" to leave failed files out.
+        """
+        if on_error not in self.ON_ERROR:
+            raise ValueError("on_error must be one of %s" % (self.ON_ERROR,))
+        self.paths = self.resolve(paths)
+        self.cache = cache
+        self.max_workers = max_workers
+        self.on_error = on_error
+        self.timings = {}  # path -> seconds spent parsing and writing the shard (0.0 for cache hits)
+        self.failures = {}  # path -> error message
+        logger.info("ParallelIngest initialized with %d files (workers=%s, on_error=%s)",
+                    len(self.paths), self.max_workers, self.on_error)
+
+    @staticmethod
+    def resolve(paths) -> list:
+        """Expand a glob pattern or a list of paths/patterns, keeping the list order and sorting each pattern."""
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        resolved = []
+        for path in map(str, paths):
+            if glob.has_magic(path):
+                resolved.extend(sorted(glob.glob(path)))
+            else:
+                resolved.append(path)
+        if not resolved:
+            raise FileNotFoundError("No input file matches %s" % (paths,))
+        return resolved
+
+    def _convert(self, cache: IngestCache):
+        """Convert the files without a fresh entry in the pool, isolating failures per file."""
+        pending = []
+        for path in self.paths:
+            if cache.fresh_record(path) is not None:
+                self.timings[path] = 0.0
+            else:
+                pending.append(path)
+        if not pending:
+            return
+
+        from concurrent.futures import ProcessPoolExecutor, as_completed  # Only multi-file runs start a pool
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(_ingest_worker, path, cache.cache_dir, cache.rebuild): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    record, seconds = future.result()
+                except Exception as e:
+                    self.failures[path] = "%s: %s" % (type(e).__name__, e)
+                    logger.error("Failed to ingest %s: %s", path, self.failures[path])
+                    continue
+                cache.register(path, record)
+                self.timings[path] = seconds
+                logger.info("Ingested %s in %.3f s", path, seconds)
+
+    def run(self, columns=None, filters=None) -> pd.DataFrame:
+        """
+        Parse every file and return their rows concatenated in input order.
+
+        :param columns: Optional subset of columns to read from the shards.
+        :param filters: Optional pyarrow filters pushed down to the row groups of the shards whose
+                        filtered columns are timestamps (see IngestCache.timestamp_filters).
+        """
+        with tempfile.TemporaryDirectory(prefix="ingest-") as tmp_dir:
+            cache = self.cache or IngestCache(tmp_dir)
+            self._convert(cache)
+
+            if self.failures and self.on_error == "raise":
+                raise RuntimeError("Failed to ingest %d file(s): %s" % (len(self.failures), self.failures))
+
+            frames = [cache.load(path, columns=columns, filters=cache.timestamp_filters(path, filters))
+                      for path in self.paths if path not in self.failures]
+        if not frames:
+            raise RuntimeError("No input file could be ingested.")
+        return pd.concat(frames, ignore_index=True)
+
+    def report(self) -> dict:
+        """Per-file timings and failures of the last run."""
+        return {"timings": dict(self.timings), "failures": dict(self.failures)}
@@ -0,0 +1,139 @@
+import json
+import os
+import shutil
+import pandas as pd
+import logging
+from Scripts.SketchAggregates import SketchAggregates
+
+logger = logging.getLogger(__name__)
+
+
+class PartialAggregates:
+    """
+    Mergeable partial sums and counts behind the TransactionProcessor aggregates.
+    A chunk of transactions produces one instance (see TransactionProcessor.partial_aggregates);
+    merging the instances of every chunk and calling to_results gives the same values
+    as a single pass over the whole dataset.
+    Optional SketchAggregates (attribute sketches) are merged, saved and finalized with the partials.
+    """
+    # Partial name -> (key column, value dtype)
+    PARTS = {
+        "country_sales": ("Country", "float64"),
+        "monthly_sales": ("YearMonth", "float64"),
+        "monthly_count": ("YearMonth", "int64"),
+        "france_products": ("Description", "float64"),
+        "hour_counts": ("Hour", "int64"),
+        "supplier_sales": ("Fournisseur", "float64"),
+        "uk_2011_supplier_sales": ("Fournisseur", "float64"),
+        "continent_sales": ("Continent", "float64"),
+        "continent_cancellations": ("Continent", "int64"),
+    }
+
+    def __init__(self, sketches: SketchAggregates = None, **parts):
+        """
+        Initialize with the partial Series, missing ones start empty.
+
+        :param sketches: Optional approximate statistics of the same transactions.
+        :param parts: Series indexed by the key column of each partial (YearMonth as "YYYY-MM" strings).
+        """
+        self.sketches = sketches
+        self.parts = {}
+        for name, (key, dtype) in self.PARTS.items():
+            part = parts.get(name)
+            if part is None:
+                part = pd.Series(dtype=dtype, index=pd.Index([], name=key))
+            self.parts[name] = part.astype(dtype).rename_axis(key)
+
+    def merge(self, other: "PartialAggregates") -> "PartialAggregates":
+        """Add the partials of another instance into this one and return self."""
+        for name, (key, dtype) in self.PARTS.items():
+            pieces = [part for part in (self.parts[name], other.parts[name]) if len(part)]
+            if len(pieces) == 2:
+                self.parts[name] = pd.concat(pieces).groupby(level=0).sum().astype(dtype).rename_axis(key)
+            elif pieces:
+                self.parts[name] = pieces[0]
+        if other.sketches is not None:
+            self.sketches = other.sketches if self.sketches is None else self.sketches.merge(other.sketches)
+        return self
+
+    def save(self, path: str, metadata: dict = None):
+        """
+        Persist the partials to a directory (one Parquet file per partial plus state.json).
+        The directory is replaced atomically so that an interrupted run keeps the previous state.
+
+        :param path: State directory.
+        :param metadata: JSON-serializable information stored with the partials (e.g. the high-water mark).
+        """
+        tmp_path, old_path = path + ".tmp", path + ".old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, part in self.parts.items():
+            part.rename("value").to_frame().to_parquet(os.path.join(tmp_path, name + ".parquet"))
+        if self.sketches is not None:
+            self.sketches.save(os.path.join(tmp_path, "sketches.npz"))
+        with open(os.path.join(tmp_path, "state.json"), "w") as file:
+            json.dump(metadata or {}, file, indent=4)
+
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        logger.info("Partial aggregates saved to %s", path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Load partials saved with save.
+        :return: Tuple (PartialAggregates, metadata), or (empty PartialAggregates, None) if there is no state yet
+        """
+        if not os.path.exists(os.path.join(path, "state.json")):
+            return cls(), None
+        parts = {name: pd.read_parquet(os.path.join(path, name + ".parquet"))["value"] for name in cls.PARTS}
+        if os.path.exists(os.path.join(path, "sketches.npz")):
+            parts["sketches"] = SketchAggregates.load(os.path.join(path, "sketches.npz"))
+        with open(os.path.join(path, "state.json"), "r") as file:
+            metadata = json.load(file)
+        logger.info("Partial aggregates loaded from %s", path)
+        return cls(**parts), metadata
+
+    def _ranking(self, name: str, value: str) -> pd.DataFrame:
+        """Rebuild a groupby(...).sum().reset_index() frame from a partial."""
+        return self.parts[name].sort_index().rename(value).reset_index()
+
+    def to_results(self) -> dict:
+        """
+        Finalize the partials into the values returned by the TransactionProcessor methods.
+        :return: Dictionary keyed like ETLPipeline's final_results (without cleaned_data).
+        """
+        country_sales = self._ranking("country_sales", "TotalAmount")
+
+        monthly_stats = pd.DataFrame({
+            "TotalSales": self.parts["monthly_sales"],
+            "TransactionCount": self.parts["monthly_count"]
+        }).sort_index().reset_index()
+        monthly_stats["YearMonth"] = monthly_stats["YearMonth"].astype("period[M]")
+
+        best_product = self.parts["france_products"].sort_index().idxmax()
+        busiest_hour = self.parts["hour_counts"].sort_index().idxmax()
+
+        supplier_sales = self._ranking("supplier_sales", "TotalAmount").sort_values(by="TotalAmount", ascending=False)
+        uk_2011_sales = self._ranking("uk_2011_supplier_sales", "TotalAmount").sort_values(by="TotalAmount", ascending=False)
+
+        continent_sales = self._ranking("continent_sales", "TotalAmount")
+        continent_with_most_cancellations = self.parts["continent_cancellations"].sort_index().idxmax()
+
+        logger.info("Partial aggregates finalized: %d countries, %d months, %d suppliers",
+                    len(country_sales), len(monthly_stats), len(supplier_sales))
+        results = {
+            "country_sales": country_sales,
+            "monthly_stats": monthly_stats,
+            "best_product_in_france": best_product,
+            "busiest_transaction_hour": busiest_hour,
+            "supplier_sales": supplier_sales,
+            "uk_2011_supplier_sales": uk_2011_sales,
+            "continent_sales": continent_sales,
+            "continent_with_most_cancellations": continent_with_most_cancellations
+        }
+        if self.sketches is not None:
+            results.update(self.sketches.to_results())
+        return results
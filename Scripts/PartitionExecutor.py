@@ -0,0 +1,161 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from Scripts.DataCleaner import DataCleaner
+from Scripts.TransactionProcessor import TransactionProcessor
+from Scripts.PartialAggregates import PartialAggregates
+
+logger = logging.getLogger(__name__)
+
+
+# Column layout and lookup tables, sent once to each worker process by _init_worker
+_WORKER_STATE = {}
+
+
+def _init_worker(columns: list, supplier_df, continent_mapping, enrichment):
+    """Worker process initializer."""
+    _WORKER_STATE.update(columns=columns, supplier_df=supplier_df,
+                         continent_mapping=continent_mapping, enrichment=enrichment)
+
+
+def _process_partition(start: int, stop: int):
+    """
+    Worker process: rebuild one partition from the shared column buffers, clean it and
+    compute its partial aggregates.
+    :return: Tuple (PartialAggregates, rows in, valid rows out)
+    """
+    columns = _WORKER_STATE["columns"]
+    data = {}
+    segments = []
+    try:
+        for name, segment, dtype, length, labels, column_dtype in columns:
+            # Pool workers share the parent's resource tracker, which unlinks the segment only once
+            shm = shared_memory.SharedMemory(name=segment)
+            segments.append(shm)
+            values = np.ndarray((length,), dtype=dtype, buffer=shm.buf)[start:stop]
+            # Copy out of the segment: the partition is modified by the cleaning steps
+            column = labels[values] if labels is not None else values.copy()
+            if isinstance(column_dtype, pd.CategoricalDtype):
+                column = pd.Categorical.from_codes(column, dtype=column_dtype)
+            elif column_dtype is not None:
+                column = pd.array(column, dtype=column_dtype)
+            data[name] = column
+        df = pd.DataFrame(data)
+    finally:
+        for shm in segments:
+            shm.close()
+
+    valid_df, canceled_df = DataCleaner(df).clean()
+
+    processor = TransactionProcessor(valid_df, canceled_df, _WORKER_STATE["supplier_df"],
+                                     _WORKER_STATE["continent_mapping"], _WORKER_STATE["enrichment"])
+    processor.calculate_total_amount()
+    return processor.partial_aggregates(), stop - start, len(valid_df)
+
+
+class PartitionExecutor:
+    """
+    Partition-parallel execution backend for DataCleaner and TransactionProcessor.
+    Rows are hash-partitioned on a key column and laid out contiguously per partition in
+    shared memory (numeric columns as raw values, categoricals as their codes, other columns as
+    int32 codes), so each
+    worker process reads its slice without the frame being pickled. Every partition is
+    cleaned and reduced to PartialAggregates, which are merged into the final results.
+    Identical rows share the key value, so duplicates never straddle two partitions.
+    """
+    def __init__(self, supplier_df: pd.DataFrame, continent_mapping: pd.DataFrame, enrichment=None,
+                 key: str = "CustomerID", max_workers: int = None, partitions: int = None):
+        """
+        Initialize the backend.
+
+        :param supplier_df: Supplier DataFrame.
+        :param continent_mapping: Country/Continent mapping DataFrame.
+        :param enrichment: Optional EnrichmentIndex shared with the workers.
+        :param key: Column the rows are hash-partitioned on (e.g. CustomerID or Country).
+        :param max_workers: Number of worker processes (os.cpu_count() by default).
+        :param partitions: Number of partitions, 4 per worker by default to smooth out skew.
+        """
+        self.supplier_df = supplier_df
+        self.continent_mapping = continent_mapping
+        self.enrichment = enrichment
+        self.key = key
+        self.max_workers = max_workers
+        self.partitions = partitions
+        self.stats = {}
+
+    def _partition_ids(self, df: pd.DataFrame, partitions: int) -> np.ndarray:
+        """Hash partition of every row, computed on the distinct key values only."""
+        codes, uniques = pd.factorize(df[self.key])
+        unique_ids = (pd.util.hash_array(np.asarray(uniques, dtype=object)) % partitions).astype(np.int64)
+        # Missing keys (code -1) go to the last partition
+        return np.append(unique_ids, partitions - 1)[codes]
+
+    @staticmethod
+    def _share(values: np.ndarray, order: np.ndarray, segments: list):
+        """Copy values, permuted into partition order, into a new shared memory segment."""
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        segments.append(shm)
+        np.take(values, order, out=np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf))
+        return shm.name
+
+    def run(self, df: pd.DataFrame) -> dict:
+        """
+        Clean and aggregate the raw transactions partition by partition.
+
+        :param df: Raw transactions DataFrame.
+        :return: Dictionary keyed like ETLPipeline's final_results (without cleaned_data)
+        """
+        max_workers = self.max_workers or os.cpu_count() or 1
+        partitions = self.partitions or 4 * max_workers
+        ids = self._partition_ids(df, partitions)
+        order = np.argsort(ids, kind="stable")
+        bounds = np.searchsorted(ids[order], np.arange(partitions + 1))
+
+        segments = []
+        try:
+            columns = []
+            for name in df.columns:
+                column = df[name]
+                column_dtype = None  # Extension dtype rebuilt by the workers
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    # The categories travel once with the layout, only the codes go through shared memory
+                    values, labels, column_dtype = column.cat.codes.to_numpy(), None, column.dtype
+                elif isinstance(column.dtype, np.dtype) and column.dtype.kind in "biufmM":
+                    values, labels = column.to_numpy(), None
+                elif column.dtype.kind in "iuf":
+                    # Nullable numbers (e.g. Int32 CustomerID): missing values travel as NaN
+                    values = column.to_numpy(dtype="float64", na_value=np.nan)
+                    labels, column_dtype = None, column.dtype
+                else:
+                    values, uniques = pd.factorize(column)
+                    values = values.astype(np.int32)
+                    labels = np.append(np.asarray(uniques, dtype=object), np.nan)  # -1 gathers NaN
+                columns.append((name, self._share(values, order, segments), values.dtype.str, len(df), labels,
+                                column_dtype))
+
+            partials = PartialAggregates()
+            rows_out = 0
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(columns, self.supplier_df, self.continent_mapping,
+                                               self.enrichment)) as pool:
+                futures = [
+                    pool.submit(_process_partition, int(bounds[p]), int(bounds[p + 1]))
+                    for p in range(partitions) if bounds[p + 1] > bounds[p]
+                ]
+                for future in futures:
+                    partial, _, valid_rows = future.result()
+                    partials.merge(partial)
+                    rows_out += valid_rows
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+        self.stats = {"rows": len(df), "valid_rows": rows_out, "partitions": partitions,
+                      "largest_partition": int(np.diff(bounds).max())}
+        logger.info("Partitioned run on %s: %s", self.key, self.stats)
+        return partials.to_results()
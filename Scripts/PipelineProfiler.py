@@ -0,0 +1,165 @@
+import cProfile
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineProfiler:
+    """
+    Instrumentation of the ETL stages: for every stage it records the wall time, the CPU time,
+    the peak of traced Python allocations (tracemalloc), the RSS delta and the rows in/out.
+    A stage run several times (e.g. once per chunk in streaming mode) is accumulated under its name.
+    It contains the methods :
+    - stage, a context manager timing one stage
+    - instrument which wraps the public methods of a DataCleaner or TransactionProcessor into stages
+    - report which returns the run report
+    - write_report which saves the run report as JSON
+    """
+    def __init__(self, report_path: str = None, profile_stage: str = None, profile_path: str = None,
+                 trace_memory: bool = True):
+        """
+        Initialize the profiler.
+
+        :param report_path: JSON file written by write_report.
+        :param profile_stage: Name of a stage to run under cProfile (e.g. "aggregate_supplier_data").
+        :param profile_path: File receiving the cProfile stats of profile_stage (readable with pstats).
+        :param trace_memory: Trace Python allocations with tracemalloc; slows the run down, disable it
+                             to only measure time and RSS.
+        """
+        self.report_path = report_path
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path or (profile_stage and "%s.prof" % profile_stage)
+        self.trace_memory = trace_memory
+        self.stages = {}  # name -> accumulated measures, in order of first completion
+        self._stack = []  # peaks seen by the open stages, for nesting
+        self._profile = cProfile.Profile() if profile_stage else None
+        import psutil  # Only needed once a profiler is created
+        self._process = psutil.Process()
+        self.started = time.time()
+
+    @staticmethod
+    def count_rows(value):
+        """Rows of a DataFrame, of the first DataFrame of a tuple, or None."""
+        if isinstance(value, tuple):
+            value = next((item for item in value if isinstance(item, pd.DataFrame)), None)
+        return len(value) if isinstance(value, pd.DataFrame) else None
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None):
+        """
+        Measure the enclosed block as one run of stage name. The yielded dict accepts "rows_out".
+
+        :param name: Stage name.
+        :param rows_in: Number of rows entering the stage.
+        """
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            if self._stack:
+                # Keep the enclosing stage's peak before resetting it for this stage
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            traced_start = tracemalloc.get_traced_memory()[0]
+        record = {"rows_in": rows_in, "rows_out": None, "peak": 0}
+        self._stack.append(record)
+
+        profiled = name == self.profile_stage
+        rss_start = self._process.memory_info().rss
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiled:
+            self._profile.enable()
+        try:
+            yield record
+        finally:
+            if profiled:
+                self._profile.disable()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            rss_delta = self._process.memory_info().rss - rss_start
+            self._stack.pop()
+            peak = None
+            if self.trace_memory:
+                peak_total = max(tracemalloc.get_traced_memory()[1], record["peak"])
+                peak = peak_total - traced_start
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak_total)
+                tracemalloc.reset_peak()
+            if started_tracing:
+                tracemalloc.stop()
+            if profiled and self.profile_path:
+                self._profile.dump_stats(self.profile_path)
+            self._accumulate(name, wall, cpu, peak, rss_delta, record["rows_in"], record["rows_out"])
+
+    def _accumulate(self, name, wall, cpu, peak, rss_delta, rows_in, rows_out):
+        """Add one run of a stage to its totals."""
+        stage = self.stages.setdefault(name, {
+            "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "tracemalloc_peak_bytes": None,
+            "rss_delta_bytes": 0, "rows_in": None, "rows_out": None
+        })
+        stage["calls"] += 1
+        stage["wall_s"] += wall
+        stage["cpu_s"] += cpu
+        stage["rss_delta_bytes"] += rss_delta
+        if peak is not None:
+            stage["tracemalloc_peak_bytes"] = max(stage["tracemalloc_peak_bytes"] or 0, peak)
+        for key, rows in (("rows_in", rows_in), ("rows_out", rows_out)):
+            if rows is not None:
+                stage[key] = (stage[key] or 0) + rows
+
+    def instrument(self, obj):
+        """
+        Wrap the public methods of a DataCleaner or TransactionProcessor instance so that every call
+        is recorded as a stage named after the method. Rows in are the rows of obj.df before the call;
+        rows out are the rows of the returned DataFrame, or of obj.df after the call.
+        Objects with a profiler attribute (DataCleaner) get this profiler too, to record their own sub-stages.
+
+        :param obj: Object with a df attribute.
+        :return: The same object.
+        """
+        if hasattr(obj, "profiler"):
+            obj.profiler = self
+        for name in dir(type(obj)):
+            method = getattr(obj, name)
+            if name.startswith("_") or not callable(method):
+                continue
+
+            def wrapped(*args, _name=name, _method=method, **kwargs):
+                with self.stage(_name, rows_in=self.count_rows(getattr(obj, "df", None))) as record:
+                    result = _method(*args, **kwargs)
+                    rows_out = self.count_rows(result)
+                    record["rows_out"] = rows_out if rows_out is not None else self.count_rows(getattr(obj, "df", None))
+                return result
+            setattr(obj, name, functools.wraps(method)(wrapped))
+        return obj
+
+    def report(self) -> dict:
+        """Run report: the measures of every stage, in order of first completion."""
+        return {
+            "started": pd.Timestamp(self.started, unit="s").isoformat(),
+            "rss_bytes": self._process.memory_info().rss,
+            "profile": self.profile_path if self.profile_stage else None,
+            "stages": [dict(name=name, **measures) for name, measures in self.stages.items()]
+        }
+
+    def write_report(self, path: str = None) -> str:
+        """
+        Save the run report as JSON.
+
+        :param path: Output file, report_path by default.
+        :return: The path written.
+        """
+        path = path or self.report_path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=4)
+        logger.info("Run report saved to %s", path)
+        return path
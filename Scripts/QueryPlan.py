@@ -0,0 +1,268 @@
+import logging
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+logger = logging.getLogger(__name__)
+
+
+class QueryPlan:
+    """
+    Lazy, composable query over a source of the pipeline (a Parquet file or Hive-partitioned dataset,
+    such as an IngestCache entry or the semi-cleaned dataset, or an in-memory DataFrame).
+    Every method returns a new plan; nothing is read before collect, which first optimizes the plan:
+    - predicate pushdown: filters on source columns move into the scan, so partitions and row groups
+      whose statistics cannot match are skipped
+    - projection pushdown: only the columns used by the later steps are read
+    It contains the methods :
+    - scan which starts a plan over a source
+    - filter, select, assign, join, group_by and sort which add a step
+    - optimize which pushes filters and projections down to the scan
+    - explain which describes the optimized plan
+    - collect which executes it and returns a DataFrame
+    """
+    OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in", "not in")
+
+    def __init__(self, source, steps: tuple = (), scan_filters: tuple = (), scan_columns: list = None):
+        """
+        Initialize a plan; use QueryPlan.scan to start one.
+
+        :param source: Parquet path (file or dataset directory), list of Parquet files, or DataFrame.
+        :param steps: Steps applied after the scan, as tuples (kind, ...).
+        :param scan_filters: Filters (column, operator, value) evaluated by the scan.
+        :param scan_columns: Columns read by the scan, None for all of them.
+        """
+        self.source = source
+        self.steps = tuple(steps)
+        self.scan_filters = tuple(scan_filters)
+        self.scan_columns = scan_columns
+        self.stats = {}
+
+    @classmethod
+    def scan(cls, source) -> "QueryPlan":
+        """
+        Start a plan over a source.
+
+        :param source: Parquet path (file or Hive-partitioned dataset directory), list of Parquet files,
+                       or DataFrame.
+        """
+        return cls(source)
+
+    def _add(self, *step) -> "QueryPlan":
+        return QueryPlan(self.source, self.steps + (step,), self.scan_filters, self.scan_columns)
+
+    def filter(self, column: str, op: str, value) -> "QueryPlan":
+        """
+        Keep the rows where `column op value` holds.
+
+        :param column: Column name.
+        :param op: One of ==, !=, <, <=, >, >=, in, not in.
+        :param value: Scalar, or list of values for in / not in. Dates may be given as strings.
+        """
+        if op not in self.OPERATORS:
+            raise ValueError("Unknown operator %r, expected one of %s" % (op, self.OPERATORS))
+        return self._add("filter", column, op, value)
+
+    def select(self, *columns: str) -> "QueryPlan":
+        """Keep only these columns."""
+        return self._add("select", list(columns))
+
+    def assign(self, name: str, func, inputs) -> "QueryPlan":
+        """
+        Add (or replace) a computed column.
+
+        :param name: Name of the column.
+        :param func: Function of the frame returning the column values.
+        :param inputs: Columns read by func, so that they are kept by the projection pushdown.
+        """
+        return self._add("assign", name, func, list(inputs))
+
+    def join(self, right: pd.DataFrame, on: str, how: str = "left") -> "QueryPlan":
+        """
+        Join a lookup table (e.g. the supplier or continent mapping).
+        Keys of different dtypes (numbers and strings) are compared as strings.
+
+        :param right: Lookup DataFrame.
+        :param on: Key column present on both sides.
+        :param how: "left", "inner", "right" or "outer"; filters are only pushed below left and inner joins.
+        """
+        return self._add("join", right, on, how)
+
+    def group_by(self, keys, **aggregations) -> "QueryPlan":
+        """
+        Group the rows and aggregate them, e.g. group_by("Fournisseur", TotalAmount=("TotalAmount", "sum")).
+
+        :param keys: Key column or list of key columns.
+        :param aggregations: Output column -> (input column, aggregation function).
+        """
+        return self._add("group_by", [keys] if isinstance(keys, str) else list(keys), aggregations)
+
+    def sort(self, by, ascending: bool = True) -> "QueryPlan":
+        """Sort the rows on a column or list of columns."""
+        return self._add("sort", [by] if isinstance(by, str) else list(by), ascending)
+
+    def _dataset(self):
+        """pyarrow dataset of a Parquet source (Hive partitions for directories)."""
+        if isinstance(self.source, str) and os.path.isdir(self.source):
+            return ds.dataset(self.source, format="parquet", partitioning="hive")
+        return ds.dataset(self.source, format="parquet")
+
+    def _source_columns(self) -> list:
+        if isinstance(self.source, pd.DataFrame):
+            return list(self.source.columns)
+        return self._dataset().schema.names
+
+    def optimize(self) -> "QueryPlan":
+        """
+        Return the equivalent plan with the filters on source columns and the projection moved into the scan.
+        Filters stay in place after a group_by, a right/outer join, or a step that computes their column.
+        """
+        source_columns = self._source_columns()
+        scan_filters = list(self.scan_filters)
+        steps = []
+        computed = set()
+        blocked = False
+        for step in self.steps:
+            kind = step[0]
+            if kind == "filter" and not blocked and step[1] in source_columns and step[1] not in computed:
+                scan_filters.append(step[1:])
+                continue
+            if kind == "assign":
+                computed.add(step[1])
+            elif kind == "join":
+                computed.update(column for column in step[1].columns if column != step[2])
+                blocked = blocked or step[3] not in ("left", "inner")
+            elif kind == "group_by":
+                blocked = True
+            steps.append(step)
+
+        # Walk the steps backwards to find the columns they need (None: all of them)
+        required = None
+        for step in reversed(steps):
+            kind = step[0]
+            if kind == "select":
+                required = set(step[1])
+            elif kind == "group_by":
+                required = set(step[1]) | {column for column, _ in step[2].values()}
+            elif required is None:
+                continue
+            elif kind in ("filter", "sort"):
+                required.update([step[1]] if kind == "filter" else step[1])
+            elif kind == "assign":
+                required.discard(step[1])
+                required.update(step[3])
+            elif kind == "join":
+                required.difference_update(step[1].columns)
+                required.add(step[2])
+        if self.scan_columns is not None:
+            required = set(self.scan_columns) if required is None else required & set(self.scan_columns)
+        scan_columns = None if required is None else [column for column in source_columns if column in required]
+        return QueryPlan(self.source, steps, scan_filters, scan_columns)
+
+    def explain(self) -> str:
+        """Text description of the optimized plan, one step per line."""
+        plan = self.optimize()
+        source = "DataFrame" if isinstance(self.source, pd.DataFrame) else str(self.source)
+        lines = ["Scan %s columns=%s filters=%s" % (
+            source, plan.scan_columns if plan.scan_columns is not None else "*",
+            ["%s %s %r" % condition for condition in plan.scan_filters])]
+        for step in plan.steps:
+            kind = step[0]
+            if kind == "filter":
+                lines.append("  Filter %s %s %r" % step[1:])
+            elif kind == "select":
+                lines.append("  Select %s" % step[1])
+            elif kind == "assign":
+                lines.append("  Assign %s <- %s" % (step[1], step[3]))
+            elif kind == "join":
+                lines.append("  Join %s on %s (%d lookup rows)" % (step[3], step[2], len(step[1])))
+            elif kind == "group_by":
+                aggregations = ["%s=%s(%s)" % (name, func, column) for name, (column, func) in step[2].items()]
+                lines.append("  GroupBy %s: %s" % (step[1], ", ".join(aggregations)))
+            elif kind == "sort":
+                lines.append("  Sort %s %s" % (step[1], "asc" if step[2] else "desc"))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _expression(schema: pa.Schema, column: str, op: str, value):
+        """pyarrow dataset expression of a filter, with date strings converted for timestamp columns."""
+        if pa.types.is_timestamp(schema.field(column).type):
+            value = [pd.Timestamp(v) for v in value] if op in ("in", "not in") else pd.Timestamp(value)
+        field = ds.field(column)
+        if op == "in":
+            return field.isin(value)
+        if op == "not in":
+            return ~field.isin(value)
+        return {"==": field == value, "!=": field != value, "<": field < value, "<=": field <= value,
+                ">": field > value, ">=": field >= value}[op]
+
+    @staticmethod
+    def _mask(values: pd.Series, op: str, value) -> pd.Series:
+        """Boolean mask of a filter over a pandas column."""
+        if op == "in":
+            return values.isin(value)
+        if op == "not in":
+            return ~values.isin(value)
+        return {"==": values.__eq__, "!=": values.__ne__, "<": values.__lt__, "<=": values.__le__,
+                ">": values.__gt__, ">=": values.__ge__}[op](value)
+
+    def _read(self) -> pd.DataFrame:
+        """Execute the scan of an optimized plan."""
+        if isinstance(self.source, pd.DataFrame):
+            df = self.source
+            if self.scan_filters:
+                mask = pd.Series(True, index=df.index)
+                for column, op, value in self.scan_filters:
+                    mask &= self._mask(df[column], op, value)
+                df = df[mask]
+            df = df[self.scan_columns] if self.scan_columns is not None else df
+            self.stats = {"rows_read": len(df), "columns_read": list(df.columns)}
+            return df
+
+        dataset = self._dataset()
+        expression = None
+        for condition in self.scan_filters:
+            term = self._expression(dataset.schema, *condition)
+            expression = term if expression is None else expression & term
+        # Row groups left after partition and statistics pruning (footers only, no data read)
+        row_groups = [piece for fragment in dataset.get_fragments(filter=expression)
+                      for piece in fragment.split_by_row_group(expression, schema=dataset.schema)]
+        table = dataset.to_table(columns=self.scan_columns, filter=expression)
+        self.stats = {"rows_read": table.num_rows, "columns_read": table.schema.names,
+                      "row_groups_read": len(row_groups),
+                      "row_groups_total": sum(fragment.num_row_groups for fragment in dataset.get_fragments())}
+        return table.to_pandas()
+
+    @staticmethod
+    def _join(df: pd.DataFrame, right: pd.DataFrame, on: str, how: str) -> pd.DataFrame:
+        if df[on].dtype != right[on].dtype:
+            df = df.assign(**{on: df[on].astype(str)})
+            right = right.assign(**{on: right[on].astype(str)})
+        return df.merge(right, on=on, how=how)
+
+    def collect(self) -> pd.DataFrame:
+        """
+        Optimize and execute the plan.
+        :return: Result DataFrame; the scan statistics (rows, columns and row groups read) are in self.stats
+        """
+        plan = self.optimize()
+        df = plan._read()
+        for step in plan.steps:
+            kind = step[0]
+            if kind == "filter":
+                df = df[self._mask(df[step[1]], step[2], step[3])]
+            elif kind == "select":
+                df = df[step[1]]
+            elif kind == "assign":
+                df = df.assign(**{step[1]: step[2](df)})
+            elif kind == "join":
+                df = self._join(df, step[1], step[2], step[3])
+            elif kind == "group_by":
+                df = df.groupby(step[1], observed=True, as_index=False).agg(**step[2])
+            elif kind == "sort":
+                df = df.sort_values(by=step[1], ascending=step[2])
+        self.stats = plan.stats
+        logger.info("Query plan executed: %s", self.stats)
+        return df.reset_index(drop=True)
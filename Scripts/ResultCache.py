@@ -0,0 +1,183 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Persistent memoization of the TransactionProcessor outputs.
+    Every entry is keyed by a fingerprint of the input files (content hashes), of the options that
+    change the results and of the code version (hash of the modules computing them), so an entry is
+    only served while none of them changed. Entries are pickled next to a JSON manifest; the total size
+    is bounded by evicting the least recently used entries, and storing an entry drops the entries of
+    the same output computed from previous versions of the same inputs. It can be shared by threads.
+    It contains the methods :
+    - file_digest which hashes a file, reusing the hash while its size and mtime are unchanged
+    - code_version which hashes the source of modules
+    - fingerprint which combines the input, option and code hashes
+    - get, put and memoize which read, write or compute-and-write an entry
+    - clear which removes every entry
+    """
+    MANIFEST = "manifest.json"
+
+    def __init__(self, cache_dir: str = "cache/results", max_bytes: int = 256 * 2 ** 20):
+        """
+        Open (or create) a result cache directory.
+
+        :param cache_dir: Directory of the entries and manifest.
+        :param max_bytes: Maximum total size of the entries before the least recently used are evicted.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.RLock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self) -> dict:
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        if os.path.exists(path):
+            with open(path) as file:
+                return json.load(file)
+        return {"clock": 0, "files": {}, "entries": {}}
+
+    def _write_manifest(self):
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "w") as file:
+            json.dump(self.manifest, file)
+        os.replace(tmp_path, path)
+
+    def file_digest(self, path: str) -> str:
+        """SHA-256 of a file, recomputed only when its size or modification time changed."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            record = self.manifest["files"].get(key)
+            if record is None or (record["size"], record["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+                digest = hashlib.sha256()
+                with open(path, "rb") as file:
+                    for block in iter(lambda: file.read(2 ** 20), b""):
+                        digest.update(block)
+                record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+                self.manifest["files"][key] = record
+                self._write_manifest()
+            return record["sha256"]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def code_version(*modules: str) -> str:
+        """Hash of the source files of modules (e.g. "Scripts.TransactionProcessor"), computed once per process."""
+        digest = hashlib.sha256()
+        for name in modules:
+            module = __import__(name, fromlist=["__file__"])
+            with open(module.__file__, "rb") as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    def fingerprint(self, paths, modules=(), **options) -> tuple:
+        """
+        Fingerprint of a computation.
+
+        :param paths: Input files.
+        :param modules: Modules whose source determines the results.
+        :param options: Other parameters that change the results.
+        :return: Tuple (fingerprint, scope); the scope only identifies the inputs by path, so that entries
+                 from previous versions of the same files are recognized as stale
+        """
+        paths = [os.path.abspath(path) for path in paths]
+        scope = json.dumps({"paths": paths, "options": options}, sort_keys=True, default=str)
+        fingerprint = hashlib.sha256(json.dumps({
+            "scope": scope,
+            "inputs": [self.file_digest(path) for path in paths],
+            "code": self.code_version(*modules),
+        }, sort_keys=True).encode()).hexdigest()
+        return fingerprint, hashlib.sha256(scope.encode()).hexdigest()
+
+    @staticmethod
+    def _key(fingerprint: str, name: str) -> str:
+        return hashlib.sha256(("%s:%s" % (fingerprint, name)).encode()).hexdigest()[:32]
+
+    def _touch(self, key: str):
+        self.manifest["clock"] += 1
+        self.manifest["entries"][key]["last_used"] = self.manifest["clock"]
+
+    def _remove(self, key: str):
+        self.manifest["entries"].pop(key, None)
+        path = os.path.join(self.cache_dir, key + ".pkl")
+        if os.path.exists(path):
+            os.remove(path)
+
+    def get(self, fingerprint: str, name: str):
+        """
+        Return a cached output.
+
+        :raises KeyError: when the output is not cached for this fingerprint
+        """
+        key = self._key(fingerprint, name)
+        path = os.path.join(self.cache_dir, key + ".pkl")
+        with self._lock:
+            if key not in self.manifest["entries"] or not os.path.exists(path):
+                self.stats["misses"] += 1
+                raise KeyError(name)
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+            self._touch(key)
+            self._write_manifest()
+            self.stats["hits"] += 1
+        return value
+
+    def put(self, fingerprint: str, name: str, value, scope: str = None):
+        """
+        Store an output, drop the stale entries of the same output and scope, and evict the least
+        recently used entries beyond max_bytes.
+        :return: value
+        """
+        key = self._key(fingerprint, name)
+        path = os.path.join(self.cache_dir, key + ".pkl")
+        tmp_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+        with open(tmp_path, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            os.replace(tmp_path, path)
+            entries = self.manifest["entries"]
+            if scope is not None:
+                stale = [other for other, entry in entries.items()
+                         if entry["name"] == name and entry["scope"] == scope and other != key]
+                for other in stale:
+                    self._remove(other)
+                if stale:
+                    logger.info("Result cache: %d stale %s entries removed", len(stale), name)
+            entries[key] = {"name": name, "scope": scope, "size": os.path.getsize(path)}
+            self._touch(key)
+
+            total = sum(entry["size"] for entry in entries.values())
+            for other in sorted(entries, key=lambda entry: entries[entry]["last_used"]):
+                if total <= self.max_bytes or other == key:
+                    break
+                total -= entries[other]["size"]
+                self._remove(other)
+                self.stats["evictions"] += 1
+            self._write_manifest()
+        return value
+
+    def memoize(self, fingerprint: str, name: str, func, scope: str = None):
+        """Return the cached output, or compute it with func() and store it."""
+        try:
+            return self.get(fingerprint, name)
+        except KeyError:
+            return self.put(fingerprint, name, func(), scope)
+
+    def clear(self):
+        """Remove every entry (the file hashes are kept)."""
+        with self._lock:
+            for key in list(self.manifest["entries"]):
+                self._remove(key)
+            self._write_manifest()
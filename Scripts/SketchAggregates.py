@@ -0,0 +1,276 @@
+import json
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    64-bit hashes of the non-missing values, stable across processes and runs.
+    Numbers are hashed as float64 and everything else as strings, so that a column read as int in one
+    chunk and as float (or as categorical strings) in another still hashes the same.
+    """
+    values = values.dropna()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = pd.util.hash_array(values.cat.categories.astype(str).to_numpy(dtype=object))
+        return categories[values.cat.codes.to_numpy()]
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return pd.util.hash_array(values.to_numpy(dtype="float64"))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch of weighted keys, with a bounded set of candidate heavy hitters.
+    Estimates exceed the true weight by at most epsilon * total weight with probability 1 - delta
+    (non-negative weights, minimum of the rows); with negative weights (returns), the median of the rows
+    is used, which is within 3 * epsilon * total absolute weight.
+    """
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01, capacity: int = 50):
+        """
+        :param epsilon: Relative error bound; the sketch has ceil(e / epsilon) columns.
+        :param delta: Failure probability; the sketch has ceil(ln(1 / delta)) rows.
+        :param capacity: Number of candidate keys kept for top.
+        """
+        self.epsilon, self.delta, self.capacity = epsilon, delta, capacity
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1 / delta)))
+        self.table = np.zeros((self.depth, self.width), dtype=np.float64)
+        self.total = 0.0  # Sum of the absolute weights
+        self.signed = False
+        self.candidates = pd.Index([], dtype=object)
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        """Column of every hash in each row (double hashing), shape (depth, len(hashes))."""
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        high = ((hashes >> np.uint64(32)) | np.uint64(1)).astype(np.int64)
+        rows = np.arange(self.depth, dtype=np.int64)[:, None]
+        return (low[None, :] + rows * high[None, :]) % self.width
+
+    def _estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        counts = np.take_along_axis(self.table, self._columns(hashes), axis=1)
+        return np.median(counts, axis=0) if self.signed else counts.min(axis=0)
+
+    def estimate(self, keys) -> pd.Series:
+        """Estimated total weight of keys."""
+        keys = pd.Index(keys, dtype=object)
+        return pd.Series(self._estimate_hashes(hash_values(keys.to_series())), index=keys)
+
+    def _keep_candidates(self, keys: pd.Index):
+        keys = self.candidates.append(keys).unique()
+        self.candidates = self.estimate(keys).nlargest(self.capacity).index
+
+    def update(self, keys: pd.Series, weights: pd.Series = None) -> "CountMinSketch":
+        """Add the weights (1 per row by default) of keys; rows with a missing key are ignored."""
+        weights = pd.Series(1.0, index=keys.index) if weights is None else weights.astype("float64")
+        if not isinstance(keys.dtype, pd.CategoricalDtype):
+            keys = keys.astype(str).where(keys.notna())  # Categoricals are grouped on their codes
+        sums = weights.groupby(keys, observed=True, sort=False).sum()
+        sums.index = pd.Index(sums.index.astype(str), dtype=object)
+        if len(sums):
+            columns = self._columns(hash_values(sums.index.to_series()))
+            for row in range(self.depth):
+                self.table[row] += np.bincount(columns[row], weights=sums.to_numpy(), minlength=self.width)
+            self.total += float(np.abs(sums.to_numpy()).sum())
+            self.signed |= bool((sums.to_numpy() < 0).any())
+            self._keep_candidates(pd.Index(sums.index, dtype=object))
+        return self
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """Add another sketch of the same dimensions into this one and return self."""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different dimensions")
+        self.table += other.table
+        self.total += other.total
+        self.signed |= other.signed
+        self._keep_candidates(other.candidates)
+        return self
+
+    def top(self, n: int = 10) -> pd.Series:
+        """The n candidate keys with the highest estimated weights, in decreasing order."""
+        return self.estimate(self.candidates).sort_values(ascending=False, kind="stable").head(n)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter over 64-bit hashes, with a relative standard error of
+    1.04 / sqrt(2 ** precision) (1.6 % with the default 4096 registers of one byte).
+    """
+    def __init__(self, precision: int = 12):
+        """:param precision: Number of index bits (4 to 18), the sketch has 2 ** precision registers."""
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Add the hashes of the values to count."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = hashes << np.uint64(self.precision)
+        # Rank of the first set bit of the remaining bits, from the bit length of rest
+        bit_length = np.zeros(len(rest), dtype=np.int64)
+        for shift in (32, 16, 8, 4, 2, 1):
+            high = rest >> np.uint64(shift)
+            bit_length += np.where(high > 0, shift, 0)
+            rest = np.where(high > 0, high, rest)
+        bit_length += (rest > 0)
+        ranks = np.where(bit_length > 0, 65 - bit_length, 65 - self.precision).astype(np.uint8)
+        np.maximum.at(self.registers, index, ranks)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Union with another sketch of the same precision, and return self."""
+        if self.precision != other.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precisions")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values added."""
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting for small cardinalities
+        return int(round(estimate))
+
+
+class SketchAggregates:
+    """
+    Approximate, mergeable statistics of very large histories, in memory bounded by the error settings
+    instead of the number of products, customers or invoices:
+    - Count-Min sketches with heavy-hitter candidates for the top products by sales, overall and in one country
+    - HyperLogLog counts of the distinct customers (overall and per country) and invoices
+    A chunk of transactions produces one instance (see TransactionProcessor.sketch_aggregates); instances
+    built with the same settings merge across chunks and runs, and can be attached to PartialAggregates.
+    It contains the methods :
+    - update which adds a chunk of cleaned transactions
+    - merge which adds another instance into this one
+    - save and load which persist the sketches to a .npz file
+    - to_results which finalizes the approximate statistics
+    """
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01, precision: int = 12, capacity: int = 50,
+                 country: str = "France"):
+        """
+        Initialize empty sketches.
+
+        :param epsilon: Count-Min relative error bound on the product sales.
+        :param delta: Count-Min failure probability.
+        :param precision: HyperLogLog precision of the distinct counts (relative error 1.04 / sqrt(2 ** precision)).
+        :param capacity: Number of heavy-hitter products tracked.
+        :param country: Country of the approximate best product.
+        """
+        self.options = {"epsilon": epsilon, "delta": delta, "precision": precision, "capacity": capacity,
+                        "country": country}
+        self.products = CountMinSketch(epsilon, delta, capacity)
+        self.country_products = CountMinSketch(epsilon, delta, capacity)
+        self.customers = HyperLogLog(precision)
+        self.invoices = HyperLogLog(precision)
+        self.country_customers = {}
+
+    def update(self, df: pd.DataFrame) -> "SketchAggregates":
+        """
+        Add cleaned transactions.
+
+        :param df: Cleaned transactions with TotalAmount (see TransactionProcessor.calculate_total_amount).
+        """
+        self.products.update(df["Description"], df["TotalAmount"])
+        in_country = df["Country"] == self.options["country"]
+        self.country_products.update(df.loc[in_country, "Description"], df.loc[in_country, "TotalAmount"])
+        self.invoices.add(hash_values(df["InvoiceNo"]))
+
+        customers = df[["CustomerID", "Country"]].dropna(subset=["CustomerID"])
+        hashes = hash_values(customers["CustomerID"])
+        self.customers.add(hashes)
+        for country, positions in customers.groupby("Country", observed=True, sort=False).indices.items():
+            country = str(country)
+            if country not in self.country_customers:
+                self.country_customers[country] = HyperLogLog(self.options["precision"])
+            self.country_customers[country].add(hashes[positions])
+        return self
+
+    def merge(self, other: "SketchAggregates") -> "SketchAggregates":
+        """Add the sketches of another instance with the same settings into this one and return self."""
+        if other.options != self.options:
+            raise ValueError("Cannot merge sketches built with different settings: %s, %s"
+                             % (self.options, other.options))
+        self.products.merge(other.products)
+        self.country_products.merge(other.country_products)
+        self.customers.merge(other.customers)
+        self.invoices.merge(other.invoices)
+        for country, sketch in other.country_customers.items():
+            if country in self.country_customers:
+                self.country_customers[country].merge(sketch)
+            else:
+                self.country_customers[country] = HyperLogLog(sketch.precision).merge(sketch)
+        return self
+
+    def save(self, path: str):
+        """Persist the sketches to a .npz file."""
+        arrays = {"options": np.array(json.dumps(self.options)),
+                  "customers": self.customers.registers, "invoices": self.invoices.registers,
+                  "countries": np.array(list(self.country_customers), dtype=str),
+                  "country_customers": np.array([sketch.registers for sketch in self.country_customers.values()],
+                                                dtype=np.uint8).reshape(-1, len(self.customers.registers))}
+        for name in ("products", "country_products"):
+            sketch = getattr(self, name)
+            arrays[name] = sketch.table
+            arrays[name + "_state"] = np.array([sketch.total, float(sketch.signed)])
+            arrays[name + "_candidates"] = np.array(list(sketch.candidates), dtype=str)
+        with open(path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "SketchAggregates":
+        """Load sketches saved with save."""
+        with np.load(path) as arrays:
+            sketches = cls(**json.loads(str(arrays["options"])))
+            sketches.customers.registers = arrays["customers"].copy()
+            sketches.invoices.registers = arrays["invoices"].copy()
+            for country, registers in zip(arrays["countries"], arrays["country_customers"]):
+                sketches.country_customers[str(country)] = HyperLogLog(sketches.options["precision"])
+                sketches.country_customers[str(country)].registers = registers.copy()
+            for name in ("products", "country_products"):
+                sketch = getattr(sketches, name)
+                sketch.table = arrays[name].copy()
+                sketch.total, signed = arrays[name + "_state"]
+                sketch.signed = bool(signed)
+                sketch.candidates = pd.Index(arrays[name + "_candidates"].tolist(), dtype=object)
+        return sketches
+
+    def to_results(self, top_n: int = 10) -> dict:
+        """
+        Finalize the approximate statistics.
+        :return: Dictionary with top_products (Description and estimated TotalAmount of the top_n products),
+                 approx_best_product_in_<country> (None without sales there), distinct_customers,
+                 distinct_invoices and country_customers (Country and estimated distinct Customers)
+        """
+        top_products = self.products.top(top_n)
+        best = self.country_products.top(1)
+        country_customers = pd.DataFrame({
+            "Country": list(self.country_customers),
+            "Customers": [sketch.count() for sketch in self.country_customers.values()]
+        }).sort_values(by="Country").reset_index(drop=True)
+        results = {
+            "top_products": pd.DataFrame({"Description": top_products.index,
+                                          "TotalAmount": top_products.to_numpy()}),
+            "approx_best_product_in_%s" % self.options["country"].lower().replace(" ", "_"):
+                best.index[0] if len(best) else None,
+            "distinct_customers": self.customers.count(),
+            "distinct_invoices": self.invoices.count(),
+            "country_customers": country_customers,
+        }
+        logger.info("Sketches finalized: %d customers, %d invoices (+/- %.1f %%), sales error <= %.2f",
+                    results["distinct_customers"], results["distinct_invoices"],
+                    100 * self.customers.relative_error, self.options["epsilon"] * self.products.total)
+        return results
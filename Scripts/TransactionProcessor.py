@@ -1,107 +1,118 @@
 import pandas as pd
 import logging
-import unittest
 import numpy as np
+from Scripts.FusedAggregator import FusedAggregator
+from Scripts.EnrichmentIndex import EnrichmentIndex
+from Scripts.AnalyticsCube import AnalyticsCube
+from Scripts.SketchAggregates import SketchAggregates
+from Scripts.Normalizer import Normalizer
 
-# Configure logging
-logging.basicConfig(
-    filename="logs/transaction_processor.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = logging.getLogger(__name__)
  
 class TransactionProcessor:
     """Handles transaction processing, including sales aggregation, supplier analysis, and world data classification."""
  
-    def __init__(self, df: pd.DataFrame, canceled_df: pd.DataFrame, supplier_df: pd.DataFrame, continent_mapping: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, canceled_df: pd.DataFrame, supplier_df: pd.DataFrame, continent_mapping: pd.DataFrame,
+                 enrichment: EnrichmentIndex = None):
         """
         Initializes the processor with the cleaned transaction data and supplier data.
         
         :param df: Cleaned transactions DataFrame.
         :param supplier_df: Supplier DataFrame containing supplier information.
+        :param enrichment: EnrichmentIndex over supplier_df and continent_mapping, built here if not given
+                           (pass the pipeline's one to build it once per run).
         """
         self.df = df
         self.canceled_df = canceled_df  # Stocker les transactions annulées
         self.supplier_df = supplier_df
         self.continent_mapping = continent_mapping
-        logging.info("TransactionProcessor initialized with data shape %s, and canceled transactions shape %s",
-                     self.df.shape, self.canceled_df.shape)
+        self.enrichment = enrichment or EnrichmentIndex(supplier_df, continent_mapping)
+        logger.info("TransactionProcessor initialized with data shape %s, and canceled transactions shape %s",
+                    self.df.shape, self.canceled_df.shape)
     def calculate_total_amount(self):
-        """Adds a TotalAmount column (Quantity * UnitPrice) for each transaction."""
-        self.df["TotalAmount"] = self.df["Quantity"] * self.df["UnitPrice"]
-        logging.info("TotalAmount column added successfully.")
+        """Adds a TotalAmount column (Quantity * UnitPrice) for each transaction, as float64."""
+        self.df["TotalAmount"] = self.df["Quantity"].astype("float64") * self.df["UnitPrice"].astype("float64")
+        logger.info("TotalAmount column added successfully.")
  
     def group_by_country(self):
         """Groups transactions by country and calculates total sales."""
-        country_sales = self.df.groupby("Country")["TotalAmount"].sum().reset_index()
-        logging.info("Transactions grouped by country successfully.")
+        country_sales = self.df.groupby("Country", observed=True)["TotalAmount"].sum().reset_index()
+        country_sales["Country"] = country_sales["Country"].astype(object)  # Plain labels, categorical or not
+        logger.info("Transactions grouped by country successfully.")
         return country_sales
  
     def aggregate_monthly_data(self):
         """Calculates monthly sales statistics, including total revenue and transaction count."""
         self.df["InvoiceDate"] = pd.to_datetime(self.df["InvoiceDate"])
-        self.df["YearMonth"] = self.df["InvoiceDate"].dt.to_period("M")
+        self.df["YearMonth"] = Normalizer.year_month(self.df)  # From the Year/Month columns when normalized
         monthly_stats = self.df.groupby("YearMonth").agg(
             TotalSales=("TotalAmount", "sum"),
             TransactionCount=("InvoiceNo", "count")
         ).reset_index()
-        logging.info("Monthly statistics calculated successfully.")
+        logger.info("Monthly statistics calculated successfully.")
         return monthly_stats
  
-    def calcul_stat_data(self):
-        """Finds the most profitable product in France and identifies the busiest transaction hour."""
-        france_df = self.df[self.df["Country"] == "France"]
-        best_product = france_df.groupby("Description")["TotalAmount"].sum().idxmax()
-        logging.info("Most profitable product in France: %s", best_product)
+    def calcul_stat_data(self, country: str = "France"):
+        """
+        Finds the most profitable product in a country and identifies the busiest transaction hour.
+        For other slices (continents, date ranges, suppliers) or repeated queries, use analytics_cube.
+
+        :param country: Country of the best product.
+        """
+        country_df = self.df[self.df["Country"] == country]
+        best_product = country_df.groupby("Description", observed=True)["TotalAmount"].sum().idxmax()
+        logger.info("Most profitable product in %s: %s", country, best_product)
  
-        self.df["Hour"] = self.df["InvoiceDate"].dt.hour
+        if "Hour" not in self.df.columns:  # Already there when the rows were normalized
+            self.df["Hour"] = self.df["InvoiceDate"].dt.hour
         busiest_hour = self.df.groupby("Hour")["InvoiceNo"].count().idxmax()
-        logging.info("Busiest transaction hour: %d h", busiest_hour)
+        logger.info("Busiest transaction hour: %d h", busiest_hour)
  
         return best_product, busiest_hour
  
-    def aggregate_supplier_data(self):
+    def aggregate_supplier_data(self, country: str = "United Kingdom", year: int = 2011):
         """
         Aggregates supplier sales data, ranking them based on total sales.
-        Also, filters data for 2011 in the United Kingdom for separate analysis.
-        :return: Tuple of DataFrames (global ranking, UK 2011 ranking)
+        Also, filters data for one country and year (the United Kingdom in 2011) for separate analysis.
+
+        :param country: Country of the separate ranking.
+        :param year: Year of the separate ranking.
+        :return: Tuple of DataFrames (global ranking, country/year ranking)
         """
         # Ensure Quantity and UnitPrice are numeric
         self.df['Quantity'] = pd.to_numeric(self.df['Quantity'], errors='coerce')
         self.df['UnitPrice'] = pd.to_numeric(self.df['UnitPrice'], errors='coerce')
         
+        # Normalize InvoiceNo once per distinct invoice, then look up the supplier codes
+        invoice_codes, invoices = self.enrichment.factorize_invoices(self.df['InvoiceNo'])
+        supplier_codes = np.append(self.enrichment.supplier_codes(invoices), -1)[invoice_codes]
+
         # Remove canceled transactions
-        df_valid = self.df[~self.df['InvoiceNo'].astype(str).str.startswith('C')]
+        canceled = np.append(invoices.str.startswith('C'), False)[invoice_codes]
+        df_valid = self.df[~canceled].copy()
         
         # Compute total sales per transaction
-        df_valid['TotalAmount'] = df_valid['Quantity'] * df_valid['UnitPrice']
-        
-        # Normalize InvoiceNo type and format
-        df_valid['InvoiceNo'] = df_valid['InvoiceNo'].astype(str).str.strip()
-        self.supplier_df['InvoiceNo'] = self.supplier_df['InvoiceNo'].astype(str).str.strip()
+        df_valid['TotalAmount'] = df_valid['Quantity'].astype('float64') * df_valid['UnitPrice'].astype('float64')
         
-        # Merge with supplier data using InvoiceNo
-        df_merged = df_valid.merge(self.supplier_df, on='InvoiceNo', how='left')
-        
-
+        # Enrich with the supplier of each invoice (array gather, no merge)
+        df_valid['Fournisseur'] = self.enrichment.supplier_names(supplier_codes[~canceled])
         
         # Aggregate total sales per supplier
-        df_supplier_sales = df_merged.groupby('Fournisseur')['TotalAmount'].sum().reset_index()
+        df_supplier_sales = df_valid.groupby('Fournisseur')['TotalAmount'].sum().reset_index()
         
         # Rank suppliers based on total sales
         df_supplier_sales = df_supplier_sales.sort_values(by='TotalAmount', ascending=False)
         
-        # Filter transactions for UK in 2011
-        df_uk_2011 = df_valid[(df_valid['InvoiceDate'] >= '2011-01-01') & 
-                              (df_valid['InvoiceDate'] < '2012-01-01') &
-                              (df_valid['Country'] == 'United Kingdom')]
+        # Filter transactions for the country and year (UK in 2011)
+        df_uk_2011 = df_valid[(df_valid['InvoiceDate'] >= '%d-01-01' % year) &
+                              (df_valid['InvoiceDate'] < '%d-01-01' % (year + 1)) &
+                              (df_valid['Country'] == country)]
         
-        # Compute total sales for UK 2011
-        df_uk_2011_merged = df_uk_2011.merge(self.supplier_df, on='InvoiceNo', how='left')
-        df_uk_2011_sales = df_uk_2011_merged.groupby('Fournisseur')['TotalAmount'].sum().reset_index()
+        # Compute total sales for the country and year
+        df_uk_2011_sales = df_uk_2011.groupby('Fournisseur')['TotalAmount'].sum().reset_index()
         df_uk_2011_sales = df_uk_2011_sales.sort_values(by='TotalAmount', ascending=False)
         
-        logging.info("Supplier aggregation completed. Returning results.")
+        logger.info("Supplier aggregation completed. Returning results.")
         
         return df_supplier_sales, df_uk_2011_sales
 
@@ -110,15 +121,55 @@ class TransactionProcessor:
         """
         Classe les continents selon les dépenses et identifie celui avec le plus d'opérations annulées.
         """
-        self.df = self.df.merge(self.continent_mapping, on="Country", how="left")
-        self.canceled_df = self.canceled_df.merge(self.continent_mapping, on="Country", how="left")
+        self.df = self.df.assign(Continent=self.enrichment.continents_for(self.df["Country"]))
+        self.canceled_df = self.canceled_df.assign(Continent=self.enrichment.continents_for(self.canceled_df["Country"]))
 
         # Calculer les dépenses par continent
         continent_sales = self.df.groupby("Continent")["TotalAmount"].sum().reset_index()
-        logging.info("Continents ranked based on total spending.")
+        logger.info("Continents ranked based on total spending.")
 
         # Trouver le continent avec le plus d'annulations
         continent_cancellations = self.canceled_df.groupby("Continent")["InvoiceNo"].count().idxmax()
-        logging.info("Continent with the highest number of cancellations: %s", continent_cancellations)
+        logger.info("Continent with the highest number of cancellations: %s", continent_cancellations)
+
+        return continent_sales, continent_cancellations
 
-        return continent_sales, continent_cancellations
\ No newline at end of file
+    def analytics_cube(self):
+        """
+        Builds the AnalyticsCube of the current transactions, answering best product, busiest hour and
+        supplier ranking queries for any country, continent, date range or supplier without a new scan.
+        :return: AnalyticsCube
+        """
+        cube = AnalyticsCube(self.df, self.enrichment)
+        logger.info("Analytics cube built for %d transactions.", len(self.df))
+        return cube
+
+    def partial_aggregates(self):
+        """
+        Computes the mergeable sums and counts behind every aggregate of this class, for chunked runs.
+        :return: PartialAggregates for the current transactions
+        """
+        return FusedAggregator(self.df, self.canceled_df, self.supplier_df, self.continent_mapping,
+                               self.enrichment).partial_aggregates()
+
+    def sketch_aggregates(self, **options):
+        """
+        Computes mergeable approximate statistics (top products, distinct customers and invoices) for
+        chunked runs over very large histories.
+
+        :param options: SketchAggregates error settings (epsilon, delta, precision, capacity, country).
+        :return: SketchAggregates for the current transactions
+        """
+        return SketchAggregates(**options).update(self.df)
+
+    def aggregate_all(self):
+        """
+        Fused alternative to calling group_by_country, aggregate_monthly_data, calcul_stat_data,
+        aggregate_supplier_data and aggregate_world_data one after the other: the key columns are
+        factorized once and every aggregate is computed in a single vectorized pass.
+        :return: Dictionary keyed like ETLPipeline's final_results (without cleaned_data)
+        """
+        results = FusedAggregator(self.df, self.canceled_df, self.supplier_df, self.continent_mapping,
+                                  self.enrichment).run()
+        logger.info("Fused aggregation completed.")
+        return results
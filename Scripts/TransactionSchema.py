@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+
+class TransactionSchema:
+    """
+    Explicit, memory-lean dtypes of the transaction frame, applied once at ingest and kept by every stage:
+    - InvoiceNo, StockCode, Description and Country as categoricals of strings
+    - Quantity as int32 (Int32 when values are missing), UnitPrice as float64
+    - CustomerID as nullable Int32
+    - IsCancelled, an int8 flag parsed once from the "C" prefix of InvoiceNo
+    UnitPrice stays float64: a float32 price is already rounded (e.g. 2.55 becomes 2.5499999523), and
+    the error of the amounts computed from it (TotalAmount) grows with the number of rows summed.
+    It contains the methods :
+    - apply which converts a frame to the schema
+    - memory_usage which reports the deep memory usage of a frame
+    """
+    CATEGORIES = ("InvoiceNo", "StockCode", "Description", "Country")
+    CANCELLED = "IsCancelled"
+
+    @staticmethod
+    def _categorical(values: pd.Series) -> pd.Series:
+        """Categorical of the string form of values; only the distinct values are converted."""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values
+        codes, uniques = pd.factorize(values)
+        labels = pd.Categorical(pd.Index(uniques).astype(str))  # e.g. 536365 and "536365" become one category
+        codes = np.append(labels.codes, -1)[codes]
+        return pd.Series(pd.Categorical.from_codes(codes, labels.categories), index=values.index, name=values.name)
+
+    @classmethod
+    def apply(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert the transaction columns of df to the schema (other columns are left as they are).
+        Applying it to an already typed frame is cheap.
+
+        :param df: Raw or typed transactions DataFrame.
+        :return: Typed DataFrame
+        """
+        df = df.copy(deep=False)
+        for name in cls.CATEGORIES:
+            if name in df.columns:
+                df[name] = cls._categorical(df[name])
+
+        if "Quantity" in df.columns:
+            quantity = pd.to_numeric(df["Quantity"], errors="coerce")
+            df["Quantity"] = quantity.astype("Int32" if quantity.isna().any() else "int32")
+        if "UnitPrice" in df.columns:
+            df["UnitPrice"] = pd.to_numeric(df["UnitPrice"], errors="coerce").astype("float64")
+        if "CustomerID" in df.columns:
+            df["CustomerID"] = pd.to_numeric(df["CustomerID"], errors="coerce").astype("Int32")
+        if "InvoiceDate" in df.columns:
+            df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"])
+
+        if "InvoiceNo" in df.columns and cls.CANCELLED not in df.columns:
+            invoices = df["InvoiceNo"].cat
+            cancelled = np.append(invoices.categories.str.startswith("C"), False)[invoices.codes]
+            df[cls.CANCELLED] = cancelled.astype(np.int8)
+        return df
+
+    @staticmethod
+    def memory_usage(df: pd.DataFrame) -> int:
+        """Deep memory usage of a frame in bytes (object strings included)."""
+        return int(df.memory_usage(deep=True, index=False).sum())
@@ -0,0 +1,111 @@
+import logging
+import os
+import shutil
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionWriter:
+    """
+    Parquet writer for typed transaction frames. Row groups are converted and written one at a time
+    straight from the typed columns (categoricals as dictionaries, numbers without copies), so there is
+    no string conversion pass over the frame and only one row group is held as Arrow data at a time.
+    It writes either a single file, or a Hive-partitioned dataset (e.g. Year=2011/Month=5/Country=France/)
+    whose partitions and row group statistics let readers skip what they do not need.
+    It contains the methods :
+    - schema which gives the Arrow schema shared by every row group of a frame
+    - write which writes a frame to a file or a partitioned dataset
+    """
+    CODECS = ("zstd", "snappy", "gzip", "lz4", "none")
+    DERIVED = {"Year": (pc.year, pa.int16()), "Month": (pc.month, pa.int8())}  # Partition columns from InvoiceDate
+
+    def __init__(self, row_group_size: int = 256_000, compression: str = "zstd", use_dictionary: bool = True,
+                 partition_by=None):
+        """
+        Initialize the writer.
+
+        :param row_group_size: Rows per row group.
+        :param compression: Codec, one of zstd, snappy, gzip, lz4 or none.
+        :param use_dictionary: Dictionary-encode the column chunks.
+        :param partition_by: Optional partition columns, e.g. ("Year", "Month", "Country"); Year and Month
+                             are derived from InvoiceDate. The output path is then a directory.
+        """
+        if compression not in self.CODECS:
+            raise ValueError("Unknown codec %r, expected one of %s" % (compression, self.CODECS))
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.use_dictionary = use_dictionary
+        self.partition_by = list(partition_by or [])
+        self.stats = {}
+
+    @staticmethod
+    def schema(df: pd.DataFrame) -> pa.Schema:
+        """Arrow schema of a frame, with int32 dictionary indices so that every row group shares it."""
+        # Typed columns are described by their first row (inferring from the whole frame would box every
+        # Period of YearMonth); only object columns need all their values to infer their type
+        objects = df.select_dtypes(include=["object"]).columns
+        schema = pa.Schema.from_pandas(df.iloc[:1], preserve_index=False)
+        if len(objects):
+            inferred = pa.Schema.from_pandas(df[objects], preserve_index=False)
+            schema = pa.schema([inferred.field(field.name) if field.name in objects else field for field in schema],
+                               metadata=schema.metadata)
+        fields = [field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+                  if pa.types.is_dictionary(field.type) else field for field in schema]
+        return pa.schema(fields, metadata=schema.metadata)
+
+    def _batches(self, df: pd.DataFrame, schema: pa.Schema):
+        """Row groups of df as Arrow tables, with the derived partition columns appended."""
+        for start in range(0, len(df), self.row_group_size):
+            table = pa.Table.from_pandas(df.iloc[start:start + self.row_group_size], schema=schema,
+                                         preserve_index=False)
+            for name in self.partition_by:
+                if name in self.DERIVED and name not in df.columns:
+                    func, arrow_type = self.DERIVED[name]
+                    table = table.append_column(name, func(table.column("InvoiceDate")).cast(arrow_type))
+            yield table
+
+    def write(self, df: pd.DataFrame, path: str) -> dict:
+        """
+        Write a frame.
+
+        :param df: Typed transactions DataFrame (object columns are written as Arrow infers them).
+        :param path: Output file, or output directory (replaced) when partition_by is set.
+        :return: Write statistics: rows, bytes written, files and seconds
+        """
+        start = time.perf_counter()
+        schema = self.schema(df)
+        compression = None if self.compression == "none" else self.compression
+        if not self.partition_by:
+            with pq.ParquetWriter(path, schema, compression=compression,
+                                  use_dictionary=self.use_dictionary) as writer:
+                for table in self._batches(df, schema):
+                    writer.write_table(table, row_group_size=self.row_group_size)
+            files = [path]
+        else:
+            partition_schema = next(self._batches(df.iloc[:1], schema)).schema if len(df) else schema
+            partitioning = ds.partitioning(pa.schema([partition_schema.field(name) for name in self.partition_by]),
+                                           flavor="hive")
+            file_format = ds.ParquetFileFormat()
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            ds.write_dataset(
+                (batch for table in self._batches(df, schema) for batch in table.to_batches()), path,
+                schema=partition_schema, format=file_format, partitioning=partitioning,
+                file_options=file_format.make_write_options(compression=compression,
+                                                            use_dictionary=self.use_dictionary),
+                min_rows_per_group=self.row_group_size, max_rows_per_group=self.row_group_size,
+                existing_data_behavior="overwrite_or_ignore"
+            )
+            files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+
+        self.stats = {"rows": len(df), "files": len(files), "bytes": sum(os.path.getsize(file) for file in files),
+                      "seconds": time.perf_counter() - start}
+        logger.info("Transactions written to %s: %s", path, self.stats)
+        return self.stats
@@ -0,0 +1,73 @@
+"""
+Command line entry point of the ETL pipeline:
+
+    python -m Scripts [--async] [--profile] [--legacy-json] [--retail PATH] [--output DIR] ...
+
+Only argparse and logging are imported here; pandas and the pipeline modules are imported once the
+arguments are parsed, so --help and argument errors answer immediately (see tests/ImportTimeTest.py).
+"""
+import argparse
+import logging
+import os
+import sys
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m Scripts", description="Online Retail ETL pipeline")
+    parser.add_argument("--retail", default="data/Online Retail.xlsx",
+                        help="retail Excel/CSV file, or glob pattern of several drops")
+    parser.add_argument("--supplier", default="data/Supplier.csv")
+    parser.add_argument("--continents", default="data/continent_mapping_full.csv")
+    parser.add_argument("--cache-dir", default="cache", help="ingest cache directory ('' to disable it)")
+    parser.add_argument("--output", default="output", help="directory of the outputs")
+    parser.add_argument("--async", dest="run_async", action="store_true",
+                        help="read, aggregate and write the outputs as concurrent stages (see ETLPipeline.run_async)")
+    parser.add_argument("--profile", action="store_true",
+                        help="write a run report with per-stage timings and memory to <output>/run_report.json")
+    parser.add_argument("--legacy-json", action="store_true",
+                        help="also write the semi-cleaned rows as JSON for older dashboards")
+    parser.add_argument("--log-dir", default="logs")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Runs the pipeline, writes its outputs and prints the key results."""
+    args = parse_args(argv)
+
+    from Scripts.LoggingConfig import configure_logging
+    configure_logging(args.log_dir, getattr(logging, args.log_level))
+
+    from Scripts.ETLPipeline import ETLPipeline
+    from Scripts.PipelineProfiler import PipelineProfiler
+
+    output = args.output
+    os.makedirs(output, exist_ok=True)
+    profiler = PipelineProfiler(os.path.join(output, "run_report.json")) if args.profile else None
+    etl = ETLPipeline(args.retail, args.supplier, args.continents, cache_dir=args.cache_dir or None,
+                      profiler=profiler, defer_load=args.run_async)
+    parquet_path = os.path.join(output, "processed_data.parquet")
+    semi_cleaned_path = os.path.join(output, "semi_cleaned")
+    views_path = os.path.join(output, "views")
+    json_path = os.path.join(output, "semi_cleaned_data.json") if args.legacy_json else None
+    if args.run_async:
+        results = etl.run_async(parquet_path, semi_cleaned_path, views_path, json_path)
+        print("Critical path: %s (%.2f s of %.2f s)" % (" -> ".join(etl.run_report["critical_path"]),
+                                                       etl.run_report["critical_path_s"], etl.run_report["wall_s"]))
+    else:
+        results = etl.run_pipeline()
+        etl.save_as_parquet(parquet_path, writer="arrow")
+        # Save semi-cleaned dataset for the dashboard
+        etl.save_semi_cleaned_parquet(semi_cleaned_path)
+        etl.save_dashboard_views(views_path)
+        if json_path:
+            etl.save_semi_cleaned_json(json_path)
+
+    # Display key results
+    print("Best-selling product in France:", results["best_product_in_france"])
+    print("Busiest transaction hour:", results["busiest_transaction_hour"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
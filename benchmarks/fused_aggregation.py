@@ -0,0 +1,75 @@
+"""
+Benchmark of the fused aggregation engine against the method-by-method TransactionProcessor path.
+
+Usage:
+    python benchmarks/fused_aggregation.py [rows ...]
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.TransactionProcessor import TransactionProcessor
+
+
+def make_transactions(rows: int, seed: int = 0):
+    """Random cleaned transactions, canceled transactions and lookups shaped like the Online Retail data."""
+    rng = np.random.default_rng(seed)
+    countries = np.array(["United Kingdom", "France", "Germany", "EIRE", "Spain", "Netherlands", "Australia"])
+    invoices = rng.integers(536000, 536000 + rows // 20 + 1, rows)
+    df = pd.DataFrame({
+        "InvoiceNo": invoices,
+        "StockCode": rng.integers(10000, 14000, rows).astype(str),
+        "Description": pd.Series(rng.integers(0, 4000, rows)).map("PRODUCT {}".format),
+        "Quantity": rng.integers(1, 50, rows),
+        "InvoiceDate": pd.Timestamp("2010-12-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, rows), unit="min"),
+        "UnitPrice": rng.integers(10, 2000, rows) / 100,
+        "CustomerID": rng.integers(12000, 18000, rows).astype(float),
+        "Country": countries[np.minimum(rng.geometric(0.5, rows) - 1, len(countries) - 1)]
+    })
+    canceled_df = df.sample(frac=0.02, random_state=seed).assign(InvoiceNo=lambda c: "C" + c["InvoiceNo"].astype(str))
+    unique_invoices = np.unique(invoices)
+    supplier_df = pd.DataFrame({
+        "InvoiceNo": unique_invoices.astype(str),
+        "Fournisseur": ["F%03d" % (i % 997) for i in range(len(unique_invoices))]
+    })
+    continent_mapping = pd.DataFrame({
+        "Country": countries,
+        "Continent": ["Europe"] * 6 + ["Oceania"]
+    })
+    return df, canceled_df, supplier_df, continent_mapping
+
+
+def method_by_method(processor: TransactionProcessor):
+    """The current ETLPipeline path: one scan and groupby per method."""
+    processor.group_by_country()
+    processor.aggregate_monthly_data()
+    processor.calcul_stat_data()
+    processor.aggregate_supplier_data()
+    processor.aggregate_world_data()
+
+
+def timed(func, frames, repeat: int = 3) -> float:
+    """Best wall time of func over fresh processors."""
+    best = float("inf")
+    for _ in range(repeat):
+        df, canceled_df, supplier_df, continent_mapping = frames
+        processor = TransactionProcessor(df.copy(), canceled_df.copy(), supplier_df.copy(), continent_mapping)
+        processor.calculate_total_amount()
+        start = time.perf_counter()
+        func(processor)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 500_000, 1_000_000]
+    print("%10s %14s %10s %8s" % ("rows", "methods (s)", "fused (s)", "speedup"))
+    for rows in sizes:
+        frames = make_transactions(rows)
+        methods = timed(method_by_method, frames)
+        fused = timed(TransactionProcessor.aggregate_all, frames)
+        print("%10d %14.3f %10.3f %7.1fx" % (rows, methods, fused, methods / fused))
@@ -0,0 +1,39 @@
+"""
+Scaling of the partition-parallel backend from 1 to N worker processes.
+
+Usage:
+    python benchmarks/partition_scaling.py [rows] [max_workers]
+"""
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.PartitionExecutor import PartitionExecutor
+from fused_aggregation import make_transactions
+
+
+def make_raw_transactions(rows: int):
+    """Raw transactions with cancellations, duplicates and missing CustomerIDs mixed in."""
+    df, canceled_df, supplier_df, continent_mapping = make_transactions(rows)
+    raw = pd.concat([df, canceled_df, df.sample(frac=0.01, random_state=1)], ignore_index=True)
+    raw.loc[raw.sample(frac=0.2, random_state=2).index, "CustomerID"] = None
+    return raw, supplier_df, continent_mapping
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    raw, supplier_df, continent_mapping = make_raw_transactions(rows)
+
+    print("%8s %10s %8s" % ("workers", "time (s)", "speedup"))
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        executor = PartitionExecutor(supplier_df, continent_mapping, max_workers=workers)
+        start = time.perf_counter()
+        executor.run(raw)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print("%8d %10.3f %7.2fx" % (workers, elapsed, baseline / elapsed))
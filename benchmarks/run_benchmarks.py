@@ -0,0 +1,165 @@
+"""
+Benchmark harness: times every DataCleaner and TransactionProcessor step and the end-to-end
+ETLPipeline on synthetic Online Retail data (see synthetic_retail.py), and appends throughput and
+peak memory to a JSON Lines results file tagged with the current commit.
+
+Each size runs in a fresh process so that its peak RSS is its own. Sizes above --streaming-above
+run the pipeline in streaming mode (the steps are then accumulated over the chunks).
+
+Usage:
+    python benchmarks/run_benchmarks.py [--rows 10000 100000 1000000] [--streaming-above 5000000]
+                                        [--trace-memory] [--results benchmarks/results.jsonl]
+    python benchmarks/run_benchmarks.py --compare BASE_COMMIT [HEAD_COMMIT]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.ETLPipeline import ETLPipeline
+from Scripts.PipelineProfiler import PipelineProfiler
+from synthetic_retail import write_dataset
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CONTINENTS = os.path.join(ROOT, "data", "continent_mapping_full.csv")
+RESULTS = os.path.join(ROOT, "benchmarks", "results.jsonl")
+
+
+def current_commit() -> str:
+    """Short hash of HEAD, with a + suffix when the tree has local changes."""
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, text=True)
+        return commit + ("+" if dirty.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().rss
+
+
+def benchmark_writes(etl: ETLPipeline, tmp_dir: str) -> list:
+    """
+    Time save_as_parquet with the arrow writer (single file, then partitioned by year/month/country) and
+    with the legacy fastparquet writer, last since it converts the cleaned frame in place.
+    :return: One record per writer, with its rows/s and MB/s
+    """
+    writers = [
+        ("write_arrow", dict(writer="arrow")),
+        ("write_arrow_partitioned", dict(writer="arrow", partition_by=("Year", "Month", "Country"))),
+        ("write_fastparquet", dict(writer="fastparquet")),
+    ]
+    records = []
+    for name, options in writers:
+        path = os.path.join(tmp_dir, name + ("" if "partition_by" in options else ".parquet"))
+        start = time.perf_counter()
+        etl.save_as_parquet(path, **options)
+        elapsed = time.perf_counter() - start
+        if os.path.isdir(path):
+            size = sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+        else:
+            size = os.path.getsize(path)
+        records.append({"stage": name, "calls": 1, "wall_s": elapsed, "rows_per_s": len(etl.df) / elapsed,
+                        "output_bytes": size, "mb_per_s": size / 2 ** 20 / elapsed})
+    return records
+
+
+def run_size(rows: int, chunksize: int = None, trace_memory: bool = False, seed: int = 0) -> list:
+    """
+    Generate a rows-line dataset and run the profiled pipeline on it (in a worker process).
+    :return: One record per stage, plus an "end_to_end" record
+    """
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp_dir:
+        paths = write_dataset(tmp_dir, rows, seed=seed)
+        profiler = PipelineProfiler(trace_memory=trace_memory)
+        start = time.perf_counter()
+        etl = ETLPipeline(paths["retail"], paths["supplier"], CONTINENTS, chunksize=chunksize, profiler=profiler)
+        etl.run_pipeline()
+        elapsed = time.perf_counter() - start
+        writes = benchmark_writes(etl, tmp_dir) if etl.df is not None else []
+
+    records = []
+    for stage in profiler.report()["stages"]:
+        processed = stage["rows_in"] or rows
+        records.append({
+            "stage": stage["name"], "calls": stage["calls"], "wall_s": stage["wall_s"], "cpu_s": stage["cpu_s"],
+            "rows_per_s": processed / stage["wall_s"] if stage["wall_s"] else None,
+            "tracemalloc_peak_bytes": stage["tracemalloc_peak_bytes"],
+        })
+    records.extend(writes)
+    records.append({"stage": "end_to_end", "calls": 1, "wall_s": elapsed, "rows_per_s": rows / elapsed,
+                    "peak_rss_bytes": peak_rss()})
+    return records
+
+
+def run(sizes: list, streaming_above: int, trace_memory: bool, results_path: str):
+    """Benchmark every size and append the records to the results file."""
+    commit, timestamp = current_commit(), time.strftime("%Y-%m-%dT%H:%M:%S")
+    for rows in sizes:
+        chunksize = 1_000_000 if rows > streaming_above else None
+        mode = "streaming" if chunksize else "in_memory"
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            records = pool.submit(run_size, rows, chunksize, trace_memory).result()
+
+        with open(results_path, "a") as file:
+            for record in records:
+                file.write(json.dumps(dict(commit=commit, timestamp=timestamp, rows=rows, mode=mode, **record)) + "\n")
+        for record in records:
+            if "mb_per_s" in record:
+                print("%10d rows %-24s %8.2f s %12.0f rows/s %8.1f MB/s %8.1f MB" % (
+                    rows, record["stage"], record["wall_s"], record["rows_per_s"], record["mb_per_s"],
+                    record["output_bytes"] / 2 ** 20))
+        end_to_end = records[-1]
+        print("%10d rows %-9s %8.2f s %12.0f rows/s  peak RSS %7.1f MB" % (
+            rows, mode, end_to_end["wall_s"], end_to_end["rows_per_s"], end_to_end["peak_rss_bytes"] / 2 ** 20))
+    print("Results appended to", results_path)
+
+
+def compare(results_path: str, base: str, head: str = None):
+    """Print the wall time of every stage for two commits (the latest record of each)."""
+    with open(results_path) as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    head = head or records[-1]["commit"]
+    latest = {}
+    for record in records:
+        for commit in (base, head):
+            if record["commit"].startswith(commit):
+                latest[(commit, record["rows"], record["mode"], record["stage"])] = record
+
+    print("%10s %-9s %-28s %10s %10s %8s" % ("rows", "mode", "stage", base[:10], head[:10], "ratio"))
+    for (commit, rows, mode, stage), record in sorted(latest.items(), key=lambda item: item[0][1:]):
+        other = latest.get((head, rows, mode, stage))
+        if commit != base or other is None:
+            continue
+        print("%10d %-9s %-28s %9.3fs %9.3fs %7.2fx" % (
+            rows, mode, stage, record["wall_s"], other["wall_s"], other["wall_s"] / record["wall_s"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETL pipeline benchmarks on synthetic data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--streaming-above", type=int, default=5_000_000,
+                        help="run larger sizes in streaming mode (chunks of 1M rows)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record the tracemalloc peak of every stage (slower)")
+    parser.add_argument("--results", default=RESULTS)
+    parser.add_argument("--compare", nargs="+", metavar="COMMIT", help="compare BASE [HEAD] instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.results, *args.compare[:2])
+    else:
+        run(args.rows, args.streaming_above, args.trace_memory, args.results)
@@ -0,0 +1,133 @@
+"""
+Synthetic Online Retail data: raw transactions with the schema of Online Retail.xlsx, and the
+matching Supplier.csv, generated chunk by chunk so that any size (10k to 50M rows) fits in memory.
+
+The data reproduces what the pipeline has to deal with: ~20 lines per invoice, ~2% cancelled
+("C") invoices with negative quantities, ~25% of invoices without CustomerID, ~1% duplicated lines,
+missing descriptions with zero prices, a country distribution dominated by the United Kingdom
+(with countries missing from the continent mapping) and a skewed supplier distribution.
+
+Usage:
+    python benchmarks/synthetic_retail.py rows output_dir
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Country -> share of the invoices, close to the Online Retail data
+COUNTRY_WEIGHTS = {
+    "United Kingdom": 0.89, "Germany": 0.017, "France": 0.016, "EIRE": 0.015, "Spain": 0.005,
+    "Netherlands": 0.0045, "Belgium": 0.004, "Switzerland": 0.004, "Portugal": 0.003, "Australia": 0.0025,
+    "Norway": 0.002, "Italy": 0.0015, "Channel Islands": 0.0015, "Finland": 0.0013, "Cyprus": 0.0012,
+    "Sweden": 0.0009, "Unspecified": 0.0008, "Austria": 0.0008, "Denmark": 0.0007, "Japan": 0.0007,
+    "Poland": 0.0006, "Israel": 0.0005, "USA": 0.0005, "Hong Kong": 0.0005, "Singapore": 0.0004,
+    "Iceland": 0.0003, "Canada": 0.0003, "Greece": 0.0003, "Malta": 0.0002, "RSA": 0.0001,
+    "Brazil": 0.0001, "Lebanon": 0.0001,
+}
+FIRST_INVOICE = 536365
+START, END = pd.Timestamp("2010-12-01"), pd.Timestamp("2011-12-10")
+WORDS = ["WHITE", "RED", "PINK", "BLUE", "VINTAGE", "HANGING", "HEART", "METAL", "GLASS", "WOODEN",
+         "LANTERN", "T-LIGHT", "HOLDER", "BAG", "CAKE", "CASES", "SET", "CHRISTMAS", "RETROSPOT", "JUMBO"]
+
+
+def product_catalog(products: int = 4000, seed: int = 0) -> pd.DataFrame:
+    """StockCode, Description and base UnitPrice of the products."""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)[rng.integers(0, len(WORDS), (products, 4))]
+    suffix = np.where(rng.random(products) < 0.2, np.array(list("ABCDEFG"))[rng.integers(0, 7, products)], "")
+    return pd.DataFrame({
+        "StockCode": np.char.add((20000 + np.arange(products) * 17 % 70000).astype(str), suffix),
+        "Description": [" ".join(row) + " %d" % i for i, row in enumerate(words)],
+        "UnitPrice": np.round(rng.lognormal(1.0, 0.8, products), 2),
+    })
+
+
+def invoice_count(rows: int) -> int:
+    """Number of invoices of a dataset of rows lines (20 lines per invoice on average)."""
+    return max(1, rows // 20)
+
+
+def generate_chunk(rows: int, first_invoice: int, invoices: int, rng, catalog: pd.DataFrame) -> pd.DataFrame:
+    """
+    Raw transactions of the invoices first_invoice .. first_invoice + invoices - 1, about rows lines.
+    Invoice dates grow with the invoice number, as in the source data.
+    """
+    countries = np.array(list(COUNTRY_WEIGHTS))
+    weights = np.array(list(COUNTRY_WEIGHTS.values()))
+    invoice_country = countries[rng.choice(len(countries), invoices, p=weights / weights.sum())]
+    invoice_customer = rng.integers(12346, 18288, invoices).astype(float)
+    invoice_customer[rng.random(invoices) < 0.25] = np.nan
+    invoice_canceled = rng.random(invoices) < 0.02
+    span = (END - START) // pd.Timedelta(minutes=1)
+    offsets = np.sort(rng.integers(0, span, invoices))
+    invoice_date = START + pd.to_timedelta(offsets - offsets % (24 * 60) + rng.integers(8 * 60, 20 * 60, invoices),
+                                           unit="min")
+
+    # Lines: each invoice gets a share of the rows
+    line_invoice = np.sort(rng.integers(0, invoices, rows))
+    popularity = 1 / (np.arange(len(catalog)) + 10.0) ** 0.9  # A long tail of rarely sold products
+    product = rng.choice(len(catalog), rows, p=popularity / popularity.sum())
+    quantity = rng.geometric(0.15, rows)
+    quantity = np.where(invoice_canceled[line_invoice], -quantity, quantity)
+    unit_price = catalog["UnitPrice"].to_numpy()[product]
+    description = catalog["Description"].to_numpy()[product].astype(object)
+    missing = rng.random(rows) < 0.003  # Unknown products: no description and a zero price
+    description[missing] = np.nan
+    unit_price = np.where(missing, 0.0, unit_price)
+
+    invoice_no = (first_invoice + line_invoice).astype(str).astype(object)
+    invoice_no[invoice_canceled[line_invoice]] = "C" + invoice_no[invoice_canceled[line_invoice]]
+    df = pd.DataFrame({
+        "InvoiceNo": invoice_no,
+        "StockCode": catalog["StockCode"].to_numpy()[product],
+        "Description": description,
+        "Quantity": quantity,
+        "InvoiceDate": invoice_date[line_invoice],
+        "UnitPrice": unit_price,
+        "CustomerID": invoice_customer[line_invoice],
+        "Country": invoice_country[line_invoice],
+    })
+    # Duplicated lines, next to their original
+    duplicates = df.iloc[np.flatnonzero(rng.random(rows) < 0.01)]
+    return pd.concat([df, duplicates]).sort_index(kind="stable").reset_index(drop=True)
+
+
+def iter_transactions(rows: int, chunk_rows: int = 1_000_000, seed: int = 0):
+    """Yield the raw transactions of a rows-line dataset in chunks of about chunk_rows lines."""
+    rng = np.random.default_rng(seed)
+    catalog = product_catalog(seed=seed)
+    total_invoices = invoice_count(rows)
+    for start in range(0, rows, chunk_rows):
+        chunk = min(chunk_rows, rows - start)
+        first, last = total_invoices * start // rows, total_invoices * (start + chunk) // rows
+        yield generate_chunk(chunk, FIRST_INVOICE + first, max(1, last - first), rng, catalog)
+
+
+def make_supplier_df(rows: int, suppliers: int = 900, seed: int = 0) -> pd.DataFrame:
+    """Supplier of every invoice (and of its cancellation), skewed towards a few suppliers; 2% are unknown."""
+    rng = np.random.default_rng(seed + 1)
+    invoices = FIRST_INVOICE + np.arange(invoice_count(rows))
+    invoices = invoices[rng.random(len(invoices)) >= 0.02]
+    invoice_no = np.concatenate([invoices.astype(str), np.char.add("C", invoices.astype(str))])
+    supplier = 100 + (rng.zipf(1.2, len(invoice_no)) - 1) % suppliers
+    return pd.DataFrame({"InvoiceNo": invoice_no, "Fournisseur": np.char.add("F", supplier.astype(str))})
+
+
+def write_dataset(directory: str, rows: int, seed: int = 0, chunk_rows: int = 1_000_000) -> dict:
+    """
+    Write retail.csv and Supplier.csv for a rows-line dataset into directory.
+    :return: Dictionary with the retail and supplier paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    retail_path = os.path.join(directory, "retail.csv")
+    supplier_path = os.path.join(directory, "Supplier.csv")
+    for i, chunk in enumerate(iter_transactions(rows, chunk_rows, seed)):
+        chunk.to_csv(retail_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    make_supplier_df(rows, seed=seed).to_csv(supplier_path, index=False)
+    return {"retail": retail_path, "supplier": supplier_path}
+
+
+if __name__ == "__main__":
+    paths = write_dataset(sys.argv[2], int(sys.argv[1]))
+    print("Written:", paths)
@@ -1,33 +1,69 @@
+import os
 import streamlit as st
-import pandas as pd
-import altair as alt
-import json
-import folium
-from streamlit_folium import folium_static
-
-# Load data
-def load_data():
-    file_path = "output/semi_cleaned_data.json"
-    with open(file_path, "r") as file:
-        return pd.DataFrame(json.load(file))
-
-df = load_data()
+from Scripts.DashboardViews import DashboardViews
+from Scripts.LoggingConfig import configure_logging
 
-# Ensure correct data types
-df["Quantity"] = pd.to_numeric(df["Quantity"], errors="coerce").fillna(0)
-df["UnitPrice"] = pd.to_numeric(df["UnitPrice"], errors="coerce").fillna(0)
+# Charting libraries (altair, folium) and the dataset readers are imported where they are first used,
+# so the first elements are rendered while the rest of the script is still loading them
+configure_logging()
 
-# Convert InvoiceDate to datetime
-df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"], unit='ms')
+VIEWS_PATH = "output/views"  # Written by ETLPipeline.save_dashboard_views
+DATASET_PATH = "output/semi_cleaned"  # Written by ETLPipeline.save_semi_cleaned_parquet
+LEGACY_JSON_PATH = "output/semi_cleaned_data.json"  # Written by ETLPipeline.save_semi_cleaned_json
+DASHBOARD_COLUMNS = ["StockCode", "Description", "Quantity", "InvoiceDate", "UnitPrice", "Country", "Continent"]
+NORMALIZED_COLUMNS = ["Year", "Month"]  # Added by the Normalizer stage of the ETL
 
-# Remove negative quantities (returns)
-df = df[df["Quantity"] > 0]
+def available_continents():
+    """Continent partitions of the dataset, read from the partition keys only."""
+    return DashboardViews.dataset_continents(DATASET_PATH)
 
-# Standardize Description (remove extra spaces, convert to uppercase)
-df["Description"] = df["Description"].str.strip().str.upper()
-
-# Calculate Total Sales correctly
-df["TotalSales"] = df["Quantity"] * df["UnitPrice"]
+# Load data
+def load_data(continents=None):
+    """Reads only the dashboard columns, and only the selected continent partitions."""
+    if os.path.isdir(DATASET_PATH):
+        import pyarrow.dataset as ds
+        from Scripts.QueryPlan import QueryPlan
+        # Year/Month of normalized rows are read too, so the monthly chart does not re-derive them from the dates
+        names = ds.dataset(DATASET_PATH, format="parquet", partitioning="hive").schema.names
+        columns = DASHBOARD_COLUMNS + [name for name in NORMALIZED_COLUMNS if name in names]
+        plan = QueryPlan.scan(DATASET_PATH).select(*columns)
+        if continents:
+            plan = plan.filter("Continent", "in", list(continents))  # Pushed down to the partitions
+        return plan.collect()
+
+    # Legacy JSON handoff (dates are epoch milliseconds)
+    import json
+    import pandas as pd
+    with open(LEGACY_JSON_PATH, "r") as file:
+        df = pd.DataFrame(json.load(file))
+    df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"], unit='ms')
+    return df
+
+@st.experimental_memo
+def load_views(version):
+    """Materialized views of the ETL, cached until a run publishes a new version."""
+    return DashboardViews.load(VIEWS_PATH).views
+
+@st.experimental_memo
+def build_views(continents):
+    """Fallback without materialized views: aggregate the selected rows once per selection."""
+    return DashboardViews.build(load_data(list(continents) or None)).views
+
+version = DashboardViews.read_version(VIEWS_PATH)
+partitions = available_continents() if version is None else []
+if version is not None:
+    views = load_views(version)
+    continents = sorted(views["continent_sales"]["Continent"])
+    selected_continents = st.sidebar.multiselect("Continents", continents, default=continents)
+elif partitions:
+    continents = partitions
+    selected_continents = st.sidebar.multiselect("Continents", continents, default=continents)
+    views = build_views(tuple(selected_continents))
+else:
+    # Legacy JSON handoff: no partitions to list, the continents come from the loaded rows
+    views = build_views(())
+    continents = sorted(views["continent_sales"]["Continent"])
+    selected_continents = st.sidebar.multiselect("Continents", continents, default=continents)
 
 # Format TotalSales for business readability
 def format_sales(value):
@@ -37,12 +73,17 @@ def format_sales(value):
         return f"{value / 1_000:.1f}K €"  # Thousands
     return f"{value:.2f} €"  # Default
 
+def selected(view):
+    """Rows of a view that belong to the selected continents."""
+    return view[view["Continent"].isin(selected_continents)]
+
 st.title("Sales Dashboard")
 # --- 1️⃣ Total Sales by Continent ---
-sales_by_continent = df.groupby("Continent", as_index=False)["TotalSales"].sum()
+sales_by_continent = selected(views["continent_sales"]).copy()
 sales_by_continent["FormattedSales"] = sales_by_continent["TotalSales"].apply(format_sales)
 
 # Create Altair bar chart for continents
+import altair as alt
 continent_chart = alt.Chart(sales_by_continent).mark_bar().encode(
     x=alt.X("TotalSales:Q", title="Total Sales (€)"),
     y=alt.Y("Continent:N", sort="-x", title="Continent"),
@@ -52,8 +93,13 @@ continent_chart = alt.Chart(sales_by_continent).mark_bar().encode(
 st.altair_chart(continent_chart, use_container_width=True)
 
 # --- 2️⃣ Top 10 Products by Sales ---
-sales_by_product = df.groupby(["StockCode", "Description"], as_index=False)["TotalSales"].sum()
-sales_by_product = sales_by_product.sort_values(by="TotalSales", ascending=False).head(10)
+top_products = views["top_products"]
+if set(selected_continents) >= set(continents):
+    sales_by_product = top_products[top_products["Continent"] == DashboardViews.ALL]
+else:
+    # Rank the full per-continent product totals of the selection
+    sales_by_product = selected(views["product_sales"]).groupby(["StockCode", "Description"], as_index=False)["TotalSales"].sum()
+sales_by_product = sales_by_product.sort_values(by="TotalSales", ascending=False).head(10).copy()
 sales_by_product["FormattedSales"] = sales_by_product["TotalSales"].apply(format_sales)
 
 # Create Altair bar chart for top products
@@ -66,7 +112,7 @@ product_chart = alt.Chart(sales_by_product).mark_bar().encode(
 st.altair_chart(product_chart, use_container_width=True)
 
 # --- 3️⃣ Sales Over Time ---
-sales_over_time = df.resample('M', on="InvoiceDate")["TotalSales"].sum().reset_index()
+sales_over_time = selected(views["monthly_sales"]).groupby("InvoiceDate", as_index=False)["TotalSales"].sum()
 sales_over_time["FormattedSales"] = sales_over_time["TotalSales"].apply(format_sales)
 
 # Create Altair line chart for sales over time
@@ -89,6 +135,8 @@ continent_coords = {
 }
 
 # Create Folium map
+import folium
+from streamlit_folium import folium_static
 m = folium.Map(location=[20, 0], zoom_start=2)
 
 # Add continent markers
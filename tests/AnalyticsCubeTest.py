@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.AnalyticsCube import AnalyticsCube
+from Scripts.EnrichmentIndex import EnrichmentIndex
+from Scripts.TransactionProcessor import TransactionProcessor
+from Scripts.ETLPipeline import ETLPipeline
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+class AnalyticsCubeTest(unittest.TestCase):
+    """Unit tests for the AnalyticsCube class."""
+
+    def setUp(self):
+        """Creates transactions over two years and three countries."""
+        rng = np.random.default_rng(3)
+        rows = 2000
+        invoices = rng.integers(0, 300, rows)
+        self.supplier_df = pd.DataFrame({"InvoiceNo": np.arange(536000, 536300),
+                                         "Fournisseur": ["F%d" % (i % 12) for i in range(300)]})
+        self.continent_mapping = pd.DataFrame({"Country": ["France", "Germany", "United Kingdom"],
+                                               "Continent": ["Europe", "Europe", "Europe"]})
+        invoice_dates = pd.Timestamp("2010-06-01") + pd.to_timedelta(rng.integers(0, 600 * 24, 300), unit="h")
+        invoice_countries = rng.choice(["France", "Germany", "United Kingdom", "Australia"], 300)
+        self.df = pd.DataFrame({
+            "InvoiceNo": (536000 + invoices).astype(str),
+            "Description": rng.choice(["LANTERN", "HEART", "MUG", "BAG", "CANDLE"], rows),
+            "Quantity": rng.integers(1, 20, rows),
+            "UnitPrice": rng.choice([0.85, 1.25, 2.55, 4.95], rows),
+            "InvoiceDate": invoice_dates[invoices],
+            "Country": invoice_countries[invoices],
+        })
+        self.df.loc[self.df.index[:40], "InvoiceNo"] = "9" + self.df["InvoiceNo"].iloc[:40]  # No supplier
+        self.processor = TransactionProcessor(self.df, self.df.iloc[:0], self.supplier_df, self.continent_mapping)
+        self.processor.calculate_total_amount()
+        self.cube = self.processor.analytics_cube()
+
+    def scan(self, country=None, continent=None, start=None, end=None):
+        """Reference: the slice scanned from the frame."""
+        mask = pd.Series(True, index=self.df.index)
+        if country is not None:
+            mask &= self.df["Country"].isin([country] if isinstance(country, str) else country)
+        if continent is not None:
+            mask &= self.df["Country"].isin(["France", "Germany", "United Kingdom"])
+        if start is not None:
+            mask &= self.df["InvoiceDate"] >= start
+        if end is not None:
+            mask &= self.df["InvoiceDate"] < end
+        return self.df[mask]
+
+    def test_queries_match_frame_scans(self):
+        """Best product, busiest hour and supplier ranking match the scans, for any slice."""
+        for filters in ({}, {"country": "France"}, {"country": ["Germany", "Australia"], "start": "2011-01-01"},
+                        {"continent": "Europe", "start": "2010-09-15", "end": "2011-03-01"}):
+            rows = self.scan(**filters)
+            self.assertEqual(self.cube.best_product(**filters),
+                             rows.groupby("Description")["TotalAmount"].sum().idxmax(), filters)
+            self.assertEqual(self.cube.busiest_hour(**filters),
+                             rows.groupby(rows["InvoiceDate"].dt.hour)["InvoiceNo"].count().idxmax(), filters)
+
+            expected = (rows.assign(Fournisseur=EnrichmentIndex(self.supplier_df, self.continent_mapping)
+                                    .suppliers_for(rows["InvoiceNo"]))
+                        .groupby("Fournisseur")["TotalAmount"].sum())
+            ranking = self.cube.supplier_ranking(**filters).set_index("Fournisseur")["TotalAmount"]
+            pd.testing.assert_series_equal(ranking.sort_index(), expected.sort_index(), check_names=False)
+            self.assertTrue(ranking.is_monotonic_decreasing)
+
+    def test_supplier_filter_and_empty_slices(self):
+        """Supplier filters restrict the slice and empty slices give no answer."""
+        ranking = self.cube.supplier_ranking(supplier=["F1", "F2"], country="France")
+        self.assertEqual(sorted(ranking["Fournisseur"]), ["F1", "F2"])
+        self.assertIsNone(self.cube.best_product(country="Spain"))
+        self.assertIsNone(self.cube.busiest_hour(start="2030-01-01"))
+        self.assertEqual(len(self.cube.supplier_ranking(end="2000-01-01")), 0)
+
+    def test_pipeline_cube_matches_final_results(self):
+        """The cube of a run answers the hard-coded France and UK 2011 slices like final_results."""
+        etl = ETLPipeline(os.path.join(DATA_DIR, "onlie retail test.xlsx"), os.path.join(DATA_DIR, "Supplier.csv"),
+                          os.path.join(DATA_DIR, "continent_mapping_full.csv"))
+        results = etl.run_pipeline()
+        cube = etl.analytics_cube()
+        self.assertIs(etl.analytics_cube(), cube)
+        self.assertEqual(cube.best_product(country="France"), results["best_product_in_france"])
+        self.assertEqual(cube.busiest_hour(), results["busiest_transaction_hour"])
+        pd.testing.assert_frame_equal(cube.supplier_ranking().sort_values("Fournisseur").reset_index(drop=True),
+                                      results["supplier_sales"].sort_values("Fournisseur").reset_index(drop=True))
+        self.assertEqual(len(cube.supplier_ranking(country="United Kingdom", start="2011-01-01", end="2012-01-01")),
+                         len(results["uk_2011_supplier_sales"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
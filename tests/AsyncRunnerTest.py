@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.AsyncRunner import AsyncRunner
+
+
+class AsyncRunnerTest(unittest.TestCase):
+    """Unit tests for the AsyncRunner class."""
+
+    def test_independent_stages_overlap(self):
+        """Stages without dependencies between them run at the same time; results flow along the edges."""
+        def wait(value):
+            def stage(*args):
+                time.sleep(0.2)
+                return value + sum(args)
+            return stage
+
+        runner = AsyncRunner(max_workers=3)
+        runner.add("read_a", wait(1))
+        runner.add("read_b", wait(2))
+        runner.add("combine", lambda a, b: a * 10 + b, "read_a", "read_b")
+        runner.add("write", wait(100), "combine")
+        results = runner.run()
+
+        self.assertEqual(results["combine"], 12)
+        self.assertEqual(results["write"], 112)
+        report = runner.report()
+        self.assertLess(report["wall_s"], 0.55)  # 0.8 s of stages
+        self.assertEqual(report["critical_path"][1:], ["combine", "write"])
+        self.assertIn(report["critical_path"][0], ("read_a", "read_b"))
+        self.assertGreater(report["busy_s"], report["critical_path_s"])
+
+    def test_declaration_errors_and_failures(self):
+        """Undeclared dependencies are rejected and a failing stage raises from run."""
+        runner = AsyncRunner()
+        with self.assertRaises(ValueError):
+            runner.add("clean", lambda raw: raw, "load")
+        runner.add("load", lambda: 1 / 0)
+        runner.add("clean", lambda raw: raw, "load")
+        with self.assertRaises(ZeroDivisionError):
+            runner.run()
+
+    def test_prefetch_is_bounded(self):
+        """The reader never gets more than the queue capacity ahead, and stops when the consumer does."""
+        produced = []
+
+        def chunks():
+            for i in range(20):
+                produced.append(i)
+                yield i
+
+        consumed = []
+        for item in AsyncRunner.prefetch(chunks(), maxsize=2):
+            time.sleep(0.01)
+            self.assertLessEqual(len(produced) - len(consumed), 4)  # queue + one put pending + current
+            consumed.append(item)
+            if item == 9:
+                break
+        self.assertEqual(consumed, list(range(10)))
+        self.assertLess(len(produced), 20)
+        self.assertEqual([thread for thread in threading.enumerate() if thread.name == "prefetch"], [])
+
+        def failing():
+            yield 1
+            raise OSError("disk")
+        with self.assertRaises(OSError):
+            list(AsyncRunner.prefetch(failing()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.DashboardViews import DashboardViews
+from Scripts.ETLPipeline import ETLPipeline
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+class DashboardViewsTest(unittest.TestCase):
+    """Unit tests for the DashboardViews class."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Builds the semi-cleaned rows of the test workbook."""
+        etl = ETLPipeline(os.path.join(DATA_DIR, "onlie retail test.xlsx"),
+                          os.path.join(DATA_DIR, "Supplier.csv"),
+                          os.path.join(DATA_DIR, "continent_mapping_full.csv"))
+        cls.semi_cleaned = etl._semi_cleaned_frame()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_views_match_row_level_aggregates(self):
+        """The views hold what the dashboard used to compute from the rows."""
+        views = DashboardViews.build(self.semi_cleaned, top_n=10).views
+        rows = self.semi_cleaned[self.semi_cleaned["Quantity"] > 0]
+        sales = rows["Quantity"] * rows["UnitPrice"]
+
+        continent_sales = views["continent_sales"].set_index("Continent")["TotalSales"]
+        pd.testing.assert_series_equal(continent_sales, sales.groupby(rows["Continent"]).sum(),
+                                       check_names=False)
+        self.assertAlmostEqual(views["monthly_sales"]["TotalSales"].sum(), sales.sum())
+        self.assertNotIn("Unknown", set(continent_sales.index))
+
+        # Every month of the range for every continent, empty months at 0 as with the monthly resample
+        monthly = views["monthly_sales"][views["monthly_sales"]["Continent"] == "Europe"].set_index("InvoiceDate")
+        dated = rows[rows["Continent"] == "Europe"].assign(TotalSales=sales)
+        expected = dated.resample("ME", on="InvoiceDate")["TotalSales"].sum()
+        self.assertEqual(len(views["monthly_sales"]), len(monthly) * continent_sales.size)
+        pd.testing.assert_series_equal(monthly["TotalSales"].loc[expected.index], expected, check_names=False,
+                                       check_freq=False)
+        self.assertAlmostEqual(views["country_sales"]["TotalSales"].sum(), sales.sum())
+
+        top = views["top_products"]
+        overall = top[top["Continent"] == DashboardViews.ALL]
+        expected = sales.groupby(rows["Description"].str.strip().str.upper()).sum().nlargest(10)
+        self.assertEqual(overall["Description"].tolist(), expected.index.tolist())
+
+        # Every product of every continent, so any selection of continents is ranked exactly
+        products = views["product_sales"]
+        self.assertGreater(len(products), len(top[top["Continent"] != DashboardViews.ALL]))
+        europe = rows["Continent"] == "Europe"
+        expected = sales[europe].groupby(rows.loc[europe, "Description"].str.strip().str.upper()).sum()
+        europe_products = products[products["Continent"] == "Europe"]
+        europe_products = europe_products.groupby(europe_products["Description"].astype(str))["TotalSales"].sum()
+        pd.testing.assert_series_equal(europe_products.sort_index(), expected.sort_index(), check_names=False)
+
+    def test_save_and_load_keep_the_version(self):
+        """Saved views are read back with their version, which follows the rows."""
+        path = os.path.join(self.tmp.name, "views")
+        views = DashboardViews.build(self.semi_cleaned)
+        views.save(path)
+        self.assertEqual(DashboardViews.read_version(path), views.version)
+        loaded = DashboardViews.load(path)
+        for name in DashboardViews.VIEWS:
+            pd.testing.assert_frame_equal(loaded.views[name], views.views[name])
+
+        self.assertNotEqual(DashboardViews.build(self.semi_cleaned.iloc[1:]).version, views.version)
+        self.assertIsNone(DashboardViews.read_version(os.path.join(self.tmp.name, "missing")))
+
+    def test_dataset_continents_are_decoded(self):
+        """Continents come from the partition keys: decoded names, without the rows lacking a continent."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        path = os.path.join(self.tmp.name, "semi_cleaned")
+        table = pa.table({"Quantity": [1, 2, 3], "Continent": ["North America", None, "Europe"]})
+        ds.write_dataset(table, path, format="parquet",
+                         partitioning=ds.partitioning(table.select(["Continent"]).schema, flavor="hive"))
+        self.assertEqual(DashboardViews.dataset_continents(path), ["Europe", "North America"])
+        self.assertEqual(DashboardViews.dataset_continents(os.path.join(self.tmp.name, "missing")), [])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import warnings
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.DataCleaner import DataCleaner, SeenRows
+from Scripts.TransactionSchema import TransactionSchema
+
+class DataCleanerPlanTest(unittest.TestCase):
+    """Unit tests for the single-mask plan of DataCleaner (clean)."""
+
+    def setUp(self):
+        """Creates a dataset with a duplicate, a missing CustomerID and a cancellation."""
+        self.df = pd.DataFrame({
+            "InvoiceNo": ["536365", "536366", "C536367", "536368", "536368", "C536369"],
+            "StockCode": ["85123A", "71053", "84406B", "84029G", "84029G", "22633"],
+            "Description": ["WHITE HANGING HEART T-LIGHT HOLDER", None, None,
+                            "KNITTED UNION FLAG HOT WATER BOTTLE", "KNITTED UNION FLAG HOT WATER BOTTLE", "HAND WARMER"],
+            "Quantity": [6, 6, -2, 8, 8, -1],
+            "InvoiceDate": pd.to_datetime(["2010-12-01 08:26", "2010-12-01 08:28", "2010-12-01 08:34",
+                                           "2010-12-01 08:34", "2010-12-01 08:34", "2010-12-01 09:00"]),
+            "UnitPrice": [2.55, 3.39, 5.00, 3.39, 3.39, 1.85],
+            "CustomerID": [17850, 17850, None, 13047, 13047, 13047],
+            "Country": ["United Kingdom", "United Kingdom", "United Kingdom", "France", "France", "France"]
+        })
+
+    def step_by_step(self, df):
+        """Reference: the three cleaning steps one after the other."""
+        cleaner = DataCleaner(df.copy())
+        cleaner.remove_duplicates()
+        cleaner.handle_missing_values()
+        cleaner.filter_valid_transactions()
+        return cleaner.get_cleaned_data()
+
+    def test_clean_matches_the_steps(self):
+        """The combined mask keeps the same valid and canceled rows, raw or typed."""
+        for df in (self.df, TransactionSchema.apply(self.df)):
+            cleaner = DataCleaner(df)
+            valid_df, canceled_df = cleaner.clean()
+            expected_valid, expected_canceled = self.step_by_step(df)
+            pd.testing.assert_frame_equal(valid_df, expected_valid)
+            pd.testing.assert_frame_equal(canceled_df, expected_canceled)
+            self.assertEqual(cleaner.drop_counts, {"duplicates": 1, "missing_values": 1})
+            self.assertEqual(valid_df["Description"].tolist()[1], "Unknown")
+
+    def test_clean_does_not_modify_the_input(self):
+        """The input frame is only read."""
+        before = self.df.copy()
+        DataCleaner(self.df).clean()
+        pd.testing.assert_frame_equal(self.df, before)
+
+    def test_handle_missing_values_does_not_modify_the_input(self):
+        """The step builds a new frame, also from a slice of the caller's frame, without warnings."""
+        before = self.df.copy()
+        cleaner = DataCleaner(self.df[self.df["Quantity"] != 0])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            cleaner.handle_missing_values()
+        pd.testing.assert_frame_equal(self.df, before)
+        self.assertEqual(len(cleaner.df), len(self.df) - 1)
+        self.assertFalse(cleaner.df["Description"].isna().any())
+
+    def test_duplicated_rows_checks_hash_candidates_exactly(self):
+        """Rows sharing a hash are compared on their values."""
+        df = pd.DataFrame({"a": [1, 2, 1, 1], "b": ["x", "y", "x", "z"]})
+        np.testing.assert_array_equal(DataCleaner.duplicated_rows(df), [False, False, True, False])
+
+    def test_clean_with_seen_rows(self):
+        """Duplicates across streamed chunks are removed through SeenRows."""
+        seen = SeenRows()
+        first, _ = DataCleaner(self.df.iloc[:4]).clean(seen)
+        cleaner = DataCleaner(self.df.iloc[4:])
+        second, canceled_df = cleaner.clean(seen)
+        self.assertEqual((len(first), len(second), len(canceled_df)), (3, 0, 1))
+        self.assertEqual(cleaner.drop_counts["duplicates"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.ETLPipeline import ETLPipeline
+from Scripts.DashboardViews import DashboardViews
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+RETAIL = os.path.join(DATA_DIR, "onlie retail test.xlsx")
+SUPPLIER = os.path.join(DATA_DIR, "Supplier.csv")
+CONTINENTS = os.path.join(DATA_DIR, "continent_mapping_full.csv")
+
+
+class ETLPipelineTest(unittest.TestCase):
+    """Unit tests for the ETLPipeline execution modes."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Runs the default in-memory pipeline once as the reference."""
+        cls.expected = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS).run_pipeline()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertSameResults(self, results, expected=None, exact=False):
+        """Compares every aggregate of final_results, cleaned_data excepted (exact: without float tolerance)."""
+        expected = expected or self.expected
+        self.assertEqual(list(results), list(expected))
+        for key, value in expected.items():
+            if key == "cleaned_data":
+                continue
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(results[key].reset_index(drop=True),
+                                              value.reset_index(drop=True), check_dtype=False,
+                                              check_exact=exact)
+            else:
+                self.assertEqual(results[key], value)
+
+    def test_fused_aggregation_matches_method_by_method(self):
+        """The single-pass aggregation engine returns the same result frames."""
+        results = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, fused_aggregation=True).run_pipeline()
+        self.assertSameResults(results)
+
+    def test_typed_schema_matches_untyped_run(self):
+        """The typed frame gives exactly the aggregates of the object-typed one, with lean dtypes."""
+        results = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, typed_schema=False).run_pipeline()
+        self.assertSameResults(results, exact=True)
+        cleaned = self.expected["cleaned_data"]
+        self.assertIsInstance(cleaned["Country"].dtype, pd.CategoricalDtype)
+        self.assertEqual(cleaned["CustomerID"].dtype, pd.Int32Dtype())
+        self.assertLess(cleaned.memory_usage(deep=True).sum(), results["cleaned_data"].memory_usage(deep=True).sum())
+
+    def test_partitioned_matches_full_run(self):
+        """Cleaning and aggregating hash partitions in worker processes gives the same final_results."""
+        for key in ("CustomerID", "Country"):
+            results = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, workers=2, partition_key=key).run_pipeline()
+            self.assertSameResults(results)
+
+    def test_partitioned_does_not_save_raw_rows_as_cleaned(self):
+        """The cleaned rows stay in the workers: save_as_parquet fails instead of writing the raw rows."""
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, workers=2)
+        self.assertIsNone(etl.run_pipeline()["cleaned_data"])
+        self.assertIsNone(etl.df)
+        for writer in ("arrow", "fastparquet"):
+            with self.assertRaises(RuntimeError):
+                etl.save_as_parquet(os.path.join(self.tmp.name, "processed.parquet"), writer=writer)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "processed.parquet")))
+
+        # The semi-cleaned dataset comes from the raw rows, and the pipeline can run again
+        path = os.path.join(self.tmp.name, "semi_cleaned")
+        etl.save_semi_cleaned_parquet(path)
+        self.assertEqual(ds.dataset(path, format="parquet", partitioning="hive").count_rows(),
+                         len(etl._semi_cleaned_frame()))
+        self.assertSameResults(etl.run_pipeline())
+
+    def test_streaming_matches_full_run(self):
+        """Chunks smaller than the dataset give the same final_results."""
+        results = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, chunksize=37).run_pipeline()
+        self.assertSameResults(results)
+        self.assertIsNone(results["cleaned_data"])
+
+    def test_streaming_from_cache_writes_cleaned_data(self):
+        """Streaming from the ingest cache appends the cleaned chunks to a Parquet file."""
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        output = os.path.join(self.tmp.name, "cleaned.parquet")
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, cache_dir=cache_dir, chunksize=50)
+        results = etl.run_pipeline(cleaned_output_path=output)
+        self.assertSameResults(results)
+        self.assertEqual(len(pd.read_parquet(output)), len(self.expected["cleaned_data"]))
+
+    def test_streaming_sketches(self):
+        """Sketches add approximate statistics to the exact ones and are kept with the incremental state."""
+        results = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, chunksize=37, sketches={}).run_pipeline()
+        cleaned = self.expected["cleaned_data"]
+        self.assertEqual(results["approx_best_product_in_france"], self.expected["best_product_in_france"])
+        self.assertEqual(results["top_products"]["Description"].iloc[0],
+                         cleaned.groupby("Description", observed=True)["TotalAmount"].sum().idxmax())
+        self.assertAlmostEqual(results["distinct_customers"], cleaned["CustomerID"].nunique(), delta=2)
+        self.assertAlmostEqual(results["distinct_invoices"], cleaned["InvoiceNo"].nunique(), delta=2)
+
+        state_dir = os.path.join(self.tmp.name, "state")
+        incremental = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, state_dir=state_dir, sketches={}).run_pipeline()
+        self.assertEqual(incremental["distinct_customers"], results["distinct_customers"])
+        self.assertTrue(os.path.exists(os.path.join(state_dir, "sketches.npz")))
+
+    def test_out_of_core_matches_full_run(self):
+        """Spilling the rows to hash buckets and reducing them one by one gives the same final_results."""
+        output = os.path.join(self.tmp.name, "cleaned.parquet")
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, engine="out_of_core", chunksize=40, spill_buckets=7,
+                          spill_dir=self.tmp.name)
+        self.assertIsNone(etl.df)
+        results = etl.run_pipeline(cleaned_output_path=output)
+        self.assertSameResults(results)
+        self.assertEqual(len(pd.read_parquet(output)), len(self.expected["cleaned_data"]))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["cleaned.parquet"])  # Buckets removed
+
+        with self.assertRaises(RuntimeError):
+            ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, engine="spark")
+
+    def test_run_async_matches_run_pipeline(self):
+        """The concurrent stage DAG gives the same final_results and writes every output."""
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, defer_load=True)
+        self.assertIsNone(etl.raw_df)
+        paths = {name: os.path.join(self.tmp.name, name)
+                 for name in ("parquet_path", "semi_cleaned_path", "views_path", "json_path")}
+        results = etl.run_async(**paths)
+        self.assertSameResults(results)
+        pd.testing.assert_frame_equal(results["cleaned_data"],
+                                      ETLPipeline(RETAIL, SUPPLIER, CONTINENTS).run_pipeline()["cleaned_data"])
+        self.assertTrue(all(os.path.exists(path) for path in paths.values()))
+
+        report = etl.run_report
+        self.assertEqual(report["critical_path"][0][:5], "read_")
+        self.assertEqual(len(report["stages"]), 16)
+
+    def test_incremental_matches_full_run(self):
+        """A history run followed by a delta run gives the same aggregates as a full recompute."""
+        raw = pd.read_excel(RETAIL)
+        cut = raw["InvoiceDate"].sort_values().iloc[len(raw) // 2]
+        history = os.path.join(self.tmp.name, "history.xlsx")
+        raw[raw["InvoiceDate"] <= cut].to_excel(history, index=False)
+
+        state_dir = os.path.join(self.tmp.name, "state")
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        first = ETLPipeline(history, SUPPLIER, CONTINENTS, cache_dir=cache_dir, state_dir=state_dir).run_pipeline()
+        self.assertSameResults(first, ETLPipeline(history, SUPPLIER, CONTINENTS).run_pipeline())
+
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, cache_dir=cache_dir, state_dir=state_dir)
+        results = etl.run_pipeline()
+        self.assertSameResults(results)
+        self.assertTrue((etl.raw_df["InvoiceDate"] >= cut).all())
+
+        # Nothing new: the stored state is returned unchanged
+        again = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, state_dir=state_dir).run_pipeline()
+        self.assertSameResults(again)
+        self.assertEqual(len(again["cleaned_data"]), 0)
+
+    def test_incremental_multi_file_reads_through_a_cache(self):
+        """Without cache_dir the incremental mode caches the drops, and a new drop only adds its rows."""
+        raw = pd.read_excel(RETAIL)
+        cut = raw["InvoiceDate"].sort_values().iloc[len(raw) // 2]
+        raw[raw["InvoiceDate"] <= cut].to_excel(os.path.join(self.tmp.name, "drop-1.xlsx"), index=False)
+        pattern = os.path.join(self.tmp.name, "drop-*.xlsx")
+
+        state_dir = os.path.join(self.tmp.name, "state")
+        ETLPipeline(pattern, SUPPLIER, CONTINENTS, state_dir=state_dir, ingest_workers=1).run_pipeline()
+        self.assertTrue(os.path.isdir(state_dir + ".cache"))
+
+        raw[raw["InvoiceDate"] > cut].to_excel(os.path.join(self.tmp.name, "drop-2.xlsx"), index=False)
+        etl = ETLPipeline(pattern, SUPPLIER, CONTINENTS, state_dir=state_dir, ingest_workers=1)
+        self.assertSameResults(etl.run_pipeline())
+        self.assertTrue((etl.raw_df["InvoiceDate"] >= cut).all())
+        # The watermark filter is pushed down to the cached entries of the drops
+        delta_filter = [("InvoiceDate", ">=", cut)]
+        self.assertEqual(etl.cache.timestamp_filters(os.path.join(self.tmp.name, "drop-1.xlsx"), delta_filter),
+                         delta_filter)
+
+    def test_semi_cleaned_dataset_is_partitioned(self):
+        """The dashboard dataset is laid out by YearMonth/Continent and holds the semi-cleaned rows."""
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS)
+        path = os.path.join(self.tmp.name, "semi_cleaned")
+        etl.save_semi_cleaned_parquet(path)
+
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        self.assertTrue(all("/YearMonth=" in file and "/Continent=" in file for file in dataset.files))
+        self.assertTrue(pa.types.is_dictionary(dataset.schema.field("Description").type))
+
+        expected = etl._semi_cleaned_frame()
+        self.assertEqual(dataset.count_rows(), len(expected))
+        europe = dataset.to_table(columns=["Quantity"], filter=ds.field("Continent") == "Europe")
+        self.assertEqual(europe.num_rows, int((expected["Continent"] == "Europe").sum()))
+
+        # A smaller run replaces the dataset, partitions it does not cover included
+        etl.raw_df = etl.raw_df[etl.raw_df["Country"] == "France"]
+        etl.save_semi_cleaned_parquet(path)
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        self.assertEqual(dataset.count_rows(), len(etl._semi_cleaned_frame()))
+        self.assertEqual(DashboardViews.dataset_continents(path), ["Europe"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.EnrichmentIndex import EnrichmentIndex
+
+class EnrichmentIndexTest(unittest.TestCase):
+    """Unit tests for the EnrichmentIndex class."""
+
+    def setUp(self):
+        """Creates lookup tables with a duplicated invoice and a padded key."""
+        supplier_df = pd.DataFrame({
+            "InvoiceNo": ["536365", " 536366 ", "C536379", "536365"],
+            "Fournisseur": ["F200", "F453", "F131", "F999"]
+        })
+        continent_mapping = pd.DataFrame({
+            "Country": ["France", "United Kingdom", "Australia"],
+            "Continent": ["Europe", "Europe", "Oceania"]
+        })
+        self.index = EnrichmentIndex(supplier_df, continent_mapping)
+
+    def test_suppliers_for_normalizes_invoices(self):
+        """Int and padded InvoiceNo values find their supplier, unknown ones get NaN."""
+        suppliers = self.index.suppliers_for(pd.Series([536365, "536366", "C536379", "999999", None]))
+        self.assertEqual(list(suppliers[:3]), ["F200", "F453", "F131"])
+        self.assertTrue(pd.isna(suppliers[3]) and pd.isna(suppliers[4]))
+
+    def test_duplicate_keys_keep_first_row(self):
+        """A duplicated invoice in Supplier.csv does not multiply the rows."""
+        suppliers = self.index.suppliers_for(pd.Series(["536365"] * 3))
+        self.assertEqual(list(suppliers), ["F200"] * 3)
+
+    def test_continents_for(self):
+        """Countries are mapped through dense codes."""
+        continents = self.index.continents_for(pd.Series(["France", "Australia", "Atlantis", "France"]))
+        self.assertEqual(list(continents[[0, 1, 3]]), ["Europe", "Oceania", "Europe"])
+        self.assertTrue(pd.isna(continents[2]))
+        codes = self.index.continent_codes(["United Kingdom", "Atlantis"])
+        np.testing.assert_array_equal(codes, [self.index.continents.get_loc("Europe"), -1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.TransactionProcessor import TransactionProcessor
+from Scripts.FusedAggregator import FusedAggregator
+
+class FusedAggregatorTest(unittest.TestCase):
+    """Unit tests for the FusedAggregator class."""
+
+    def setUp(self):
+        """Creates random transactions spanning 2010-2011, several countries and suppliers."""
+        rng = np.random.default_rng(7)
+        n = 2000
+        invoices = rng.integers(536000, 536400, n)
+        self.df = pd.DataFrame({
+            "InvoiceNo": invoices,
+            "StockCode": rng.integers(10000, 10050, n).astype(str),
+            "Description": rng.choice(["Product A", "Product B", "Product C", "Product D"], n),
+            "Quantity": rng.integers(1, 20, n),
+            "InvoiceDate": pd.Timestamp("2010-11-01") + pd.to_timedelta(rng.integers(0, 500 * 24, n), unit="h"),
+            "UnitPrice": rng.integers(10, 1000, n) / 100,
+            "CustomerID": rng.integers(12000, 18000, n),
+            "Country": rng.choice(["United Kingdom", "France", "Germany", "Atlantis"], n, p=[0.6, 0.2, 0.15, 0.05])
+        })
+        self.canceled_df = self.df.sample(100, random_state=1).assign(
+            InvoiceNo=lambda df: "C" + df["InvoiceNo"].astype(str))
+        self.supplier_df = pd.DataFrame({
+            "InvoiceNo": [str(i) for i in range(536000, 536350)],
+            "Fournisseur": ["F%d" % (i % 37) for i in range(350)]
+        })
+        self.continent_mapping = pd.DataFrame({
+            "Country": ["United Kingdom", "France", "Germany"],
+            "Continent": ["Europe", "Europe", "Europe"]
+        })
+
+    def method_by_method(self):
+        processor = TransactionProcessor(self.df.copy(), self.canceled_df.copy(),
+                                         self.supplier_df.copy(), self.continent_mapping)
+        processor.calculate_total_amount()
+        country_sales = processor.group_by_country()
+        monthly_stats = processor.aggregate_monthly_data()
+        best_product, busiest_hour = processor.calcul_stat_data()
+        supplier_sales, uk_2011_sales = processor.aggregate_supplier_data()
+        continent_sales, most_cancellations = processor.aggregate_world_data()
+        return {
+            "country_sales": country_sales,
+            "monthly_stats": monthly_stats,
+            "best_product_in_france": best_product,
+            "busiest_transaction_hour": busiest_hour,
+            "supplier_sales": supplier_sales,
+            "uk_2011_supplier_sales": uk_2011_sales,
+            "continent_sales": continent_sales,
+            "continent_with_most_cancellations": most_cancellations
+        }
+
+    def test_same_results_as_methods(self):
+        """Every aggregate matches the method-by-method path, including the UK 2011 ranking."""
+        expected = self.method_by_method()
+        results = FusedAggregator(self.df.copy(), self.canceled_df, self.supplier_df, self.continent_mapping).run()
+        self.assertGreater(len(expected["uk_2011_supplier_sales"]), 0)
+        for key, value in expected.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(results[key], value, check_dtype=False)
+            else:
+                self.assertEqual(results[key], value)
+
+    def test_chunks_merge_to_full_result(self):
+        """Partial aggregates of two halves merge into the result of the whole frame."""
+        half = len(self.df) // 2
+        first = FusedAggregator(self.df.iloc[:half], self.canceled_df.iloc[:50],
+                                self.supplier_df, self.continent_mapping).partial_aggregates()
+        second = FusedAggregator(self.df.iloc[half:], self.canceled_df.iloc[50:],
+                                 self.supplier_df, self.continent_mapping).partial_aggregates()
+        merged = first.merge(second).to_results()
+        full = FusedAggregator(self.df, self.canceled_df, self.supplier_df, self.continent_mapping).run()
+        for key, value in full.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(merged[key], value)
+            else:
+                self.assertEqual(merged[key], value)
+
+
+if __name__ == "__main__":
+    unittest.main()
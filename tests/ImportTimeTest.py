@@ -0,0 +1,82 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def run_python(code: str, cwd: str) -> str:
+    """Runs code in a fresh interpreter with the repository importable, and returns its output."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True,
+                          check=True).stdout
+
+
+class ImportTimeTest(unittest.TestCase):
+    """Regression checks of the import cost and side effects of the pipeline package."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cli_import_is_light(self):
+        """The CLI module imports no data library and stays within a small time budget."""
+        output = run_python(
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import Scripts.__main__\n"
+            "print(time.perf_counter() - start)\n"
+            "print(sorted(m for m in ('pandas', 'numpy', 'pyarrow') if m in sys.modules))\n", self.tmp.name)
+        seconds, heavy = output.splitlines()
+        self.assertEqual(heavy, "[]")
+        self.assertLess(float(seconds), 0.25)
+
+        help_text = subprocess.run([sys.executable, "-m", "Scripts", "--help"], cwd=ROOT, capture_output=True,
+                                   text=True, check=True).stdout
+        self.assertIn("--async", help_text)
+
+    def test_pipeline_and_dashboard_imports_defer_parquet(self):
+        """The pipeline and the modules of the dashboard's cold path add little on top of pandas."""
+        for modules in ("Scripts.ETLPipeline", "Scripts.DashboardViews, Scripts.LoggingConfig"):
+            output = run_python(
+                "import sys, time\n"
+                "import pandas\n"  # Loads pyarrow and pyarrow.compute itself
+                "start = time.perf_counter()\n"
+                "import %s\n"
+                "print(time.perf_counter() - start)\n"
+                "print(sorted(m for m in ('pyarrow.parquet', 'pyarrow.dataset', 'Scripts.QueryPlan')\n"
+                "             if m in sys.modules))\n" % modules, self.tmp.name)
+            seconds, deferred = output.splitlines()
+            self.assertEqual(deferred, "[]", modules)
+            self.assertLess(float(seconds), 0.1, modules)
+
+    def test_pipeline_import_has_no_side_effects(self):
+        """Importing the pipeline writes no log file and leaves the optional engines unloaded."""
+        output = run_python(
+            "import sys\n"
+            "import Scripts.ETLPipeline\n"
+            "optional = ('unittest', 'asyncio', 'psutil', 'pyarrow.parquet', 'pyarrow.dataset',\n"
+            "            'concurrent.futures.process', 'Scripts.QueryPlan', 'Scripts.AsyncRunner',\n"
+            "            'Scripts.PartitionExecutor', 'Scripts.OutOfCoreExecutor', 'Scripts.ResultCache',\n"
+            "            'Scripts.TransactionWriter')\n"
+            "print(sorted(m for m in optional if m in sys.modules))\n", self.tmp.name)
+        self.assertEqual(output.strip(), "[]")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+        # Logs are written once configured, each module to its own file
+        run_python(
+            "import logging\n"
+            "from Scripts.LoggingConfig import configure_logging\n"
+            "configure_logging('logs')\n"
+            "logging.getLogger('Scripts.DataCleaner').info('cleaned')\n"
+            "logging.getLogger('Scripts.QueryPlan').info('scanned')\n", self.tmp.name)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp.name, "logs"))),
+                         ["data_cleaner.log", "etl_pipeline.log"])
+
+
+if __name__ == "__main__":
+    unittest.main()
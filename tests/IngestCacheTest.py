@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.IngestCache import IngestCache
+
+class IngestCacheTest(unittest.TestCase):
+    """Unit tests for the IngestCache class."""
+
+    def setUp(self):
+        """Creates a small source CSV and an empty cache directory."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        self.source = os.path.join(self.tmp.name, "Supplier.csv")
+        pd.DataFrame({
+            "InvoiceNo": ["536365", "C536379", "536366"],
+            "Fournisseur": ["F200", "F453", "F131"]
+        }).to_csv(self.source, index=False)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_round_trip(self):
+        """The cached frame has the same content as the parsed source."""
+        cache = IngestCache(self.cache_dir)
+        cached = cache.load(self.source)
+        pd.testing.assert_frame_equal(cached, pd.read_csv(self.source))
+        self.assertTrue(os.path.exists(cache.entry_path(self.source)))
+
+    def test_second_load_skips_parser(self):
+        """An unchanged source is served from the Parquet entry."""
+        IngestCache(self.cache_dir).load(self.source)
+        cache = IngestCache(self.cache_dir)
+        cache.read_source = lambda path: self.fail("source parsed again")
+        self.assertEqual(len(cache.load(self.source)), 3)
+
+    def test_stale_entry_is_detected(self):
+        """Changing the source invalidates the entry and the next load rebuilds it."""
+        cache = IngestCache(self.cache_dir)
+        cache.load(self.source)
+        self.assertFalse(cache.is_stale(self.source))
+
+        with open(self.source, "a") as file:
+            file.write("536367,F763\n")
+        self.assertTrue(cache.is_stale(self.source))
+        self.assertEqual(len(cache.load(self.source)), 4)
+        self.assertFalse(cache.is_stale(self.source))
+
+    def test_force_rebuild(self):
+        """rebuild=True parses the source again even when the entry is fresh."""
+        IngestCache(self.cache_dir).load(self.source)
+        calls = []
+        cache = IngestCache(self.cache_dir, rebuild=True)
+        cache.read_source = lambda path: calls.append(path) or pd.read_csv(path)
+        cache.load(self.source)
+        cache.load(self.source)
+        self.assertEqual(calls, [self.source])
+
+    def test_mixed_object_columns_are_stored_as_strings(self):
+        """Columns mixing ints and strings, as read from Excel, are cached as strings."""
+        df = pd.DataFrame({"InvoiceNo": [536365, "C536379", None]})
+        converted = IngestCache.to_arrow_types(df)
+        self.assertEqual(converted["InvoiceNo"].tolist()[:2], ["536365", "C536379"])
+        self.assertTrue(pd.isna(converted["InvoiceNo"].iloc[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
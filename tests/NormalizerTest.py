@@ -0,0 +1,101 @@
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.Normalizer import Normalizer
+from Scripts.TransactionSchema import TransactionSchema
+from Scripts.ETLPipeline import ETLPipeline
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+RETAIL = os.path.join(DATA_DIR, "onlie retail test.xlsx")
+SUPPLIER = os.path.join(DATA_DIR, "Supplier.csv")
+CONTINENTS = os.path.join(DATA_DIR, "continent_mapping_full.csv")
+
+
+class NormalizerTest(unittest.TestCase):
+    """Unit tests for the Normalizer stage."""
+
+    def setUp(self):
+        """Creates raw transactions with unnormalized text and a missing date."""
+        self.df = pd.DataFrame({
+            "InvoiceNo": ["536365", "536365", "536366", "536367"],
+            "StockCode": ["85123a", " 85123A", "71053", None],
+            "Description": [" white heart", "WHITE HEART ", None, "Lantern"],
+            "InvoiceDate": ["2010-12-01 08:26:00", "2011-01-31 23:59:00", None, "2011-05-03 00:00:00"],
+        })
+
+    def test_normalize_text_once_per_value(self):
+        """Values differing by case or spaces merge, missing values stay missing, categoricals stay categoricals."""
+        expected = ["WHITE HEART", "WHITE HEART", None, "LANTERN"]
+        normalized = Normalizer.normalize_text(self.df["Description"])
+        self.assertEqual(normalized.where(normalized.notna(), None).tolist(), expected)
+
+        typed = TransactionSchema.apply(self.df)
+        normalized = Normalizer.normalize_text(typed["Description"])
+        self.assertIsInstance(normalized.dtype, pd.CategoricalDtype)
+        self.assertEqual(list(normalized.cat.categories), ["LANTERN", "WHITE HEART"])
+        self.assertEqual(normalized.astype(object).where(normalized.notna(), None).tolist(), expected)
+        self.assertIs(Normalizer.normalize_text(normalized), normalized)  # Already normalized
+
+    def test_date_parts_match_the_datetime_accessors(self):
+        """Year/Month/Hour columns and the helpers agree with pandas, with or without the columns."""
+        normalized = Normalizer.apply(self.df)
+        dates = pd.to_datetime(self.df["InvoiceDate"])
+        self.assertEqual(normalized["Year"].dtype, pd.Int16Dtype())
+        self.assertEqual(normalized["Hour"].tolist()[:2], [8, 23])
+        self.assertTrue(normalized["Month"].isna().iloc[2])
+        self.assertEqual(normalized["StockCode"].tolist()[:3], ["85123A", "85123A", "71053"])
+
+        for frame in (normalized, self.df):
+            pd.testing.assert_series_equal(Normalizer.year_month(frame), dates.dt.to_period("M"),
+                                           check_names=False)
+            self.assertEqual(Normalizer.month_labels(frame).tolist()[:2], ["2010-12", "2011-01"])
+            self.assertEqual(Normalizer.hours(frame).tolist(), [8, 23, Normalizer.MISSING, 0])
+        np.testing.assert_array_equal(Normalizer.epoch_ns(normalized)[[0, 1, 3]],
+                                      dates.dropna().astype("int64").to_numpy())
+
+        # Without missing dates the columns are plain narrow integers
+        dated = Normalizer.apply(self.df.dropna(subset=["InvoiceDate"]))
+        self.assertEqual([dated[name].dtype for name in Normalizer.DATE_PARTS], [np.int16, np.int8, np.int8])
+        pd.testing.assert_frame_equal(Normalizer.apply(dated), dated)
+
+    def test_pipeline_reuses_the_normalized_columns(self):
+        """Normalized runs keep the date parts on the cleaned rows and agree with the fused engine."""
+        results = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS).run_pipeline()
+        fused = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, fused_aggregation=True).run_pipeline()
+        raw = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, normalize=False).run_pipeline()
+        self.assertTrue({"Year", "Month", "Hour"} <= set(results["cleaned_data"].columns))
+        self.assertFalse({"Year", "Month"} & set(raw["cleaned_data"].columns))
+        for key in ("monthly_stats", "country_sales"):
+            pd.testing.assert_frame_equal(results[key], fused[key], check_dtype=False)
+            pd.testing.assert_frame_equal(results[key], raw[key], check_dtype=False)
+        self.assertEqual(results["busiest_transaction_hour"], raw["busiest_transaction_hour"])
+
+        # By default only date columns are added: the cleaned rows are those of the run without the stage
+        pd.testing.assert_frame_equal(results["cleaned_data"][raw["cleaned_data"].columns], raw["cleaned_data"],
+                                      check_dtype=False)
+
+    def test_text_normalization_is_opt_in_and_merges_duplicates(self):
+        """With normalize_text, rows differing only by the case or spaces of their text become duplicates."""
+        raw = pd.read_excel(RETAIL)
+        row = raw[raw["CustomerID"].notna() & (raw["Quantity"] > 0)].iloc[[0]].copy()
+        row["Description"] = " " + row["Description"].str.lower()
+        row["StockCode"] = row["StockCode"].astype(str).str.lower()
+        with tempfile.TemporaryDirectory() as tmp:
+            retail = os.path.join(tmp, "retail.csv")
+            pd.concat([raw, row], ignore_index=True).to_csv(retail, index=False)
+
+            default = ETLPipeline(retail, SUPPLIER, CONTINENTS).run_pipeline()["cleaned_data"]
+            merged = ETLPipeline(retail, SUPPLIER, CONTINENTS, normalize_text=True).run_pipeline()["cleaned_data"]
+        self.assertEqual(len(default), len(merged) + 1)
+        self.assertIn(row["Description"].iloc[0], set(default["Description"]))
+        self.assertTrue((merged["Description"] == merged["Description"].astype(str).str.strip().str.upper()).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
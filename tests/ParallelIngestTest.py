@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.ParallelIngest import ParallelIngest
+from Scripts.IngestCache import IngestCache
+from Scripts.ETLPipeline import ETLPipeline
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+class ParallelIngestTest(unittest.TestCase):
+    """Unit tests for the ParallelIngest class."""
+
+    def setUp(self):
+        """Splits the test workbook into monthly-like CSV drops."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.raw = pd.read_excel(os.path.join(DATA_DIR, "onlie retail test.xlsx"))
+        self.paths = []
+        for i, start in enumerate(range(0, len(self.raw), 100)):
+            path = os.path.join(self.tmp.name, "drop_%02d.csv" % i)
+            self.raw.iloc[start:start + 100].to_csv(path, index=False)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_glob_is_concatenated_in_stable_order(self):
+        """Files matched by a glob are parsed in parallel and concatenated in sorted order."""
+        ingest = ParallelIngest(os.path.join(self.tmp.name, "drop_*.csv"), max_workers=2)
+        df = ingest.run()
+        self.assertEqual(len(df), len(self.raw))
+        self.assertEqual(df["StockCode"].astype(str).tolist(), self.raw["StockCode"].astype(str).tolist())
+        self.assertEqual(sorted(ingest.report()["timings"]), sorted(self.paths))
+
+    def test_failures_are_isolated(self):
+        """A broken file is reported and skipped, or fails the run with on_error='raise'."""
+        broken = os.path.join(self.tmp.name, "drop_99.xlsx")
+        with open(broken, "wb") as file:
+            file.write(b"not a workbook")
+
+        ingest = ParallelIngest(self.paths + [broken], max_workers=2, on_error="skip")
+        self.assertEqual(len(ingest.run()), len(self.raw))
+        self.assertEqual(list(ingest.report()["failures"]), [broken])
+
+        with self.assertRaises(RuntimeError):
+            ParallelIngest(self.paths + [broken], max_workers=2).run()
+
+    def test_shards_are_reused_from_the_cache(self):
+        """With an IngestCache the shards persist and a second run parses nothing."""
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        ParallelIngest(self.paths, cache=IngestCache(cache_dir)).run()
+        ingest = ParallelIngest(self.paths, cache=IngestCache(cache_dir))
+        ingest.run()
+        self.assertEqual(set(ingest.report()["timings"].values()), {0.0})
+
+    def test_pipeline_accepts_a_list_of_files(self):
+        """ETLPipeline gives the same aggregates for the split drops as for the workbook."""
+        supplier = os.path.join(DATA_DIR, "Supplier.csv")
+        continents = os.path.join(DATA_DIR, "continent_mapping_full.csv")
+        expected = ETLPipeline(os.path.join(DATA_DIR, "onlie retail test.xlsx"), supplier, continents).run_pipeline()
+        results = ETLPipeline(self.paths, supplier, continents, ingest_workers=2).run_pipeline()
+        pd.testing.assert_frame_equal(results["country_sales"], expected["country_sales"])
+        self.assertEqual(results["best_product_in_france"], expected["best_product_in_france"])
+
+
+if __name__ == "__main__":
+    unittest.main()
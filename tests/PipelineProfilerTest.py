@@ -0,0 +1,86 @@
+import unittest
+import json
+import os
+import pstats
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.PipelineProfiler import PipelineProfiler
+from Scripts.DataCleaner import DataCleaner
+from Scripts.ETLPipeline import ETLPipeline
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+
+
+class PipelineProfilerTest(unittest.TestCase):
+    """Unit tests for the PipelineProfiler class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_nested_stages_accumulate(self):
+        """Repeated stages add up and an outer stage sees the allocations of its inner stages."""
+        profiler = PipelineProfiler()
+        with profiler.stage("outer", rows_in=10) as record:
+            for _ in range(3):
+                with profiler.stage("inner", rows_in=5):
+                    buffer = bytearray(1_000_000)
+                    del buffer
+            record["rows_out"] = 7
+
+        stages = {stage["name"]: stage for stage in profiler.report()["stages"]}
+        self.assertEqual(stages["inner"]["calls"], 3)
+        self.assertEqual(stages["inner"]["rows_in"], 15)
+        self.assertEqual((stages["outer"]["rows_in"], stages["outer"]["rows_out"]), (10, 7))
+        self.assertGreaterEqual(stages["inner"]["tracemalloc_peak_bytes"], 1_000_000)
+        self.assertGreaterEqual(stages["outer"]["tracemalloc_peak_bytes"], 1_000_000)
+        self.assertGreaterEqual(stages["outer"]["wall_s"], stages["inner"]["wall_s"])
+
+    def test_instrument_records_rows(self):
+        """Instrumented DataCleaner steps report the rows they received and kept."""
+        profiler = PipelineProfiler(trace_memory=False)
+        df = pd.DataFrame({"InvoiceNo": ["1", "1", "2"], "Quantity": [1, 1, 2]})
+        cleaner = profiler.instrument(DataCleaner(df))
+        cleaner.remove_duplicates()
+
+        stage = profiler.report()["stages"][0]
+        self.assertEqual((stage["name"], stage["rows_in"], stage["rows_out"]), ("remove_duplicates", 3, 2))
+        self.assertIsNone(stage["tracemalloc_peak_bytes"])
+
+    def test_clean_records_each_rule(self):
+        """The combined clean step reports the time and rows kept of each of its rules."""
+        profiler = PipelineProfiler(trace_memory=False)
+        df = pd.DataFrame({"InvoiceNo": ["1", "1", "C2", "3"], "CustomerID": [1.0, 1.0, 2.0, None],
+                           "Quantity": [1, 1, -2, 3], "Description": ["a", "a", "b", None]})
+        profiler.instrument(DataCleaner(df)).clean()
+
+        stages = {stage["name"]: stage for stage in profiler.report()["stages"]}
+        rows = [(stages["clean." + rule]["rows_in"], stages["clean." + rule]["rows_out"])
+                for rule in ("duplicates", "missing_values", "cancellations")]
+        self.assertEqual(rows, [(4, 3), (3, 2), (2, 1)])
+        self.assertEqual((stages["clean"]["rows_in"], stages["clean"]["rows_out"]), (4, 1))
+        self.assertGreaterEqual(stages["clean"]["wall_s"], stages["clean.duplicates"]["wall_s"])
+
+    def test_pipeline_writes_report_and_profile(self):
+        """A profiled run writes the JSON report and the cProfile dump of the chosen stage."""
+        report_path = os.path.join(self.tmp.name, "report.json")
+        profile_path = os.path.join(self.tmp.name, "supplier.prof")
+        profiler = PipelineProfiler(report_path, profile_stage="aggregate_supplier_data", profile_path=profile_path)
+        ETLPipeline(os.path.join(DATA_DIR, "onlie retail test.xlsx"), os.path.join(DATA_DIR, "Supplier.csv"),
+                    os.path.join(DATA_DIR, "continent_mapping_full.csv"), profiler=profiler).run_pipeline()
+
+        with open(report_path) as file:
+            names = [stage["name"] for stage in json.load(file)["stages"]]
+        for name in ("load", "clean", "aggregate_supplier_data", "run_pipeline"):
+            self.assertIn(name, names)
+        self.assertGreater(pstats.Stats(profile_path).total_calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.QueryPlan import QueryPlan
+from Scripts.ETLPipeline import ETLPipeline
+from Scripts.IngestCache import IngestCache
+from Scripts.TransactionProcessor import TransactionProcessor
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+RETAIL = os.path.join(DATA_DIR, "onlie retail test.xlsx")
+SUPPLIER = os.path.join(DATA_DIR, "Supplier.csv")
+CONTINENTS = os.path.join(DATA_DIR, "continent_mapping_full.csv")
+
+
+class QueryPlanTest(unittest.TestCase):
+    """Unit tests for the QueryPlan class."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Runs the pipeline once; its cleaned rows are the Parquet source of the plans."""
+        cls.etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS)
+        cls.cleaned = cls.etl.run_pipeline()["cleaned_data"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cleaned.parquet")
+        pq.write_table(IngestCache.arrow_table(self.cleaned.copy()), self.path, row_group_size=20)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def supplier_slice(self, source, start, end):
+        """UK supplier ranking between two dates."""
+        return (QueryPlan.scan(source)
+                .join(self.etl.supplier_df, on="InvoiceNo")
+                .filter("Country", "==", "United Kingdom")
+                .filter("InvoiceDate", ">=", start)
+                .filter("InvoiceDate", "<", end)
+                .assign("TotalAmount", lambda df: df["Quantity"].astype("float64") * df["UnitPrice"].astype("float64"),
+                        inputs=["Quantity", "UnitPrice"])
+                .group_by("Fournisseur", TotalAmount=("TotalAmount", "sum"))
+                .sort(["TotalAmount", "Fournisseur"], ascending=False))
+
+    def test_pushdown_reads_only_the_matching_row_groups_and_columns(self):
+        """A UK time slice only reads three columns of the row groups in its date range."""
+        start, end = "2010-12-01 09:00", "2010-12-01 09:30"
+        plan = self.supplier_slice(self.path, start, end)
+        self.assertIn("filters=[\"Country == 'United Kingdom'\"", plan.explain())
+        result = plan.collect()
+
+        self.assertEqual(plan.stats["columns_read"], ["InvoiceNo", "Quantity", "UnitPrice"])
+        self.assertLess(plan.stats["row_groups_read"], plan.stats["row_groups_total"])
+
+        rows = self.cleaned[(self.cleaned["Country"] == "United Kingdom") & (self.cleaned["InvoiceDate"] >= start)
+                            & (self.cleaned["InvoiceDate"] < end)].copy()
+        expected, _ = TransactionProcessor(rows, rows.iloc[:0], self.etl.supplier_df, self.etl.continent_mapping,
+                                           self.etl.enrichment).aggregate_supplier_data()
+        expected = expected.sort_values(["TotalAmount", "Fournisseur"], ascending=False).reset_index(drop=True)
+        pd.testing.assert_frame_equal(result, expected)
+
+        # The same plan over the in-memory frame gives the same rows
+        pd.testing.assert_frame_equal(self.supplier_slice(self.cleaned, start, end).collect(), result)
+
+    def test_filters_are_not_pushed_past_group_by_or_computed_columns(self):
+        """Filters on computed or aggregated columns run after the step that produces them."""
+        plan = (QueryPlan.scan(self.path)
+                .assign("Country", lambda df: df["Country"].astype(str).str.upper(), inputs=["Country"])
+                .filter("Country", "==", "FRANCE")
+                .group_by("Description", Quantity=("Quantity", "sum"))
+                .filter("Quantity", ">", 20))
+        optimized = plan.optimize()
+        self.assertEqual(optimized.scan_filters, ())
+        self.assertEqual(optimized.scan_columns, ["Description", "Quantity", "Country"])
+
+        france = self.cleaned[self.cleaned["Country"] == "France"]
+        quantities = france.groupby("Description", observed=True)["Quantity"].sum()
+        self.assertEqual(sorted(plan.collect()["Description"]), sorted(quantities[quantities > 20].index))
+
+    def test_scan_retail_reads_the_cache_entry(self):
+        """With the ingest cache, the pipeline's retail plan scans the Parquet entry."""
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, cache_dir=os.path.join(self.tmp.name, "cache"))
+        plan = etl.scan_retail().filter("Country", "in", ["France", "Australia"]).select("InvoiceNo", "Quantity")
+        result = plan.collect()
+
+        raw = pd.read_excel(RETAIL)
+        self.assertEqual(len(result), raw["Country"].isin(["France", "Australia"]).sum())
+        self.assertEqual(plan.stats["columns_read"], ["InvoiceNo", "Quantity"])
+        with self.assertRaises(ValueError):
+            plan.filter("Quantity", "~", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import os
+import sys
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.ResultCache import ResultCache
+from Scripts.ETLPipeline import ETLPipeline
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+RETAIL = os.path.join(DATA_DIR, "onlie retail test.xlsx")
+SUPPLIER = os.path.join(DATA_DIR, "Supplier.csv")
+CONTINENTS = os.path.join(DATA_DIR, "continent_mapping_full.csv")
+
+
+class ResultCacheTest(unittest.TestCase):
+    """Unit tests for the ResultCache class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.tmp.name, "results"))
+        self.source = os.path.join(self.tmp.name, "source.csv")
+        with open(self.source, "w") as file:
+            file.write("a,b\n1,2\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_memoize_until_the_input_changes(self):
+        """An output is computed once per version of its inputs; stale versions are dropped."""
+        calls = []
+        def compute():
+            calls.append(1)
+            return pd.DataFrame({"total": [len(calls)]})
+
+        fingerprint, scope = self.cache.fingerprint([self.source], ("Scripts.ResultCache",), typed=True)
+        first = self.cache.memoize(fingerprint, "totals", compute, scope)
+        pd.testing.assert_frame_equal(self.cache.memoize(fingerprint, "totals", compute, scope), first)
+        self.assertEqual(len(calls), 1)
+        self.assertNotEqual(self.cache.fingerprint([self.source], typed=False)[0], fingerprint)
+
+        with open(self.source, "a") as file:
+            file.write("3,4\n")
+        changed, same_scope = self.cache.fingerprint([self.source], ("Scripts.ResultCache",), typed=True)
+        self.assertEqual((changed != fingerprint, same_scope), (True, scope))
+        self.assertEqual(self.cache.memoize(changed, "totals", compute, scope)["total"].tolist(), [2])
+        with self.assertRaises(KeyError):
+            self.cache.get(fingerprint, "totals")
+        self.assertEqual(len(ResultCache(self.cache.cache_dir).manifest["entries"]), 1)  # Persisted
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Beyond max_bytes, the entries read or written longest ago go first."""
+        cache = ResultCache(os.path.join(self.tmp.name, "small"), max_bytes=3500)
+        for name in ("a", "b", "c"):
+            cache.put("fingerprint", name, b"x" * 1000)
+        cache.get("fingerprint", "a")
+        cache.put("fingerprint", "d", b"x" * 1000)
+
+        self.assertEqual(cache.stats["evictions"], 1)
+        with self.assertRaises(KeyError):
+            cache.get("fingerprint", "b")
+        for name in ("a", "c", "d"):
+            self.assertEqual(len(cache.get("fingerprint", name)), 1000)
+
+    def test_pipeline_results_are_served_without_loading(self):
+        """A second pipeline answers from the cache without reading the retail data."""
+        expected = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS).run_pipeline()
+        results = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, result_cache=self.cache).run_pipeline()
+        self.assertEqual(self.cache.stats, {"hits": 0, "misses": 5, "evictions": 0})
+        pd.testing.assert_frame_equal(results["cleaned_data"], expected["cleaned_data"])
+
+        etl = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, result_cache=self.cache, defer_load=True)
+        cached = etl.results("best_product_in_france", "busiest_transaction_hour", "supplier_sales")
+        self.assertIsNone(etl.raw_df)
+        self.assertEqual(cached["best_product_in_france"], expected["best_product_in_france"])
+        self.assertEqual(cached["busiest_transaction_hour"], expected["busiest_transaction_hour"])
+        pd.testing.assert_frame_equal(cached["supplier_sales"], expected["supplier_sales"])
+
+        # A warm run_pipeline still returns the same cleaned data
+        warm = ETLPipeline(RETAIL, SUPPLIER, CONTINENTS, result_cache=self.cache).run_pipeline()
+        pd.testing.assert_frame_equal(warm["cleaned_data"], expected["cleaned_data"])
+        pd.testing.assert_frame_equal(warm["monthly_stats"], expected["monthly_stats"])
+        self.assertEqual(self.cache.stats["misses"], 5)
+
+        # The key follows the code of every module shaping the outputs, the pipeline itself included
+        for name in ("Scripts.PartialAggregates", "Scripts.SketchAggregates", "Scripts.ETLPipeline"):
+            self.assertIn(name, ETLPipeline.RESULT_MODULES)
+        self.assertNotEqual(ResultCache.code_version(*ETLPipeline.RESULT_MODULES),
+                            ResultCache.code_version(*ETLPipeline.RESULT_MODULES[:-1]))
+
+    def test_mixed_hits_and_misses_on_untyped_rows(self):
+        """Methods computed after cache hits still find the derived columns, without the typed schema."""
+        retail = os.path.join(self.tmp.name, "retail.csv")  # InvoiceDate read as strings
+        pd.read_excel(RETAIL).to_csv(retail, index=False)
+        options = dict(typed_schema=False, normalize=False, result_cache=self.cache)
+        expected = ETLPipeline(retail, SUPPLIER, CONTINENTS, typed_schema=False, normalize=False).run_pipeline()
+        ETLPipeline(retail, SUPPLIER, CONTINENTS, **options).results("monthly_stats")  # Only this one cached
+
+        results = ETLPipeline(retail, SUPPLIER, CONTINENTS, **options).run_pipeline()
+        self.assertEqual(self.cache.stats["hits"], 1)
+        self.assertEqual(results["busiest_transaction_hour"], expected["busiest_transaction_hour"])
+        pd.testing.assert_frame_equal(results["monthly_stats"], expected["monthly_stats"])
+        pd.testing.assert_frame_equal(results["cleaned_data"], expected["cleaned_data"])
+
+
+if __name__ == "__main__":
+    unittest.main()
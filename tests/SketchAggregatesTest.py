@@ -0,0 +1,81 @@
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.SketchAggregates import SketchAggregates, CountMinSketch, HyperLogLog, hash_values
+
+
+class SketchAggregatesTest(unittest.TestCase):
+    """Unit tests for the SketchAggregates class and its sketches."""
+
+    def setUp(self):
+        """Creates 20000 transactions with Zipf-distributed products."""
+        rng = np.random.default_rng(1)
+        rows = 20000
+        self.df = pd.DataFrame({
+            "InvoiceNo": rng.integers(536000, 546000, rows).astype(str),
+            "Description": pd.Categorical("P" + pd.Series(rng.zipf(1.5, rows) % 500).astype(str)),
+            "CustomerID": pd.array(rng.integers(12000, 17000, rows), dtype="Int32"),
+            "Country": rng.choice(["France", "Germany", "United Kingdom"], rows),
+            "TotalAmount": rng.uniform(-2, 20, rows),
+        })
+        self.df.loc[::50, "CustomerID"] = pd.NA
+
+    def test_hyperloglog_error(self):
+        """Distinct counts stay within a few standard errors, and hashes do not depend on the dtype."""
+        for n in (10, 3000, 200000):
+            sketch = HyperLogLog(12).add(hash_values(pd.Series(np.arange(n))))
+            self.assertLess(abs(sketch.count() - n), max(1, 4 * sketch.relative_error * n))
+        np.testing.assert_array_equal(hash_values(pd.Series([1, 2], dtype="Int32")),
+                                      hash_values(pd.Series([1.0, 2.0])))
+        np.testing.assert_array_equal(hash_values(pd.Series(["a", "b"], dtype="category")),
+                                      hash_values(pd.Series(["a", "b"])))
+
+    def test_count_min_bounds_and_merge(self):
+        """Estimates are within epsilon of the total, and merged chunk sketches equal one sketch."""
+        exact = self.df.groupby("Description", observed=True)["TotalAmount"].sum()
+        whole = CountMinSketch(epsilon=0.01).update(self.df["Description"], self.df["TotalAmount"])
+        merged = CountMinSketch(epsilon=0.01).update(self.df["Description"][:7000], self.df["TotalAmount"][:7000])
+        merged.merge(CountMinSketch(epsilon=0.01).update(self.df["Description"][7000:],
+                                                         self.df["TotalAmount"][7000:]))
+        np.testing.assert_allclose(merged.table, whole.table)
+
+        errors = (whole.estimate(exact.index.astype(str)).to_numpy() - exact.to_numpy())
+        self.assertLessEqual(np.abs(errors).max(), 3 * 0.01 * whole.total)
+        self.assertEqual(list(whole.top(3).index), list(exact.nlargest(3).index))
+
+        with self.assertRaises(ValueError):
+            whole.merge(CountMinSketch(epsilon=0.1))
+
+    def test_chunks_merge_and_persist(self):
+        """Chunk sketches merge to the whole-data statistics and survive save/load."""
+        whole = SketchAggregates(precision=14).update(self.df)
+        merged = SketchAggregates(precision=14)
+        for start in range(0, len(self.df), 6000):
+            merged.merge(SketchAggregates(precision=14).update(self.df[start:start + 6000]))
+
+        path = os.path.join(tempfile.mkdtemp(), "sketches.npz")
+        merged.save(path)
+        results = SketchAggregates.load(path).to_results()
+        expected = whole.to_results()
+        self.assertEqual(results["distinct_customers"], expected["distinct_customers"])
+        pd.testing.assert_frame_equal(results["country_customers"], expected["country_customers"])
+        pd.testing.assert_frame_equal(results["top_products"], expected["top_products"])
+
+        france = self.df[self.df["Country"] == "France"]
+        self.assertEqual(results["approx_best_product_in_france"],
+                         france.groupby("Description", observed=True)["TotalAmount"].sum().idxmax())
+        exact_customers = self.df["CustomerID"].nunique()
+        self.assertLess(abs(results["distinct_customers"] - exact_customers), 0.05 * exact_customers)
+
+        with self.assertRaises(ValueError):
+            merged.merge(SketchAggregates(country="Germany"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.TransactionSchema import TransactionSchema
+from Scripts.DataCleaner import DataCleaner
+
+class TransactionSchemaTest(unittest.TestCase):
+    """Unit tests for the TransactionSchema class."""
+
+    def setUp(self):
+        """Creates raw transactions with int and string invoices and missing values."""
+        self.df = pd.DataFrame({
+            "InvoiceNo": [536365, "536365", "C536379", "536366", None],
+            "StockCode": ["85123A", 71053, "85123A", "D", "22633"],
+            "Description": ["WHITE HANGING HEART", "WHITE METAL LANTERN", None, "Discount", "HAND WARMER"],
+            "Quantity": [6, 6, -1, 1, 3],
+            "InvoiceDate": ["2010-12-01 08:26:00"] * 5,
+            "UnitPrice": [2.55, 3.39, 27.5, 0.0, 1.85],
+            "CustomerID": [17850.0, 17850.0, np.nan, 14527.0, 13047.0],
+            "Country": ["United Kingdom", "United Kingdom", "France", "France", "United Kingdom"]
+        })
+
+    def test_apply_sets_the_schema(self):
+        """Strings become categoricals, numbers get their narrow dtypes and cancellations are flagged."""
+        typed = TransactionSchema.apply(self.df)
+        for name in TransactionSchema.CATEGORIES:
+            self.assertIsInstance(typed[name].dtype, pd.CategoricalDtype)
+        self.assertEqual(typed["Quantity"].dtype, np.int32)
+        self.assertEqual(typed["UnitPrice"].dtype, np.float64)
+        self.assertEqual(typed["CustomerID"].dtype, pd.Int32Dtype())
+        self.assertTrue(pd.api.types.is_datetime64_dtype(typed["InvoiceDate"]))
+        self.assertEqual(typed["IsCancelled"].tolist(), [0, 0, 1, 0, 0])
+
+        # 536365 and "536365" are the same invoice, missing values stay missing
+        self.assertEqual(typed["InvoiceNo"].iloc[0], typed["InvoiceNo"].iloc[1])
+        self.assertTrue(pd.isna(typed["InvoiceNo"].iloc[4]) and pd.isna(typed["CustomerID"].iloc[2]))
+
+        # Applying it again keeps the frame as it is
+        pd.testing.assert_frame_equal(TransactionSchema.apply(typed), typed)
+
+    def test_cleaning_keeps_the_schema(self):
+        """DataCleaner keeps the typed columns and fills categorical descriptions."""
+        cleaner = DataCleaner(TransactionSchema.apply(self.df))
+        cleaner.remove_duplicates()
+        cleaner.handle_missing_values()
+        cleaner.filter_valid_transactions()
+        df, canceled_df = cleaner.get_cleaned_data()
+        self.assertEqual(len(canceled_df), 0)  # The cancellation has no CustomerID
+        self.assertIsInstance(df["Description"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["CustomerID"].dtype, pd.Int32Dtype())
+        self.assertEqual(len(df), 4)
+
+    def test_memory_usage_shrinks(self):
+        """The typed frame of repetitive transactions is several times smaller."""
+        large = pd.concat([self.df] * 2000, ignore_index=True)
+        self.assertLess(TransactionSchema.memory_usage(TransactionSchema.apply(large)) * 3,
+                        TransactionSchema.memory_usage(large))
+
+
+if __name__ == "__main__":
+    unittest.main()
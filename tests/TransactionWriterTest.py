@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Scripts.TransactionWriter import TransactionWriter
+from Scripts.TransactionSchema import TransactionSchema
+
+
+class TransactionWriterTest(unittest.TestCase):
+    """Unit tests for the TransactionWriter class."""
+
+    def setUp(self):
+        """Creates a typed frame of 1000 transactions over two years and three countries."""
+        rng = np.random.default_rng(0)
+        rows = 1000
+        dates = pd.Timestamp("2010-12-01") + pd.to_timedelta(rng.integers(0, 400 * 24, rows), unit="h")
+        self.df = TransactionSchema.apply(pd.DataFrame({
+            "InvoiceNo": rng.integers(536000, 536100, rows).astype(str),
+            "StockCode": rng.choice(["85123A", "71053", "84406B"], rows),
+            "Description": rng.choice(["MUG", "LANTERN", "COAT HANGER"], rows),
+            "Quantity": rng.integers(1, 20, rows),
+            "InvoiceDate": dates,
+            "UnitPrice": rng.uniform(0.5, 10, rows).round(2),
+            "CustomerID": rng.integers(12000, 18000, rows).astype(float),
+            "Country": rng.choice(["France", "Germany", "United Kingdom"], rows),
+        }))
+        self.df["YearMonth"] = self.df["InvoiceDate"].dt.to_period("M")
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_single_file_round_trip(self):
+        """The file has the requested row groups and codec and reads back with the same dtypes."""
+        path = os.path.join(self.tmp.name, "data.parquet")
+        stats = TransactionWriter(row_group_size=300, compression="snappy").write(self.df, path)
+        self.assertEqual((stats["rows"], stats["files"]), (1000, 1))
+
+        metadata = pq.ParquetFile(path).metadata
+        self.assertEqual(metadata.num_row_groups, 4)
+        self.assertEqual(metadata.row_group(0).column(0).compression, "SNAPPY")
+        pd.testing.assert_frame_equal(pd.read_parquet(path), self.df)
+
+    def test_hive_partitions(self):
+        """Year and Month are derived from InvoiceDate and every partition holds its own rows."""
+        path = os.path.join(self.tmp.name, "dataset")
+        writer = TransactionWriter(row_group_size=100, partition_by=("Year", "Month", "Country"))
+        writer.write(self.df, path)
+        writer.write(self.df, path)  # Replaces the previous dataset
+        self.assertTrue(os.path.isdir(os.path.join(path, "Year=2011", "Month=5", "Country=France")))
+
+        read = pd.read_parquet(path)
+        self.assertEqual(len(read), len(self.df))
+        france_may = self.df[(self.df["Country"] == "France") & (self.df["InvoiceDate"].dt.year == 2011)
+                             & (self.df["InvoiceDate"].dt.month == 5)]
+        partition = pd.read_parquet(os.path.join(path, "Year=2011", "Month=5", "Country=France"))
+        self.assertEqual(sorted(partition["InvoiceDate"]), sorted(france_may["InvoiceDate"]))
+
+        with self.assertRaises(ValueError):
+            TransactionWriter(compression="brotli2")
+
+
+if __name__ == "__main__":
+    unittest.main()